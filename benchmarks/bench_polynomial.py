@@ -0,0 +1,220 @@
+"""
+Benchmarks for src/useful_tools/math/poly_mul.py, poly_div.py, poly_eval.py, poly_ring.py, poly_parse.py,
+poly_gcd.py, poly_roots.py and polynomial.py
+Run from the repository root with python -m benchmarks.bench_polynomial
+"""
+import random
+from collections import deque
+from fractions import Fraction
+from itertools import zip_longest
+
+import numpy as np
+
+from benchmarks.bench_primes import best_of
+from src.useful_tools.math.poly_div import modular_divide, newton_divide, schoolbook_divide
+from src.useful_tools.math.poly_eval import horner_array, leaf_values, remainder_tree, subproduct_tree
+from src.useful_tools.math.poly_gcd import euclid_xgcd, modular_cofactors, modular_gcd, modular_resultant
+from src.useful_tools.math.poly_gcd import subresultant_gcd, subresultant_resultant
+from src.useful_tools.math.poly_mul import fft_mul, karatsuba_mul, multiply, ntt_mul, schoolbook_mul, toom3_mul
+from src.useful_tools.math.poly_parse import coef_matrix, parse_many, parse_terms
+from src.useful_tools.math.poly_ring import DECIMALS, FLOATS, GF, INTEGERS, RATIONALS
+from src.useful_tools.math.poly_roots import find_roots, roots_coefs
+from src.useful_tools.math.polynomial import Polynomial
+
+
+def random_coefs(n: int, bits: int) -> list[int]:
+    return [random.randint(-(1 << bits), 1 << bits) for _ in range(n)]
+
+
+def bench_algorithms(sizes: tuple[int, ...] = (8, 16, 32, 64, 128, 256, 512, 1024, 2048), bits: int = 20):
+    """
+    Times each multiplication algorithm on two random integer polynomials with n coefficients
+    The crossover points feed KARATSUBA_THRESHOLD, TOOM3_THRESHOLD and FFT_THRESHOLD in poly_mul.py
+    """
+    print(f'Multiplication algorithms ({bits} bit integer coefficients)')
+    for n in sizes:
+        a, b = random_coefs(n, bits), random_coefs(n, bits)
+        times = {
+            f.__name__: best_of(lambda: f(a, b))
+            for f in (schoolbook_mul, karatsuba_mul, toom3_mul, fft_mul, ntt_mul)
+        }
+        print(f'n={n:<5} ' + '  '.join(f'{name}: {t:.5f}s' for name, t in times.items()))
+
+
+def bench_fractions(sizes: tuple[int, ...] = (16, 32, 64, 128, 256, 512)):
+    """
+    Same as bench_algorithms, with Fraction coefficients, which only the recursive algorithms take
+    """
+    print('Multiplication algorithms (Fraction coefficients)')
+    for n in sizes:
+        a = [Fraction(random.randint(-99, 99), random.randint(1, 9)) for _ in range(n)]
+        b = [Fraction(random.randint(-99, 99), random.randint(1, 9)) for _ in range(n)]
+        times = {f.__name__: best_of(lambda: f(a, b)) for f in (schoolbook_mul, karatsuba_mul, toom3_mul)}
+        print(f'n={n:<5} ' + '  '.join(f'{name}: {t:.5f}s' for name, t in times.items()))
+
+
+def bench_division(sizes: tuple[int, ...] = (16, 32, 64, 128, 256, 512, 1024), bits: int = 20):
+    """
+    Times schoolbook against Newton division of a 2n coefficient polynomial by a monic n coefficient one,
+    for integer and float coefficients
+    The crossover points feed NEWTON_THRESHOLD in poly_div.py
+    """
+    print(f'Division ({bits} bit integer coefficients, and floats)')
+    for n in sizes:
+        b = random_coefs(n - 1, bits) + [1]
+        a = [x + y for x, y in zip_longest(multiply(b, random_coefs(n, bits)), random_coefs(n - 1, bits), fillvalue=0)]
+        fa, fb = [float(x) for x in a], [float(x) for x in b]
+        times = {
+            'schoolbook': best_of(lambda: schoolbook_divide(a, b)),
+            'modular newton': best_of(lambda: modular_divide(a, b)),
+            'float schoolbook': best_of(lambda: schoolbook_divide(fa, fb)),
+            'float newton': best_of(lambda: newton_divide(fa, fb)),
+        }
+        print(f'n={n:<5} ' + '  '.join(f'{name}: {t:.5f}s' for name, t in times.items()))
+
+
+def bench_non_monic_division(cases: tuple[tuple[int, int, int], ...] = ((1000, 300, 7), (4000, 2000, 3)),
+                              bits: int = 20):
+    """
+    Times modular Newton division of an n coefficient polynomial by an m coefficient one with leading coefficient c,
+    for a dividend b q + r with an integer quotient, and for a random one, whose quotient has denominators up to
+    c^(n - m + 1); schoolbook division over Fractions takes over 10s for the first case
+    """
+    print(f'Non-monic division ({bits} bit integer coefficients)')
+    for n, m, c in cases:
+        b = random_coefs(m - 1, bits) + [c]
+        exact = [x + y for x, y in zip_longest(multiply(b, random_coefs(n - m + 1, bits)), random_coefs(m - 1, bits),
+                                               fillvalue=0)]
+        rational = random_coefs(n, bits)
+        times = {
+            'integer quotient': best_of(lambda: modular_divide(exact, b)),
+            'rational quotient': best_of(lambda: modular_divide(rational, b), repeat=1),
+        }
+        print(f'n={n:<5} m={m:<5} c={c} ' + '  '.join(f'{name}: {t:.3f}s' for name, t in times.items()))
+
+
+def bench_evaluation(sizes: tuple[int, ...] = (256, 1024, 4096, 10 ** 4),
+                     moduli: tuple[int, ...] = (998244353, 2 ** 61 - 1)):
+    """
+    Times Horner at every point against the subproduct tree, for n coefficients and n points mod each modulus,
+    and float Horner over a NumPy array
+    The crossover points feed TREE_THRESHOLD in poly_eval.py
+    """
+    print('Multipoint evaluation')
+    for n in sizes:
+        for modulus in moduli:
+            coefs, points = [random.randrange(modulus) for _ in range(n)], [random.randrange(modulus) for _ in range(n)]
+            leaf_size = 256 if modulus < 1 << 31 else 16
+            horner = best_of(lambda: leaf_values(coefs, points, modulus), repeat=1)
+            tree = best_of(lambda: remainder_tree(coefs, subproduct_tree(points, modulus), points, modulus, leaf_size),
+                           repeat=1)
+            print(f'n={n:<6} mod {modulus:<20} horner: {horner:.4f}s  subproduct tree: {tree:.4f}s')
+        array = np.random.default_rng(0).random(n)
+        print(f'n={n:<6} float horner_array: {best_of(lambda: horner_array(array, array)):.4f}s')
+
+
+def bench_rings(n: int = 3000, bits: int = 20):
+    """
+    Times Polynomial multiplication, addition and evaluation at 50 points in each coefficient ring, dict backend
+    """
+    print(f'Coefficient rings, {n} coefficients of {bits} bits')
+    coefs = random_coefs(n, bits)
+    for ring in (DECIMALS, INTEGERS, RATIONALS, FLOATS, GF(998244353)):
+        p = Polynomial.from_iterable(coefs, ring=ring)
+        times = {
+            'mul': best_of(lambda: p * p),
+            'add': best_of(lambda: p + p),
+            'evaluate': best_of(lambda: [p(x) for x in range(50)]),
+        }
+        print(f'{ring!s:<16} ' + '  '.join(f'{name}: {t:.4f}s' for name, t in times.items()))
+
+
+def bench_parsing(lines: int = 10 ** 5, terms: int = 10):
+    """
+    Times parsing polynomial strings one at a time, in bulk, straight into a coefficient matrix,
+    and into polynomials with both backends; the streams are drained without keeping what they yield,
+    so the times are the parsers' own rather than the garbage collector's over the kept results
+    """
+    print(f'Parsing {lines} strings of {terms} terms')
+    strs = [
+        ''.join(f'{random.choice("+-")}{random.randint(1, 10 ** 6)}x^{random.randint(0, 50)}' for _ in range(terms))
+        for _ in range(lines)
+    ]
+    times = {
+        'parse_terms': best_of(lambda: [parse_terms(s) for s in strs], repeat=1),
+        'parse_many': best_of(lambda: deque(parse_many(strs), maxlen=0), repeat=1),
+        'coef_matrix': best_of(lambda: coef_matrix(strs), repeat=1),
+        'from_str_many': best_of(lambda: deque(Polynomial.from_str_many(strs), maxlen=0), repeat=1),
+        'dense': best_of(lambda: deque(Polynomial.from_str_many(strs, backend='dense'), maxlen=0), repeat=1),
+    }
+    for name, t in times.items():
+        print(f'  {name:<14} {t:.3f}s, {lines * terms / t / 1e6:.2f}M terms/s')
+
+
+def bench_gcd(sizes: tuple[int, ...] = (4, 8, 16, 24, 32, 48, 64), large: tuple[int, ...] = (250, 500, 1000),
+              bits: int = 20):
+    """
+    Times the subresultant PRS (and Euclid over Fractions for cofactors, up to degree 16) against the modular
+    algorithms, for the thresholds in poly_gcd.py, then the modular ones alone on long polynomials
+    """
+    print(f'Polynomial gcd, resultant and cofactors, {bits} bit coefficients')
+    for n in sizes + large:
+        common = random_coefs(n // 4 + 1, bits)
+        a, b = multiply(common, random_coefs(n, bits)), multiply(common, random_coefs(n - 1, bits))
+        c, d = random_coefs(n + 1, bits), random_coefs(n, bits)
+        kernels = [('gcd', modular_gcd, subresultant_gcd, a, b),
+                   ('resultant', modular_resultant, subresultant_resultant, c, d),
+                   ('cofactors', modular_cofactors, euclid_xgcd if n <= 16 else None, c, d)]
+        times = []
+        for name, modular, direct, x, y in kernels:
+            times.append(f'{name} modular: {best_of(lambda: modular(x, y), repeat=1):.4f}s')
+            if direct is not None and n not in large:
+                times[-1] += f' direct: {best_of(lambda: direct(x, y), repeat=1):.4f}s'
+        print(f'n={n:<5} ' + '  '.join(times))
+
+
+def bench_roots(sizes: tuple[int, ...] = (10, 50, 100, 200, 500, 1000), batch: tuple[int, ...] = (2, 3, 5, 10, 20),
+                rows: int = 2000, digits: int = 100):
+    """
+    Times the companion matrix against Aberth's iterations, on one random polynomial of each degree, then on batches
+    of rows polynomials, and the refinement of integer polynomials to digits digits
+    The crossover points feed ABERTH_THRESHOLD and BATCH_ABERTH_THRESHOLD in poly_roots.py
+    """
+    print('Root finding')
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        coefs = rng.standard_normal(n + 1)
+        times = {method: best_of(lambda: find_roots(coefs, method), repeat=1) for method in ('eig', 'aberth')}
+        print(f'n={n:<5} ' + '  '.join(f'{name}: {t:.4f}s' for name, t in times.items()))
+    for n in batch:
+        coefs = rng.standard_normal((rows, n + 1))
+        times = {method: best_of(lambda: find_roots(coefs, method), repeat=1) for method in ('eig', 'aberth')}
+        print(f'{rows} x n={n:<3} ' + '  '.join(f'{name}: {t:.4f}s' for name, t in times.items()))
+    for n in sizes[:3]:
+        coefs = random_coefs(n + 1, 20)
+        print(f'n={n:<5} {digits} digits: {best_of(lambda: roots_coefs(coefs, digits), repeat=1):.4f}s')
+
+
+def bench_polynomial(degree: int = 10 ** 5, bits: tuple[int, ...] = (10, 30, 60)):
+    """
+    Times Polynomial multiplication end to end, on both backends
+    """
+    print(f'Polynomial product, degree {degree}')
+    for b in bits:
+        for backend in ('dense', 'dict'):
+            p = Polynomial.from_iterable(random_coefs(degree + 1, b), backend=backend)
+            q = Polynomial.from_iterable(random_coefs(degree + 1, b), backend=backend)
+            print(f'  {b} bit coefficients, {backend}: {best_of(lambda: p * q, repeat=1):.3f}s')
+
+
+if __name__ == '__main__':
+    bench_algorithms()
+    bench_fractions()
+    bench_division()
+    bench_non_monic_division()
+    bench_evaluation()
+    bench_rings()
+    bench_parsing()
+    bench_gcd()
+    bench_roots()
+    bench_polynomial()
@@ -0,0 +1,80 @@
+"""
+Benchmarks for src/useful_tools/math/primes.py
+Run from the repository root with python -m benchmarks.bench_primes
+"""
+import os
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+
+from src.useful_tools.math.primes import gen_primes_below_n, is_prime, is_prime_batch, parallel_sieve, range_sieve
+from src.useful_tools.math.primes import sieve_of_eratosthenes
+from src.useful_tools.math.wheels import WHEEL_30, make_wheel
+
+
+def best_of(f: Callable[[], object], repeat: int = 3) -> float:
+    """
+    :param f: Function to time
+    :param repeat: Number of runs
+    :return: Fastest wall time, in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def bench_parallel_sieve(sizes: tuple[int, ...] = (10 ** 8, 10 ** 9)):
+    cores = os.cpu_count() or 1
+    print(f'parallel_sieve vs sieve_of_eratosthenes ({cores} cores)')
+    for n in sizes:
+        base = best_of(lambda: sieve_of_eratosthenes(n))
+        compressed = best_of(lambda: sieve_of_eratosthenes(n, compressed=True))
+        print(f'n={n:.0e}  sieve_of_eratosthenes: {base:.3f}s  compressed: {compressed:.3f}s')
+        for workers in sorted({1, 2, 4, cores}):
+            t = best_of(lambda: parallel_sieve(n, workers=workers))
+            print(f'  workers={workers:<3} {t:.3f}s  speedup {base / t:.2f}x')
+
+
+def bench_wheels(sizes: tuple[int, ...] = (10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8), offset: int = 10 ** 12):
+    """
+    Times each wheel on sieving [0, n) and the window [offset, offset + n), with and without generating the primes
+    Larger wheels have come out slower at every size, which is why the sieves default to WHEEL_30
+    """
+    print('Wheels (sieve only / sieve and generate primes)')
+    for n in sizes:
+        print(f'n={n:.0e}')
+        for wheel in (WHEEL_30, make_wheel(4), make_wheel(5)):
+            sieve = best_of(lambda: [*range_sieve(0, n, wheel=wheel)])
+            window = best_of(lambda: [*range_sieve(offset, offset + n, wheel=wheel)])
+            gen = best_of(lambda: sum(1 for _ in gen_primes_below_n(n, wheel=wheel)))
+            print(f'  mod {wheel.modulus:<5} [0, n): {sieve:.4f}s  [offset, offset + n): {window:.4f}s  '
+                  f'gen_primes_below_n: {gen:.4f}s')
+
+
+def bench_batch(count: int = 10 ** 6):
+    """
+    Throughput of is_prime_batch against is_prime per element, on uniform random uint64 values below 2^32,
+    over the full 64-bit range, and odd over the full range, which get past fewer of the cheap trial divisions
+    """
+    print(f'is_prime_batch on {count} random values')
+    rng = np.random.default_rng(0)
+    inputs = {
+        'below 2^32': rng.integers(0, 1 << 32, count, dtype=np.uint64),
+        'full range': rng.integers(0, 1 << 64, count, dtype=np.uint64, endpoint=False),
+        'odd, full range': rng.integers(0, 1 << 64, count, dtype=np.uint64, endpoint=False) | np.uint64(1),
+    }
+    for name, values in inputs.items():
+        batch = best_of(lambda: is_prime_batch(values))
+        sample = values[:count // 10].tolist()
+        scalar = best_of(lambda: [is_prime.func(n) for n in sample], repeat=1) * 10
+        print(f'  {name:<16} batch: {count / batch / 1e6:.2f}M/s  is_prime: {count / scalar / 1e6:.2f}M/s')
+
+
+if __name__ == '__main__':
+    bench_batch()
+    bench_wheels()
+    bench_parallel_sieve()
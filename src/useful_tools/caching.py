@@ -0,0 +1,313 @@
+import os
+import pickle
+import sqlite3
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from enum import Enum, auto
+from functools import lru_cache, update_wrapper
+from typing import Any, Final, Literal
+
+from attrs import define
+
+__all__ = ['CacheInfo', 'LRUCache', 'ARCCache', 'SharedCacheTier', 'CachedFunction', 'configurable_cache']
+
+
+class Missing(Enum):
+    """
+    Type of the MISSING sentinel, for absent cache entries and arguments left unchanged
+    """
+    MISSING = auto()
+
+
+MISSING: Final = Missing.MISSING
+
+
+@define(frozen=True)
+class CacheInfo:
+    hits: int
+    shared_hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+    policy: str
+
+
+class LRUCache:
+    """
+    Least recently used eviction
+    """
+    __slots__ = ('maxsize', 'evictions', '_data')
+
+    def __init__(self, maxsize: int | None = 128):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        # A sentinel check rather than catching KeyError, which is most of the cost of a miss
+        value = self._data.get(key, MISSING)
+        if value is MISSING:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self.evictions = 0
+
+
+class ARCCache:
+    """
+    Adaptive replacement cache (Megiddo and Modha, 2003)
+    Splits entries between recency (t1) and frequency (t2) lists, and moves the target size of t1
+    according to hits on the ghost lists b1 and b2 of recently evicted keys
+    """
+    __slots__ = ('maxsize', 'evictions', '_p', '_t1', '_t2', '_b1', '_b2')
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize is None or maxsize < 1:
+            raise ValueError(f'ARC needs a positive maxsize, got {maxsize}')
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._p = 0
+        self._t1: OrderedDict[Hashable, Any] = OrderedDict()
+        self._t2: OrderedDict[Hashable, Any] = OrderedDict()
+        self._b1: OrderedDict[Hashable, None] = OrderedDict()
+        self._b2: OrderedDict[Hashable, None] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        if key in self._t1:
+            value = self._t2[key] = self._t1.pop(key)
+            return value
+        if key in self._t2:
+            self._t2.move_to_end(key)
+            return self._t2[key]
+        return default
+
+    def __setitem__(self, key: Hashable, value: Any):
+        if key in self._t1 or key in self._t2:
+            self._t1.pop(key, None)
+            self._t2[key] = value
+            self._t2.move_to_end(key)
+            return
+        c = self.maxsize
+        if key in self._b1:
+            self._p = min(c, self._p + max(len(self._b2) // len(self._b1), 1))
+            self._replace(key)
+            del self._b1[key]
+            self._t2[key] = value
+            return
+        if key in self._b2:
+            self._p = max(0, self._p - max(len(self._b1) // len(self._b2), 1))
+            self._replace(key)
+            del self._b2[key]
+            self._t2[key] = value
+            return
+
+        l1 = len(self._t1) + len(self._b1)
+        total = l1 + len(self._t2) + len(self._b2)
+        if l1 == c:
+            if len(self._t1) < c:
+                self._b1.popitem(last=False)
+                self._replace(key)
+            else:
+                self._t1.popitem(last=False)
+                self.evictions += 1
+        elif total >= c:
+            if total == 2 * c:
+                self._b2.popitem(last=False)
+            self._replace(key)
+        self._t1[key] = value
+
+    def _replace(self, key: Hashable):
+        """
+        Evicts the LRU entry of t1 or t2 into its ghost list, depending on the target size of t1
+        """
+        if self._t1 and (len(self._t1) > self._p or (key in self._b2 and len(self._t1) == self._p)):
+            old, _ = self._t1.popitem(last=False)
+            self._b1[old] = None
+        else:
+            old, _ = self._t2.popitem(last=False)
+            self._b2[old] = None
+        self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._t1) + len(self._t2)
+
+    def clear(self):
+        for d in (self._t1, self._t2, self._b1, self._b2):
+            d.clear()
+        self._p = 0
+        self.evictions = 0
+
+
+class SharedCacheTier:
+    """
+    File-backed cache tier in an SQLite database, shared by every process that opens the same path
+    Keys and values are pickled, so both have to be picklable
+    """
+    __slots__ = ('path', 'namespace', '_connection', '_pid')
+
+    def __init__(self, path: str | os.PathLike, namespace: str):
+        self.path = os.fspath(path)
+        self.namespace = namespace
+        self._connection: sqlite3.Connection | None = None
+        self._pid = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # SQLite connections can't cross a fork, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (namespace TEXT, key BLOB, value BLOB, PRIMARY KEY (namespace, key))'
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        row = self.connection.execute('SELECT value FROM cache WHERE namespace = ? AND key = ?',
+                                      (self.namespace, pickle.dumps(key))).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.connection.execute('INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+                                (self.namespace, pickle.dumps(key), pickle.dumps(value)))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+POLICIES = {'lru': LRUCache, 'arc': ARCCache}
+
+
+class CachedFunction:
+    """
+    Single-argument-friendly function cache with a swappable eviction policy, counters,
+    and an optional shared tier consulted on local misses
+    The default, a local LRU cache without a shared tier, is functools.lru_cache, whose lookups in C cost a fraction
+    of a call through LRUCache; ARC and the shared tier go through the Python caches
+    """
+
+    def __init__(self, func: Callable, *, maxsize: int | None = 128, policy: Literal['lru', 'arc'] = 'lru',
+                 shared_path: str | os.PathLike | None = None, copy: Callable[[Any], Any] | None = None,
+                 bypass: Callable[[Any], bool] | None = None):
+        """
+        :param func: Function to cache
+        :param maxsize: Local cache size, None for unbounded (LRU only)
+        :param policy: Eviction policy, 'lru' or 'arc'
+        :param shared_path: SQLite file for a cache tier shared across processes
+        :param copy: Applied to cached values before returning them, for mutable results
+        :param bypass: Predicate on the argument of single-argument calls, which go straight to func (uncached and
+        uncounted) when it holds, for arguments that are cheaper to compute than to look up
+        """
+        update_wrapper(self, func)
+        self.func = func
+        self.copy = copy
+        self.bypass = bypass
+        self.maxsize, self.policy = maxsize, policy
+        self.hits = self.shared_hits = self.misses = 0
+        self.cache: LRUCache | ARCCache | None = None
+        self.lookup: Callable = func
+        self.shared: SharedCacheTier | None = None
+        self.configure(maxsize=maxsize, policy=policy, shared_path=shared_path)
+
+    def configure(self, *, maxsize: int | None | Missing = MISSING, policy: Literal['lru', 'arc'] | None = None,
+                  shared_path: str | os.PathLike | None | Missing = MISSING):
+        """
+        Resizes, changes policy or (de)attaches the shared tier. The local cache and counters are reset
+        :param maxsize: Local cache size, None for unbounded (LRU only)
+        :param policy: Eviction policy, 'lru' or 'arc'
+        :param shared_path: SQLite file for a cache tier shared across processes, None to detach
+        """
+        if maxsize is MISSING:
+            maxsize = self.maxsize
+        if policy is None:
+            policy = self.policy
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown cache policy {policy!r}, expected one of {", ".join(POLICIES)}')
+        # Only the Python caches are built here, the lru_cache path needs none
+        shared = self.shared is not None if shared_path is MISSING else shared_path is not None
+        cache = POLICIES[policy](maxsize) if policy != 'lru' or shared else None
+        if shared_path is not MISSING:
+            if self.shared is not None:
+                self.shared.close()
+            self.shared = None if shared_path is None else SharedCacheTier(
+                shared_path, f'{self.func.__module__}.{self.func.__qualname__}'
+            )
+        self.maxsize, self.policy = maxsize, policy
+        self.cache = cache
+        self.lookup = lru_cache(maxsize)(self.func) if cache is None else self.cached_call
+        self.hits = self.shared_hits = self.misses = 0
+
+    def __call__(self, *args, **kwargs):
+        if self.bypass is not None and len(args) == 1 and not kwargs and self.bypass(args[0]):
+            return self.func(*args)
+        value = self.lookup(*args, **kwargs)
+        return value if self.copy is None else self.copy(value)
+
+    def cached_call(self, *args, **kwargs):
+        """
+        Lookup through the Python cache and the shared tier, for ARC or when a shared tier is attached
+        """
+        key = args[0] if len(args) == 1 and not kwargs else (args, tuple(sorted(kwargs.items())))
+        value = self.cache.get(key)
+        if value is not MISSING:
+            self.hits += 1
+        elif self.shared is not None and (value := self.shared.get(key)) is not MISSING:
+            self.shared_hits += 1
+            self.cache[key] = value
+        else:
+            self.misses += 1
+            value = self.cache[key] = self.func(*args, **kwargs)
+            if self.shared is not None:
+                self.shared[key] = value
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        if self.cache is None:
+            # Every lru_cache miss inserts an entry, so the ones no longer there were evicted
+            info = self.lookup.cache_info()
+            return CacheInfo(info.hits, 0, info.misses, info.misses - info.currsize, info.maxsize, info.currsize,
+                             self.policy)
+        return CacheInfo(self.hits, self.shared_hits, self.misses, self.cache.evictions,
+                         self.cache.maxsize, len(self.cache), self.policy)
+
+    def cache_clear(self):
+        """
+        Clears the local cache and counters (the shared tier is left to other processes)
+        """
+        if self.cache is None:
+            self.lookup.cache_clear()
+        else:
+            self.cache.clear()
+        self.hits = self.shared_hits = self.misses = 0
+
+
+def configurable_cache(*, maxsize: int | None = 128, policy: Literal['lru', 'arc'] = 'lru',
+                       shared_path: str | os.PathLike | None = None,
+                       copy: Callable[[Any], Any] | None = None,
+                       bypass: Callable[[Any], bool] | None = None) -> Callable[[Callable], CachedFunction]:
+    """
+    Decorator version of CachedFunction
+    """
+    return lambda func: CachedFunction(func, maxsize=maxsize, policy=policy, shared_path=shared_path, copy=copy,
+                                       bypass=bypass)
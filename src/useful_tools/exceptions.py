@@ -8,4 +8,16 @@ class InvalidPolynomialTypeError(Error):
         super().__init__()
 
     def __str__(self):
-        return f'Expected type str | Sequence | CoefDict, got {self.passed_type} instead'
+        return f'Expected type str | Sequence | np.ndarray | CoefDict | CoefArray, got {self.passed_type} instead'
+
+
+class PolynomialParseError(Error):
+    def __init__(self, poly_str: str, position: int, line: int | None = None):
+        self.poly_str = poly_str
+        self.position = position
+        self.line = line
+        super().__init__()
+
+    def __str__(self):
+        line_str = '' if self.line is None else f' on line {self.line}'
+        return f'Invalid polynomial string {self.poly_str!r}{line_str}, at position {self.position}'
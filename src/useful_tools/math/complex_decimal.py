@@ -27,6 +27,30 @@ class ComplexDecimal:
     def __sub__(self, other):
         return self + other.__neg__()
 
+    def __mul__(self, other):
+        return ComplexDecimal(self.real * other.real - self.imag * other.imag,
+                              self.real * other.imag + self.imag * other.real)
+
+    def __truediv__(self, other):
+        norm = other.real * other.real + other.imag * other.imag
+        return ComplexDecimal((self.real * other.real + self.imag * other.imag) / norm,
+                              (self.imag * other.real - self.real * other.imag) / norm)
+
+    def __abs__(self):
+        return (self.real * self.real + self.imag * self.imag).sqrt()
+
+    def __bool__(self):
+        return bool(self.real or self.imag)
+
+    def __complex__(self):
+        return complex(float(self.real), float(self.imag))
+
+    def __pos__(self):
+        """
+        :return: self rounded to the current Decimal context
+        """
+        return ComplexDecimal(+self.real, +self.imag)
+
 
 def complexdecimal_main():
     x = ComplexDecimal('Inf', 3)
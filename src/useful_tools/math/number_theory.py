@@ -1,8 +1,24 @@
 import math
 from bisect import bisect
+from collections import Counter
 from functools import lru_cache
-from operator import itemgetter
-from typing import Iterator, Literal, overload
+from typing import Iterable, Iterator, Literal, overload
+
+import numpy as np
+
+from src.useful_tools.math.primes import factors, prime_factorization
+
+# Largest n that count_non_strict_integer_partitions reads off partition_table() instead of the Rademacher series
+# (about where the two cross over)
+PARTITION_TABLE_LIMIT = 1 << 8
+
+# p-multiperfect numbers M (sigma(M) = pM), for p/q = sum over d | M of 1/(qd)
+MULTIPERFECT = {2: 6, 3: 120, 4: 30240}
+# Multipliers M tried for qM practical before falling back to powers of two
+PRACTICAL_SEARCH_LIMIT = 1 << 10
+
+# Backing store for pentagonal_array
+pentagonal_cache = np.zeros(0, dtype=np.int64)
 
 
 @overload
@@ -30,59 +46,416 @@ def generalized_pentagonal_nums(n: int, *, include_index: bool = False) -> Itera
         k = (k <= 0) - k
 
 
-def count_non_strict_integer_partitions(num: int) -> int:
+def pentagonal_array(count: int) -> np.ndarray:
+    """
+    The first count generalized pentagonal numbers, in the order of generalized_pentagonal_nums,
+    so entry j is k(3k - 1) / 2 for k = 0, 1, -1, 2, -2, ...
+    Sliced from a cached backing array that doubles whenever a longer prefix is asked for
+    :param count: Number of pentagonal numbers
+    :return: Read-only int64 array
+    """
+    global pentagonal_cache
+    if count > len(pentagonal_cache):
+        j = np.arange(max(count, 2 * len(pentagonal_cache)), dtype=np.int64)
+        k = np.where(j % 2, (j + 1) // 2, -(j // 2))
+        pentagonal_cache = k * (3 * k - 1) // 2
+        pentagonal_cache.flags.writeable = False
+    return pentagonal_cache[:count]
+
+
+def pentagonal_count(n: int) -> int:
+    """
+    :param n: num
+    :return: Number of generalized pentagonal numbers <= n, i.e. the length of the prefix of pentagonal_array()
+    that is <= n
+    """
+    if n < 0:
+        return 0
+    # k(3k - 1) / 2 <= n iff 6k - 1 <= sqrt(24n + 1) for k > 0, and 6k + 1 <= sqrt(24n + 1) for the k < 0 side
+    s = math.isqrt(24 * n + 1)
+    return 1 + (s + 1) // 6 + (s - 1) // 6
+
+
+def largest_pentagonal(n: int) -> int:
+    """
+    :param n: num >= 0
+    :return: The largest generalized pentagonal number <= n
+    """
+    if n < 0:
+        raise ValueError(f'no generalized pentagonal number is <= {n}')
+    j = pentagonal_count(n) - 1
+    k = (j + 1) // 2 if j % 2 else -(j // 2)
+    return k * (3 * k - 1) // 2
+
+
+def count_non_strict_integer_partitions(num: int, modulus: int | None = None) -> int:
     """
     https://en.wikipedia.org/wiki/Partition_(number_theory)
-    :return: number of partitions less than num
+    Reads partition_table() for small num or when a modulus is given, and sums the Hardy-Ramanujan-Rademacher
+    series otherwise
+    :param num: num
+    :param modulus: If given, returns the count mod modulus
+    :return: number of partitions of num
+    """
+    if num < 0:
+        return 0
+    if modulus is None and num > PARTITION_TABLE_LIMIT:
+        return rademacher_partitions(num)
+    return int(partition_table(num, modulus)[-1])
+
+
+@overload
+def partition_table(n: int, modulus: None = None) -> list[int]:
+    ...
+
+
+@overload
+def partition_table(n: int, modulus: int) -> np.ndarray | list[int]:
+    ...
+
+
+def partition_table(n: int, modulus: int | None = None) -> np.ndarray | list[int]:
+    """
+    Partition numbers p(0), ..., p(n), by Euler's pentagonal number recurrence in O(n sqrt n)
+    p(k) = sum over generalized pentagonal g_j of (-1)^((j - 1) // 2) p(k - g_j)
+    :param n: Largest number to count partitions of
+    :param modulus: If given, the table is reduced mod modulus
+    :return: Exact counts as Python ints if modulus is None, otherwise counts mod modulus as an int64 array
+    (as Python ints if modulus is too large for the recurrence's sums to fit in int64)
+    """
+    if n < 0:
+        raise ValueError(f'partition numbers are undefined for {n}')
+    pentagonal = pentagonal_array(pentagonal_count(n))[1:].tolist()
+    signs = [1 if j % 4 < 2 else -1 for j in range(len(pentagonal))]
+    if modulus is not None and modulus * (len(pentagonal) + 1) < 1 << 63:
+        table = np.zeros(n + 1, dtype=np.int64)
+        table[0] = 1 % modulus
+        offsets, sign_array = np.array(pentagonal, dtype=np.int64), np.array(signs, dtype=np.int64)
+        count = 0
+        for k in range(1, n + 1):
+            while count < len(pentagonal) and pentagonal[count] <= k:
+                count += 1
+            table[k] = table[k - offsets[:count]] @ sign_array[:count] % modulus
+        return table
+
+    table = [1]
+    terms = [*zip(pentagonal, signs)]
+    for k in range(1, n + 1):
+        total = 0
+        for g, sign in terms:
+            if g > k:
+                break
+            total += table[k - g] if sign > 0 else -table[k - g]
+        table.append(total if modulus is None else total % modulus)
+    return table
+
+
+def rademacher_partitions(n: int) -> int:
+    """
+    p(n) from the Hardy-Ramanujan-Rademacher series, in fixed-point integer arithmetic
+    p(n) = 4 / m * sum over k of S_k(n) (cosh(z_k) - sinh(z_k) / z_k),
+    where m = 24n - 1, z_k = pi sqrt(m) / 6k and S_k(n) = sqrt(3 / k) A_k(n) is given by Selberg's formula
+    Each term is computed at just enough bits for an absolute error well below 1, and the series is cut off
+    once Rademacher's remainder bound is below 1/4
+    :param n: num >= 2
+    :return: p(n)
+    """
+    m = 24 * n - 1
+    terms = rademacher_term_count(n)
+    frac_bits = 24 + terms.bit_length()
+    z1 = math.pi * math.sqrt(m) / 6
+    ls = np.arange(2 * terms, dtype=np.int64)
+    pentagonal = (3 * ls * ls + ls) // 2
+    total = 0
+    for k in range(1, terms + 1):
+        # (3l^2 + l) / 2 = -n (mod k) for 0 <= l < 2k
+        solutions = np.flatnonzero((pentagonal[:2 * k] + n % k) % k == 0).tolist()
+        if not solutions:
+            continue
+        bits = frac_bits + math.ceil(z1 / k / math.log(2)) + m.bit_length() // 2 + 16
+        pi = fixed_pi(bits)
+        z = pi * math.isqrt(m << 2 * bits) // (6 * k) >> bits
+        selberg = sum(fixed_cos(pi * (6 * l + 1) // (6 * k), bits) * (-1) ** l for l in solutions)
+        exp_z = fixed_exp(z, bits)
+        exp_neg_z = (1 << 2 * bits) // exp_z
+        cosh, sinh = (exp_z + exp_neg_z) >> 1, (exp_z - exp_neg_z) >> 1
+        total += selberg * (cosh - (sinh << bits) // z) >> 2 * bits - frac_bits
+    return (4 * total + (m << frac_bits - 1)) // (m << frac_bits)
+
+
+def rademacher_term_count(n: int) -> int:
+    """
+    :param n: num >= 2
+    :return: Number of terms of the Rademacher series after which the remainder is below 1/4,
+    by Lehmer's bound 44 pi^2 / 225 sqrt(3) N^(-1/2) + pi sqrt(2) / 75 (N / (n - 1))^(1/2) sinh(pi sqrt(2n / 3) / N)
+    """
+    c = math.pi * math.sqrt(2 * n / 3)
+    # sinh overflows floats past 710
+    terms = max(1, math.ceil(c / 700))
+    while True:
+        bound = (44 * math.pi ** 2 / (225 * math.sqrt(3)) / math.sqrt(terms)
+                 + math.pi * math.sqrt(2) / 75 * math.sqrt(terms / (n - 1)) * math.sinh(c / terms))
+        if bound < 0.25:
+            return terms
+        terms += 1
+
+
+def fixed_pi(bits: int) -> int:
+    """
+    :param bits: Fractional bits
+    :return: floor(pi * 2^bits), up to an ulp, by Machin's formula pi = 16 atan(1/5) - 4 atan(1/239)
+    Computed at the next power of two bits and cached, so nearby precisions share the work
+    """
+    return fixed_constant_bits('pi', 1 << bits.bit_length()) >> (1 << bits.bit_length()) - bits
+
+
+def fixed_atan_inv(x: int, bits: int) -> int:
+    """
+    :return: atan(1 / x) * 2^bits, by its Taylor series
+    """
+    power = total = (1 << bits) // x
+    x2, k = x * x, 1
+    while power:
+        power //= x2
+        k += 2
+        total += -(power // k) if k % 4 == 3 else power // k
+    return total
+
+
+def fixed_ln2(bits: int) -> int:
     """
-    *penta_nums, = generalized_pentagonal_nums(num + 1, include_index=True)
+    :param bits: Fractional bits
+    :return: ln(2) * 2^bits, up to an ulp, as 2 atanh(1/3)
+    Computed at the next power of two bits and cached, so nearby precisions share the work
+    """
+    return fixed_constant_bits('ln2', 1 << bits.bit_length()) >> (1 << bits.bit_length()) - bits
+
 
-    @lru_cache(maxsize=num)
-    def p(n: int) -> int:
-        if n == 0:
-            return 1
-        return sum(p(n - a) * (1 if k % 2 else -1) for k, a in penta_nums[1:bisect(penta_nums, n, key=itemgetter(1))])
-    return p(num)
+@lru_cache
+def fixed_constant_bits(name: Literal['pi', 'ln2'], bits: int) -> int:
+    """
+    :return: pi or ln(2) * 2^bits, to within a few ulps
+    """
+    guard = bits + 16
+    if name == 'pi':
+        return 16 * fixed_atan_inv(5, guard) - 4 * fixed_atan_inv(239, guard) >> 16
+    power, total, k = (1 << guard) // 3, 0, 1
+    while power:
+        total += power // k
+        power //= 9
+        k += 2
+    return 2 * total >> 16
+
+
+def fixed_exp(x: int, bits: int) -> int:
+    """
+    :param x: Nonnegative fixed-point number with the given fractional bits
+    :param bits: Fractional bits
+    :return: exp(x) in the same fixed point, to relative precision about 2^-bits
+    Writes x = q ln(2) + r, then sums the Taylor series of exp(r / 2^t) and squares t times
+    """
+    squarings = math.isqrt(bits) // 2
+    work = bits + squarings + (x >> bits).bit_length() + 24
+    x <<= work - bits
+    ln2 = fixed_ln2(work)
+    q, r = divmod(x, ln2)
+    r >>= squarings
+    total = term = 1 << work
+    i = 1
+    while term:
+        term = (term * r >> work) // i
+        total += term
+        i += 1
+    for _ in range(squarings):
+        total = total * total >> work
+    shift = q - work + bits
+    return total << shift if shift >= 0 else total >> -shift
+
+
+def fixed_cos(x: int, bits: int) -> int:
+    """
+    :param x: Nonnegative fixed-point number with the given fractional bits
+    :param bits: Fractional bits
+    :return: cos(x) in the same fixed point, to absolute precision about 2^-bits
+    """
+    work = bits + 16
+    x <<= 16
+    pi = fixed_pi(work)
+    x %= 2 * pi
+    if x > pi:
+        x = 2 * pi - x
+    sign = 1
+    if 2 * x > pi:
+        x, sign = pi - x, -1
+    x2 = x * x >> work
+    total = term = 1 << work
+    i = 1
+    while term:
+        term = -(term * x2 >> work) // (i * (i + 1))
+        total += term
+        i += 2
+    return sign * total >> 16
 
 
 def egyptian_decomposition(p: int, q: int, /, *,
-                           force: bool = False) -> list[int] | list[list[int]]:
+                           force: bool = False) -> list[int]:
     """
     Given a rational number 0 < p/q < 1, find a decomposition of p/q into a sum of distinct unit fractions
+    Tries a two-term split from divisors of q, a practical number multiple of q, and the multiperfect identity,
+    keeping whichever has the smallest largest denominator, so denominators stay polynomial in q
     Set force=True if result needs to be the same across versions
     Example:
     (3, 5) -> [2, 10]
-    (7, 22) -> []
+    (5, 121) -> [33, 121, 363]
     :param p: Numerator
     :param q: Denominator
     :param force: If true, skips directly to greedy method
     :return: Sorted list of denominators of unit fractions
     """
+    if not 0 < p < q:
+        raise ValueError(f'{p}/{q} is not strictly between 0 and 1')
     g = math.gcd(p, q)
     p //= g
     q //= g
     if p == 1:
         return [q]
+    if force:
+        return greedy_egyptian_decomposition(p, q)
+    splits = [split for split in (divisor_pair_split(p, q), practical_split(p, q), multiperfect_split(p, q)) if split]
+    return min(splits, key=lambda split: (split[-1], len(split)))
 
-    if not force:
-        if not (q+1) % p:
-            b = (q+1) // p
-            return [b, b*q]
-
-        # Interpolation search factors of q+1 that sum to p
 
-        # Practical number A: 2/p = 1/A + (2A-p)/Ap
+def egyptian_decompositions(fractions: Iterable[tuple[int, int]], /, *, force: bool = False) -> list[list[int]]:
+    """
+    egyptian_decomposition() over many fractions
+    Each distinct reduced fraction is solved once, and all of them share the caches of prime_factorization and
+    practical_multiplier, so a denominator that comes up repeatedly is only factored once
+    :param fractions: (p, q) pairs
+    :param force: If true, skips directly to greedy method
+    :return: Sorted lists of denominators, in the order of fractions
+    """
+    solved: dict[tuple[int, int], list[int]] = {}
+    decompositions = []
+    for p, q in fractions:
+        g = math.gcd(p, q)
+        key = p // g, q // g
+        if key not in solved:
+            solved[key] = egyptian_decomposition(*key, force=force)
+        decompositions.append(solved[key].copy())
+    return decompositions
 
-        # Check if q is practical
 
-        # 2/q = 1/q + 1/2q + 1/3q + 1/6q factorization for q prime
+def greedy_egyptian_decomposition(p: int, q: int) -> list[int]:
+    """
+    Fibonacci-Sylvester greedy expansion, whose denominators can grow doubly exponentially
+    :param p: Numerator, coprime to q
+    :param q: Denominator
+    :return: Sorted list of denominators of unit fractions
+    """
     denoms = []
-    while True:
+    while p != 1:
         c = -(-q//p)  # Ceil div
         denoms.append(c)
         p, q = (-q) % p, q * c
         g = math.gcd(p, q)
         p //= g
         q //= g
-        if p == 1:
-            return denoms + [q]
\ No newline at end of file
+    return denoms + [q]
+
+
+def divisor_pair_split(p: int, q: int) -> list[int] | None:
+    """
+    p/q = 1/x + 1/y with x = (q / b)(a + b) / p and y = (q / a)(a + b) / p, for divisors a < b of q with p | a + b
+    Divisors are grouped by residue mod p, so each a only looks at the smallest matching b
+    :param p: Numerator, coprime to q
+    :param q: Denominator
+    :return: [x, y] with the smallest y, or None if no such divisors exist
+    """
+    by_residue: dict[int, list[int]] = {}
+    divisors = factors(q)
+    for d in divisors:
+        by_residue.setdefault(d % p, []).append(d)
+    best = None
+    for a in divisors:
+        matches = by_residue.get(-a % p, [])
+        i = bisect(matches, a)
+        if i < len(matches):
+            b = matches[i]
+            split = [q // b * ((a + b) // p), q // a * ((a + b) // p)]
+            if best is None or split[1] < best[1]:
+                best = split
+    return best
+
+
+def practical_split(p: int, q: int) -> list[int]:
+    """
+    For qM practical, pM < qM <= sigma(qM) is a sum of distinct divisors d of qM, so p/q is the sum of the 1/(qM / d)
+    The divisors of a practical number each exceed the sum of the smaller ones by at most one,
+    so taking the largest divisor that fits at each step always finishes
+    :param p: Numerator, coprime to q
+    :param q: Denominator
+    :return: Sorted list of denominators of unit fractions, all at most q * practical_multiplier(q)
+    """
+    multiplier = practical_multiplier(q)
+    n = q * multiplier
+    remaining = p * multiplier
+    denoms = []
+    for d in sorted({a * b for a in factors(q) for b in factors(multiplier)}, reverse=True):
+        if d <= remaining:
+            denoms.append(n // d)
+            remaining -= d
+            if not remaining:
+                break
+    return denoms
+
+
+def multiperfect_split(p: int, q: int) -> list[int] | None:
+    """
+    p/q = sum over d | M of 1/(qd) when sigma(M) = pM, e.g. 2/q = 1/q + 1/2q + 1/3q + 1/6q
+    :param p: Numerator
+    :param q: Denominator
+    :return: Sorted list of denominators, or None if no p-multiperfect number is tabulated
+    """
+    if p not in MULTIPERFECT:
+        return None
+    return [q * d for d in factors(MULTIPERFECT[p])]
+
+
+@lru_cache(maxsize=1 << 10)
+def practical_multiplier(q: int) -> int:
+    """
+    :param q: number
+    :return: The smallest M < PRACTICAL_SEARCH_LIMIT with qM practical, else the smallest power of two that works
+    """
+    factorization = Counter() if q == 1 else prime_factorization(q)
+    for m in range(1, PRACTICAL_SEARCH_LIMIT):
+        if is_practical_factorization(factorization + (Counter() if m == 1 else prime_factorization(m))):
+            return m
+    k = 1
+    while not is_practical_factorization(factorization + Counter({2: k})):
+        k += 1
+    return 1 << k
+
+
+def is_practical(n: int) -> bool:
+    """
+    Checks if every m <= sigma(n) is a sum of distinct divisors of n
+    https://en.wikipedia.org/wiki/Practical_number
+    :param n: num >= 1
+    :return: bool(n is practical)
+    """
+    return is_practical_factorization(Counter() if n == 1 else prime_factorization(n))
+
+
+def is_practical_factorization(factorization: Counter[int]) -> bool:
+    """
+    Stewart's criterion: with primes p_1 < ... < p_k, each p_(i+1) <= 1 + sigma(p_1^a_1 ... p_i^a_i)
+    :param factorization: Counter[prime, power]
+    :return: bool(the number is practical)
+    """
+    sigma = 1
+    for prime in sorted(factorization):
+        if prime > sigma + 1:
+            return False
+        sigma *= (prime ** (factorization[prime] + 1) - 1) // (prime - 1)
+    return True
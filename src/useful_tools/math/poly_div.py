@@ -0,0 +1,321 @@
+import math
+from fractions import Fraction
+from itertools import chain, zip_longest
+from typing import Iterator
+
+import numpy as np
+
+from src.useful_tools.math.poly_mul import NTT_PRIMES, bit_reversal, multiply, ntt_root
+from src.useful_tools.math.primes import is_prime
+
+__all__ = ['divmod_coefs', 'floordiv_coefs', 'mod_coefs', 'series_inverse', 'exact_div']
+
+# Length of the quotient and of the divisor from which Newton division takes over from schoolbook,
+# for exact (int and Fraction) and other coefficients, from benchmarks/bench_polynomial.py
+MODULAR_NEWTON_THRESHOLD = 192
+NEWTON_THRESHOLD = 1024
+# Primes the modular division works modulo at once, one row each, to bound the memory of its NTTs
+DIVISION_ROWS = 128
+
+
+def divmod_coefs(a: list, b: list, modulus: int | None = None) -> tuple[list, list]:
+    """
+    Polynomial division of coefficient lists, constant term first, a = b q + r with len(r) < len(b)
+    Schoolbook for short quotients or divisors, otherwise Newton iteration for the inverse of the reversed divisor,
+    modulo primes for exact coefficients
+    Integer and Fraction coefficients stay exact, becoming Fractions where the leading coefficient doesn't divide
+    :param a: Dividend
+    :param b: Divisor, with nonzero last coefficient
+    :param modulus: If given, divides integer polynomials mod modulus, b[-1] having to be invertible mod modulus
+    :return: q, r (r may have trailing zeros)
+    """
+    return divide(a, b, modulus)
+
+
+def floordiv_coefs(a: list, b: list, modulus: int | None = None) -> list:
+    """
+    :return: The quotient of divmod_coefs(a, b, modulus), without computing the remainder
+    """
+    return divide(a, b, modulus, remainder=False)[0]
+
+
+def mod_coefs(a: list, b: list, modulus: int | None = None) -> list:
+    """
+    :return: The remainder of divmod_coefs(a, b, modulus), without storing the quotient where it isn't needed
+    """
+    return divide(a, b, modulus, quotient=False)[1]
+
+
+def divide(a: list, b: list, modulus: int | None = None, *, quotient: bool = True,
+           remainder: bool = True) -> tuple[list | None, list | None]:
+    """
+    :param quotient: Whether the quotient is needed
+    :param remainder: Whether the remainder is needed
+    :return: q, r, None for whichever isn't needed
+    """
+    if not b or not (b[-1] if modulus is None else b[-1] % modulus):
+        raise ZeroDivisionError
+    m = len(b) - 1
+    if len(a) <= m:
+        return [], list(a) if modulus is None else [x % modulus for x in a]
+    size = min(len(a) - m, m)
+    if modulus is not None:
+        if size < MODULAR_NEWTON_THRESHOLD:
+            return schoolbook_divide(a, b, quotient, remainder, modulus)
+        return newton_divide(a, b, remainder, modulus)
+    exact = all(isinstance(c, int | Fraction) for c in chain(a, b))
+    if size < (MODULAR_NEWTON_THRESHOLD if exact else NEWTON_THRESHOLD):
+        return schoolbook_divide(a, b, quotient, remainder)
+    if all(isinstance(c, int) for c in chain(a, b)):
+        return modular_divide(a, b, quotient, remainder)
+    if exact:
+        # Clears denominators: a = A / da, b = B / db, then a / b = (A / B) (db / da)
+        da = math.lcm(*(c.denominator for c in a))
+        db = math.lcm(*(c.denominator for c in b))
+        q, r = modular_divide([int(c * da) for c in a], [int(c * db) for c in b], quotient, remainder)
+        return (None if q is None else [exact_div(c * db, da) for c in q],
+                None if r is None else [exact_div(c, da) for c in r])
+    return newton_divide(a, b, remainder)
+
+
+def schoolbook_divide(a: list, b: list, quotient: bool = True, remainder: bool = True,
+                      modulus: int | None = None) -> tuple[list | None, list]:
+    """
+    Long division in place on a copy of a, O(len(q) len(b))
+    Without the remainder, only the coefficients that later quotient terms depend on are updated
+    """
+    m = len(b) - 1
+    if modulus is None:
+        rest, lead = list(a), b[-1]
+    else:
+        rest, inverse = [x % modulus for x in a], pow(b[-1], -1, modulus)
+    q = [0] * (len(a) - m) if quotient else None
+    for i in reversed(range(len(a) - m)):
+        c = exact_div(rest[i + m], lead) if modulus is None else rest[i + m] * inverse % modulus
+        if quotient:
+            q[i] = c
+        if c:
+            # Mod modulus, the rest is only reduced where it is read
+            for j in range(0 if remainder else max(m - i, 0), m):
+                rest[i + j] -= c * b[j]
+    if not remainder:
+        return q, None
+    return q, rest[:m] if modulus is None else [x % modulus for x in rest[:m]]
+
+
+def newton_divide(a: list, b: list, remainder: bool = True, modulus: int | None = None) -> tuple[list, list | None]:
+    """
+    Division by the power series inverse of the reversed divisor: reversed, the quotient is the first
+    len(a) - len(b) + 1 coefficients of rev(a) / rev(b), and the remainder is a - b q mod x^(len(b) - 1)
+    """
+    k = len(a) - len(b) + 1
+    inverse = series_inverse(b[::-1][:k], k, modulus)
+    q = multiply(a[::-1][:k], inverse, modulus)[:k][::-1]
+    return q, remainder_of(a, b, q, modulus) if remainder else None
+
+
+def modular_divide(a: list[int], b: list[int], quotient: bool = True, remainder: bool = True) -> tuple[list, list]:
+    """
+    Division of integer polynomials modulo NTT-friendly primes, by Newton iteration in int64 NTT arithmetic,
+    with the residues recombined by CRT
+    Integer quotients, as exact divisions have, come straight from their residues modulo enough primes for the size
+    of a, checked by one multiplication; other quotients come from those of the pseudo-quotient Q = c^k q, c = b[-1],
+    which has integer coefficients, modulo enough primes for a bound on Q, and are divided by c^k once at the end
+    Working mod primes keeps the inverse series of rev(b) small, where over the integers it can grow much larger
+    than the quotient
+    """
+    c, m, k = b[-1], len(b) - 1, len(a) - len(b) + 1
+    supply = division_primes(1 << (2 * k - 2).bit_length(), c)
+    primes, residues, size = [], [], max(map(abs, a))
+    if add_quotient_residues(a, b, supply, primes, residues, size << 32):
+        q = crt(np.concatenate(residues), np.array(primes, dtype=np.int64))[::-1]
+        product = multiply(b, q)
+        if product[m:] == a[m:]:
+            return q if quotient else None, [x - y for x, y in zip(a[:m], product)] if remainder else None
+    # 1 / rev(b) = (1 / c) sum h^j for h = 1 - rev(b) / c, whose coefficients are at most B / |c|, B the largest
+    # of b[:-1]; so its coefficient j is at most (1 + B / |c|)^j / |c|, and |Q| at most |a| k (|c| + B)^(k - 1)
+    bound = size * k * (abs(c) + max(map(abs, b[:-1]), default=0)) ** (k - 1)
+    if not add_quotient_residues(a, b, supply, primes, residues, bound):
+        # Only for quotients near NTT_MAX_SIZE with huge coefficients, which run out of primes
+        return newton_divide(a, b, remainder)
+    scale, primes = c ** k, np.array(primes, dtype=np.int64)
+    scales = np.array([scale % p for p in primes.tolist()], dtype=np.int64)[:, None]
+    scaled_q = crt(np.concatenate(residues) * scales % primes[:, None], primes)[::-1]
+    q = [exact_div(x, scale) for x in scaled_q] if quotient else None
+    r = [exact_div(x, scale) for x in remainder_of([x * scale for x in a[:m]], b, scaled_q)] if remainder else None
+    return q, r
+
+
+def add_quotient_residues(a: list[int], b: list[int], supply: Iterator[int], primes: list[int], residues: list,
+                          bound: int) -> bool:
+    """
+    Appends primes from supply to primes, and the rows of quotient_rows() for them to residues,
+    until the product of the primes exceeds 2 bound
+    :return: Whether supply had enough primes
+    """
+    modulus, batch = math.prod(primes), []
+    while modulus <= 2 * bound:
+        p = next(supply, None)
+        if p is None:
+            return False
+        batch.append(p)
+        modulus *= p
+    for start in range(0, len(batch), DIVISION_ROWS):
+        residues.append(quotient_rows(a, b, np.array(batch[start:start + DIVISION_ROWS], dtype=np.int64)))
+    primes += batch
+    return True
+
+
+def division_primes(order: int, c: int) -> Iterator[int]:
+    """
+    :return: The primes p below 2^31 with order dividing p - 1, so that NTTs of length order work mod p,
+             NTT_PRIMES first and then the others largest first, skipping divisors of c
+    """
+    yield from (p for p in NTT_PRIMES if (p - 1) % order == 0 and c % p)
+    for p in range(((1 << 31) - 2) // order * order + 1, order, -order):
+        if p not in NTT_PRIMES and c % p and is_prime(p):
+            yield p
+
+
+def quotient_rows(a: list[int], b: list[int], primes: np.ndarray) -> np.ndarray:
+    """
+    :return: Array with row i the quotient of a by b mod primes[i], reversed, b[-1] not divisible by the primes
+    """
+    k = len(a) - len(b) + 1
+    size = 1 << (2 * k - 2).bit_length()
+    tables = twiddle_rows(primes, size)
+    rev_a, rev_b = residue_rows(a[:-k - 1:-1], primes), residue_rows(b[:-k - 1:-1], primes)
+    g = np.array([[pow(x, -1, p)] for x, p in zip(rev_b[:, 0].tolist(), primes.tolist())], dtype=np.int64)
+    # Newton iteration for the inverse series of rev(b), as in series_inverse()
+    while g.shape[1] < k:
+        n = min(2 * g.shape[1], k)
+        e = convolve_rows(rev_b[:, :n], g, primes, tables)[:, g.shape[1]:n]
+        product = convolve_rows(g, e, primes, tables)[:, :n - g.shape[1]]
+        g = np.concatenate((g, -product % primes[:, None]), axis=1)
+    return convolve_rows(rev_a, g, primes, tables)[:, :k]
+
+
+def convolve_rows(a: np.ndarray, b: np.ndarray, primes: np.ndarray, tables: tuple) -> np.ndarray:
+    """
+    :return: Array with row i the product of the polynomials a[i] and b[i] mod primes[i], by NTTs
+    """
+    length = a.shape[1] + b.shape[1] - 1
+    size = 1 << (length - 1).bit_length()
+    fa, fb = np.zeros((len(primes), size), dtype=np.int64), np.zeros((len(primes), size), dtype=np.int64)
+    fa[:, :a.shape[1]], fb[:, :b.shape[1]] = a, b
+    product = ntt_rows(fa, primes, tables[0]) * ntt_rows(fb, primes, tables[0]) % primes[:, None]
+    return ntt_rows(product, primes, tables[1], inverse=True)[:, :length]
+
+
+def ntt_rows(a: np.ndarray, primes: np.ndarray, twiddles: np.ndarray, inverse: bool = False) -> np.ndarray:
+    """
+    poly_mul.ntt() on each row of a, mod the prime of its row
+    :param twiddles: A table of twiddle_rows(), for an order at least the length of the rows
+    """
+    rows, n = a.shape
+    a, column = a[:, bit_reversal(n)], primes[:, None, None]
+    length = 1
+    while length < n:
+        # The powers of a root of unity of order 2 length are every (order / 2 length)-th of the table's
+        w = twiddles[:, ::2 * twiddles.shape[1] // (2 * length)][:, None, :]
+        blocks = a.reshape(rows, -1, 2 * length)
+        u, v = blocks[:, :, :length], blocks[:, :, length:] * w % column
+        a = np.concatenate(((u + v) % column, (u - v) % column), axis=2).reshape(rows, n)
+        length *= 2
+    if inverse:
+        scale = np.array([pow(n, -1, p) for p in primes.tolist()], dtype=np.int64)
+        a = a * scale[:, None] % primes[:, None]
+    return a
+
+
+def twiddle_rows(primes: np.ndarray, order: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: Arrays with row i the powers w^0, ..., w^(order / 2 - 1) mod primes[i] of a primitive order-th root of
+             unity w, and of its inverse
+    """
+    roots = [pow(ntt_root(p), (p - 1) // order, p) for p in primes.tolist()]
+    tables = []
+    for w in (roots, [pow(x, -1, p) for x, p in zip(roots, primes.tolist())]):
+        table = np.ones((len(primes), 1), dtype=np.int64)
+        while table.shape[1] < order // 2:
+            step = [pow(x, table.shape[1], p) for x, p in zip(w, primes.tolist())]
+            table = np.concatenate((table, table * np.array(step, dtype=np.int64)[:, None] % primes[:, None]), axis=1)
+        tables.append(table[:, :order // 2])
+    return tables[0], tables[1]
+
+
+def residue_rows(coefs: list[int], primes: np.ndarray) -> np.ndarray:
+    """
+    :return: Array with row i the coefficients mod primes[i]
+    """
+    if all(-(1 << 62) <= c < 1 << 62 for c in coefs):
+        return np.array(coefs, dtype=np.int64)[None, :] % primes[:, None]
+    return (np.array(coefs, dtype=object)[None, :] % primes.astype(object)[:, None]).astype(np.int64)
+
+
+def crt(residues: np.ndarray, primes: np.ndarray) -> list[int]:
+    """
+    CRT by a product tree, merging moduli pairwise so the big integer products stay balanced,
+    vectorized over the columns
+    :param residues: Array with row i the values mod primes[i]
+    :param primes: Distinct primes
+    :return: The values mod the product of the primes, in the symmetric range
+    """
+    values, moduli = list(residues), [int(p) for p in primes]
+    if residues.dtype == np.int64 and len(values) > 1:
+        # Pairs of primes below 2^31 still merge in int64
+        values = [
+            r + m * ((s - r) * pow(m, -1, n) % n)
+            for r, m, s, n in zip(values[::2], moduli[::2], values[1::2], moduli[1::2])
+        ] + values[len(values) // 2 * 2:]
+        moduli = [m * n for m, n in zip(moduli[::2], moduli[1::2])] + moduli[len(moduli) // 2 * 2:]
+    values = [v.astype(object) for v in values]
+    while len(values) > 1:
+        merged = [
+            r + m * ((s - r) * pow(m, -1, n) % n)
+            for r, m, s, n in zip(values[::2], moduli[::2], values[1::2], moduli[1::2])
+        ]
+        values, moduli = merged + values[len(merged) * 2:], [
+            m * n for m, n in zip(moduli[::2], moduli[1::2])
+        ] + moduli[len(merged) * 2:]
+    modulus = moduli[0]
+    return [v - modulus if 2 * v > modulus else v for v in values[0].tolist()]
+
+
+def remainder_of(a: list, b: list, q: list, modulus: int | None = None) -> list:
+    """
+    :return: a - b q mod x^(len(b) - 1), from the low halves of b and q only
+    """
+    m = len(b) - 1
+    low = multiply(b[:m], q[:m], modulus)[:m]
+    r = [x - y for x, y in zip_longest(a[:m], low, fillvalue=0)]
+    return r if modulus is None else [x % modulus for x in r]
+
+
+def series_inverse(f: list, n: int, modulus: int | None = None) -> list:
+    """
+    Power series inverse by Newton iteration, g <- g + g (1 - f g), doubling the number of correct terms each step
+    :param f: Coefficients of the series, with f[0] invertible
+    :param n: Number of terms wanted
+    :param modulus: If given, inverts an integer series mod modulus
+    :return: First n coefficients of 1 / f
+    """
+    g = [exact_div(1, f[0]) if modulus is None else pow(f[0], -1, modulus)]
+    while len(g) < n:
+        k = min(2 * len(g), n)
+        # f g = 1 + x^len(g) e for the current g
+        e = multiply(f[:k], g, modulus)[len(g):k]
+        correction = multiply(g, e, modulus)[:k - len(g)] if e else []
+        correction = [-c if modulus is None else -c % modulus for c in correction]
+        g += correction + [0] * (k - len(g) - len(correction))
+    return g
+
+
+def exact_div(a, b):
+    """
+    a / b, but kept exact for ints: an int if b divides a, else a Fraction
+    """
+    if isinstance(a, int) and isinstance(b, int):
+        q, r = divmod(a, b)
+        return Fraction(a, b) if r else q
+    return a / b
@@ -0,0 +1,122 @@
+import numpy as np
+
+from src.useful_tools.math.poly_div import mod_coefs
+from src.useful_tools.math.poly_mul import multiply
+
+__all__ = ['horner', 'horner_array', 'evaluate_many', 'subproduct_tree', 'remainder_tree']
+
+# Number of points and coefficients from which the subproduct tree beats Horner at every point,
+# in Python and vectorized over the points, from benchmarks/bench_polynomial.py
+TREE_THRESHOLD = 256
+VECTOR_TREE_THRESHOLD = 8192
+# Points per leaf of the subproduct tree, below which the remainders are evaluated by Horner:
+# one point at a time in Python, or all the leaf's points at once for a modulus whose products fit in int64
+TREE_LEAF_SIZE = 16
+VECTOR_LEAF_SIZE = 256
+
+
+def horner(coefs: list, x, modulus: int | None = None):
+    """
+    Horner's rule, in len(coefs) multiplications
+    :param coefs: Coefficients, constant term first
+    :param x: Point
+    :param modulus: If given, evaluates mod modulus
+    :return: The polynomial evaluated at x
+    """
+    total = 0
+    for coef in reversed(coefs):
+        total = total * x + coef
+        if modulus is not None:
+            total %= modulus
+    return total
+
+
+def horner_array(coefs: list | np.ndarray, points: np.ndarray, modulus: int | None = None) -> np.ndarray:
+    """
+    Horner's rule at every point at once, one NumPy pass per coefficient
+    :param coefs: Coefficients, constant term first
+    :param points: float or complex array of points, of any shape, or an int64 array of residues if modulus is given
+    :param modulus: If given, evaluates mod modulus, which has to be below 2^31 so products fit in int64
+    :return: Array of values, of the shape of points
+    """
+    coefs = np.asarray(coefs)
+    if coefs.dtype == object:
+        coefs = coefs.astype(points.dtype)
+    values = np.zeros(points.shape, dtype=np.result_type(coefs, points))
+    for coef in coefs[::-1]:
+        values *= points
+        values += coef
+        if modulus is not None:
+            values %= modulus
+    return values
+
+
+def evaluate_many(coefs: list, points, modulus: int | None = None) -> list | np.ndarray:
+    """
+    Evaluates a polynomial at many points
+    float and complex arrays use horner_array, since reducing by the subproduct tree is numerically unstable
+    in floating point; exact values (and anything mod a modulus) use the subproduct tree for large inputs,
+    in O(M(n) log n) for n points and coefficients, and Horner at each point otherwise
+    :param coefs: Coefficients, constant term first
+    :param points: Sequence of points, or a NumPy array
+    :param modulus: If given, evaluates integer polynomials at integer points mod modulus
+    :return: Values, as an array for float or complex arrays and a list otherwise
+    """
+    if isinstance(points, np.ndarray):
+        if modulus is None and points.dtype.kind in 'fc':
+            return horner_array(coefs, points)
+        points = points.tolist()
+    if modulus is not None:
+        coefs, points = [c % modulus for c in coefs], [x % modulus for x in points]
+    vector = modulus is not None and modulus < 1 << 31
+    if min(len(points), len(coefs)) < (VECTOR_TREE_THRESHOLD if vector else TREE_THRESHOLD):
+        return leaf_values(coefs, points, modulus)
+    tree = subproduct_tree(points, modulus)
+    return remainder_tree(coefs, tree, points, modulus, VECTOR_LEAF_SIZE if vector else TREE_LEAF_SIZE)
+
+
+def leaf_values(coefs: list, points: list, modulus: int | None = None) -> list:
+    """
+    :return: Values at the points by Horner, vectorized over the points for a modulus below 2^31
+    """
+    if modulus is not None and modulus < 1 << 31:
+        return horner_array(np.array(coefs, dtype=np.int64), np.array(points, dtype=np.int64), modulus).tolist()
+    return [horner(coefs, x, modulus) for x in points]
+
+
+def subproduct_tree(points: list, modulus: int | None = None) -> list[list[list]]:
+    """
+    :param points: Points
+    :param modulus: If given, the products are taken mod modulus
+    :return: Levels of the tree, leaves first: the leaves are x - p for each point, and every node above
+             is the product of two nodes of the level below (the last one may be alone)
+    """
+    level = [[-x, 1] for x in points]
+    levels = [level]
+    while len(level) > 1:
+        level = [multiply(level[i], level[i + 1], modulus) if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def remainder_tree(coefs: list, tree: list[list[list]], points: list, modulus: int | None = None,
+                   leaf_size: int = TREE_LEAF_SIZE) -> list:
+    """
+    Reduces the polynomial down the subproduct tree, f mod prod(x - p) over each node's points,
+    until the nodes have leaf_size points, then evaluates the remainders there with leaf_values()
+    :param coefs: Coefficients, constant term first
+    :param tree: subproduct_tree(points, modulus)
+    :param points: Points
+    :param modulus: If given, evaluates mod modulus
+    :param leaf_size: Power of two
+    :return: Values at the points
+    """
+    depth = leaf_size.bit_length() - 1
+    remainders = [coefs]
+    for level in reversed(tree[depth:]):
+        remainders = [mod_coefs(remainders[i // 2], node, modulus) for i, node in enumerate(level)]
+    values = []
+    for i, remainder in enumerate(remainders):
+        values += leaf_values(remainder, points[i * leaf_size:(i + 1) * leaf_size], modulus)
+    return values
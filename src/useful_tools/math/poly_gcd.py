@@ -0,0 +1,576 @@
+import math
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+from src.useful_tools.math.poly_div import crt, divmod_coefs, exact_div, floordiv_coefs, mod_coefs, residue_rows
+from src.useful_tools.math.poly_mul import multiply, sub_coefs
+from src.useful_tools.math.primes import primes_in_range
+
+__all__ = ['gcd_coefs', 'xgcd_coefs', 'resultant_coefs', 'squarefree_coefs']
+
+# Degree of the smaller polynomial from which gcds, resultants and cofactors of exact polynomials are worked out
+# modulo primes rather than by the subresultant PRS (or Euclid over Fractions), from benchmarks/bench_polynomial.py
+MODULAR_GCD_THRESHOLD = 20
+MODULAR_RESULTANT_THRESHOLD = 40
+MODULAR_XGCD_THRESHOLD = 6
+# The primes are taken from the window of this many numbers below 2^31, so that products of residues fit in int64
+PRIME_WINDOW = 1 << 20
+# Most primes handled by one vectorized run of Euclid's algorithm
+PRIME_BATCH = 256
+# Number of primes from which powers mod each of them are vectorized
+VECTOR_POW_ROWS = 64
+
+
+def gcd_coefs(a: list, b: list, modulus: int | None = None) -> list:
+    """
+    Greatest common divisor of polynomials given by coefficient lists, constant term first
+    Integer polynomials get their gcd in Z[x], the gcd of the contents times a primitive polynomial with a positive
+    leading coefficient; polynomials with any Fraction coefficient, and those mod modulus, get the monic gcd
+    Exact coefficients are worked on modulo many primes at once, see modular_gcd
+    :param a: First polynomial, with int or Fraction coefficients
+    :param b: Second polynomial
+    :param modulus: If given, a prime to take the gcd of integer polynomials mod
+    :return: The gcd, [] if a and b are both zero
+    """
+    a, b = trim(a), trim(b)
+    if modulus is not None:
+        a, b = trim([x % modulus for x in a]), trim([x % modulus for x in b])
+        if not a or not b:
+            return monic(a or b, modulus)
+        if len(a) < len(b):
+            a, b = b, a
+        g, degrees, _, _ = euclid_mod(a, b, modulus)
+        return g[0, :degrees[0] + 1].tolist()
+    if not a or not b:
+        g = a or b
+        return monic(g) if is_rational(g) else [-x for x in g] if g and g[-1] < 0 else g
+    (ca, pa), (cb, pb) = primitive(clear_denominators(a)[0]), primitive(clear_denominators(b)[0])
+    g = integer_gcd(pa, pb)
+    if is_rational(a) or is_rational(b):
+        return monic(g)
+    content = math.gcd(ca, cb)
+    return [x * content for x in g]
+
+
+def xgcd_coefs(a: list, b: list, modulus: int | None = None) -> tuple[list, list, list]:
+    """
+    Extended Euclidean algorithm, s a + t b = g for the monic gcd g, with deg s < deg b - deg g
+    and deg t < deg a - deg g (when those are positive)
+    The cofactors are found modulo primes as res(a', b') s and res(a', b') t for a' = a / g and b' = b / g, which
+    have integer coefficients of size bounded like the resultant, then divided by the resultant
+    :param a: First polynomial, with int or Fraction coefficients
+    :param b: Second polynomial
+    :param modulus: If given, a prime to work mod
+    :return: g, s, t (with Fraction coefficients where they aren't whole numbers)
+    """
+    a, b = trim(a), trim(b)
+    if modulus is not None:
+        a, b = trim([x % modulus for x in a]), trim([x % modulus for x in b])
+    if not a or not b:
+        g = a or b
+        if not g:
+            return [], [], []
+        unit = [exact_div(1, g[-1]) if modulus is None else pow(g[-1], -1, modulus)]
+        return monic(g, modulus), (unit if a else []), ([] if a else unit)
+    if len(a) < len(b):
+        g, t, s = xgcd_coefs(b, a, modulus)
+        return g, s, t
+    if modulus is not None:
+        g, degrees, _, (s, t) = euclid_mod(a, b, modulus, cofactors=True)
+        return g[0, :degrees[0] + 1].tolist(), trim(s[0].tolist()), trim(t[0].tolist())
+    if len(b) - 1 < MODULAR_XGCD_THRESHOLD:
+        return euclid_xgcd(a, b)
+    (a_int, da), (b_int, db) = clear_denominators(a), clear_denominators(b)
+    g = integer_gcd(primitive(a_int)[1], primitive(b_int)[1])
+    a_int, b_int = floordiv_coefs(a_int, g), floordiv_coefs(b_int, g)
+    if len(b_int) == 1:
+        # g is b up to a constant
+        return monic(g), [], [exact_div(db, b_int[0] * g[-1])]
+    r, s, t = modular_cofactors(a_int, b_int)
+    scale = r * g[-1]
+    return monic(g), trim([exact_div(x * da, scale) for x in s]), trim([exact_div(x * db, scale) for x in t])
+
+
+def resultant_coefs(a: list, b: list, modulus: int | None = None):
+    """
+    Resultant of two polynomials, the determinant of their Sylvester matrix
+    Exact coefficients are worked on modulo enough primes to pin it down by the Hadamard bound,
+    or by the subresultant PRS when either polynomial has a small degree
+    :param a: First polynomial, with int or Fraction coefficients
+    :param b: Second polynomial
+    :param modulus: If given, a prime to work mod
+    :return: res(a, b), 0 if either polynomial is zero
+    """
+    a, b = trim(a), trim(b)
+    if modulus is not None:
+        a, b = trim([x % modulus for x in a]), trim([x % modulus for x in b])
+    if not a or not b:
+        return 0
+    m, n = len(a) - 1, len(b) - 1
+    if m < n:
+        res = resultant_coefs(b, a, modulus)
+        if m * n % 2:
+            res = -res if modulus is None else -res % modulus
+        return res
+    if modulus is not None:
+        return int(euclid_mod(a, b, modulus)[2][0])
+    if n == 0:
+        return b[0] ** m
+    (a_int, da), (b_int, db) = clear_denominators(a), clear_denominators(b)
+    res = subresultant_resultant(a_int, b_int) if n < MODULAR_RESULTANT_THRESHOLD else modular_resultant(a_int, b_int)
+    return exact_div(res, da ** n * db ** m)
+
+
+def squarefree_coefs(a: list, modulus: int | None = None) -> tuple[object, list[tuple[list, int]]]:
+    """
+    Square-free decomposition a = c f_1^k_1 f_2^k_2 ..., the f_i square-free, pairwise coprime and of positive degree,
+    by Yun's algorithm, or Musser's mod a prime where derivatives can vanish
+    Factors are normalized like gcd_coefs: primitive with positive leading coefficients for integer polynomials,
+    monic otherwise
+    :param a: The polynomial, with int or Fraction coefficients
+    :param modulus: If given, a prime to work mod
+    :return: c, [(f_i, k_i), ...] by increasing k_i
+    """
+    a = trim(a if modulus is None else [x % modulus for x in a])
+    if len(a) <= 1:
+        return (a[0] if a else 0), []
+    if modulus is not None:
+        return a[-1], squarefree_mod(monic(a, modulus), modulus)
+    content, f = primitive(clear_denominators(a)[0])
+    factors = yun(f)
+    if is_rational(a):
+        return a[-1], [(monic(g), k) for g, k in factors]
+    return content * (1 if a[-1] > 0 else -1), factors
+
+
+def trim(coefs: list) -> list:
+    """
+    :return: coefs without trailing zeros
+    """
+    coefs = list(coefs)
+    while coefs and not coefs[-1]:
+        coefs.pop()
+    return coefs
+
+
+def is_rational(coefs: list) -> bool:
+    return any(isinstance(c, Fraction) for c in coefs)
+
+
+def monic(coefs: list, modulus: int | None = None) -> list:
+    if not coefs:
+        return []
+    if modulus is not None:
+        inverse = pow(coefs[-1], -1, modulus)
+        return [c * inverse % modulus for c in coefs]
+    return [exact_div(c, coefs[-1]) for c in coefs]
+
+
+def clear_denominators(coefs: list) -> tuple[list[int], int]:
+    """
+    :return: d coefs with integer coefficients, and d, the lcm of the denominators
+    """
+    d = math.lcm(*(c.denominator for c in coefs if isinstance(c, Fraction)))
+    return [int(c * d) for c in coefs], d
+
+
+def primitive(coefs: list[int]) -> tuple[int, list[int]]:
+    """
+    :return: Content of a nonzero integer polynomial, and its primitive part with a positive leading coefficient
+    """
+    content = math.gcd(*coefs) * (1 if coefs[-1] > 0 else -1)
+    return abs(content), [c // content for c in coefs]
+
+
+def derivative(coefs: list, modulus: int | None = None) -> list:
+    return trim([i * c if modulus is None else i * c % modulus for i, c in enumerate(coefs)][1:])
+
+
+def integer_gcd(a: list[int], b: list[int]) -> list[int]:
+    """
+    :return: gcd of nonzero primitive integer polynomials, primitive with a positive leading coefficient
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if len(b) == 1:
+        return [1]
+    if len(b) - 1 < MODULAR_GCD_THRESHOLD:
+        return subresultant_gcd(a, b)
+    return modular_gcd(a, b)
+
+
+def divides(d: list[int], a: list[int]) -> bool:
+    """
+    :return: Whether the integer polynomial d divides a, checking the end coefficients before dividing
+    """
+    if a[-1] % d[-1] or (d[0] and a[0] % d[0]):
+        return False
+    return not any(mod_coefs(a, d))
+
+
+def modular_gcd(a: list[int], b: list[int]) -> list[int]:
+    """
+    gcd of primitive integer polynomials, deg a >= deg b, modulo a doubling number of primes
+    Mod primes not dividing lc(a) lc(b), the monic gcd has at least the degree of the true one, with equality for
+    all but finitely many; images of the lowest degree seen are scaled to leading coefficient gcd(lc(a), lc(b)),
+    which the true gcd divides, recombined by CRT, and the primitive part of the result checked by trial division
+    A gcd mod one prime of degree 0 proves a and b coprime, so coprime inputs cost a single small batch
+    """
+    lead = math.gcd(a[-1], b[-1])
+    primes = euclid_primes()
+    degree, images, used = len(b), [], []
+    start, count = 0, 4
+    while start < len(primes):
+        batch = primes[start:start + count]
+        start += count
+        rows_a, rows_b = residue_rows(a, batch), residue_rows(b, batch)
+        keep = (rows_a[:, -1] != 0) & (rows_b[:, -1] != 0)
+        if not keep.any():
+            continue
+        batch = batch[keep]
+        g, degrees, _, _ = euclid_rows(rows_a[keep], rows_b[keep], batch)
+        low = degrees.min()
+        if low == 0:
+            return [1]
+        if low < degree:
+            degree, images, used = low, [], []
+        if low == degree:
+            same = degrees == degree
+            images.append(g[same, :degree + 1] * residue_rows([lead], batch[same]) % batch[same, None])
+            used.append(batch[same])
+            candidate = primitive(crt(np.concatenate(images), np.concatenate(used)))[1]
+            if divides(candidate, a) and divides(candidate, b):
+                return candidate
+        count = min(2 * count, PRIME_BATCH)
+    return subresultant_gcd(a, b)
+
+
+def modular_resultant(a: list[int], b: list[int]) -> int:
+    """
+    res(a, b) of integer polynomials, deg a >= deg b > 0, modulo enough primes for twice the Hadamard bound
+    ||a||^deg b ||b||^deg a, skipping primes dividing a leading coefficient
+    """
+    residues, used = [], []
+    needed = hadamard_bits(a, b) // 30 + 1
+    start = 0
+    while start < len(euclid_primes()):
+        batch = euclid_primes()[start:start + min(PRIME_BATCH, needed - sum(map(len, used)) + 8)]
+        start += len(batch)
+        rows_a, rows_b = residue_rows(a, batch), residue_rows(b, batch)
+        keep = (rows_a[:, -1] != 0) & (rows_b[:, -1] != 0)
+        residues.append(euclid_rows(rows_a[keep], rows_b[keep], batch[keep])[2])
+        used.append(batch[keep])
+        if sum(map(len, used)) >= needed:
+            return crt(np.concatenate(residues)[:, None], np.concatenate(used))[0]
+    return subresultant_resultant(a, b)
+
+
+def modular_cofactors(a: list[int], b: list[int]) -> tuple[int, list[int], list[int]]:
+    """
+    For integer polynomials coprime over Q, deg a >= deg b, their resultant r and the integer polynomials s, t with
+    s a + t b = r, from the cofactors mod primes not dividing r (where the gcd mod p is 1)
+    The coefficients of s and t are minors of the Sylvester matrix, bounded like r itself
+    """
+    residues, used = [], []
+    needed = hadamard_bits(a, b) // 30 + 1
+    start = 0
+    while start < len(euclid_primes()):
+        batch = euclid_primes()[start:start + min(PRIME_BATCH, needed - sum(map(len, used)) + 8)]
+        start += len(batch)
+        rows_a, rows_b = residue_rows(a, batch), residue_rows(b, batch)
+        keep = (rows_a[:, -1] != 0) & (rows_b[:, -1] != 0)
+        batch = batch[keep]
+        _, degrees, res, (s, t) = euclid_rows(rows_a[keep], rows_b[keep], batch, cofactors=True)
+        coprime = degrees == 0
+        # res(a, b) and res(a, b) s, res(a, b) t mod each prime, side by side
+        rows = np.concatenate((res[:, None], s * res[:, None] % batch[:, None], t * res[:, None] % batch[:, None]),
+                              axis=1)
+        residues.append(rows[coprime])
+        used.append(batch[coprime])
+        if sum(map(len, used)) >= needed:
+            values = crt(np.concatenate(residues), np.concatenate(used))
+            return values[0], values[1:s.shape[1] + 1], values[s.shape[1] + 1:]
+    return subresultant_cofactors(a, b)
+
+
+def subresultant_cofactors(a: list[int], b: list[int]) -> tuple[int, list, list]:
+    """
+    modular_cofactors() when the primes run out, from Euclid over the rationals
+    """
+    _, s, t = euclid_xgcd(a, b)
+    r = subresultant_resultant(a, b)
+    return r, [x * r for x in s], [x * r for x in t]
+
+
+def hadamard_bits(a: list[int], b: list[int]) -> int:
+    """
+    :return: Bits of twice the Hadamard bound on the Sylvester matrix of a and b, ||a||^deg b ||b||^deg a
+    """
+    norm_a, norm_b = sum(c * c for c in a).bit_length(), sum(c * c for c in b).bit_length()
+    return ((len(b) - 1) * norm_a + (len(a) - 1) * norm_b) // 2 + 2
+
+
+def subresultant_gcd(a: list[int], b: list[int]) -> list[int]:
+    """
+    gcd of primitive integer polynomials, deg a >= deg b, by the subresultant PRS, whose divisions keep the
+    coefficients of the remainders from growing faster than linearly in the degree
+    """
+    g = h = 1
+    while True:
+        delta = len(a) - len(b)
+        r = pseudo_remainder(a, b)
+        if not r:
+            return primitive(b)[1]
+        if len(r) == 1:
+            return [1]
+        a, b = b, [c // (g * h ** delta) for c in r]
+        g = a[-1]
+        h = g ** delta // h ** (delta - 1) if delta else h
+
+
+def subresultant_resultant(a: list[int], b: list[int]) -> int:
+    """
+    res(a, b) of integer polynomials, deg a >= deg b > 0, by the subresultant PRS
+    """
+    ca, cb = math.gcd(*a), math.gcd(*b)
+    a, b = [c // ca for c in a], [c // cb for c in b]
+    scale = ca ** (len(b) - 1) * cb ** (len(a) - 1)
+    g = h = sign = 1
+    while True:
+        delta = len(a) - len(b)
+        if (len(a) - 1) % 2 and (len(b) - 1) % 2:
+            sign = -sign
+        r = pseudo_remainder(a, b)
+        if not r:
+            return 0
+        a, b = b, [c // (g * h ** delta) for c in r]
+        g = a[-1]
+        h = g ** delta // h ** (delta - 1) if delta else h
+        if len(b) == 1:
+            m = len(a) - 1
+            return sign * scale * b[0] ** m // h ** (m - 1)
+
+
+def pseudo_remainder(a: list[int], b: list[int]) -> list[int]:
+    """
+    :return: The remainder of lc(b)^(deg a - deg b + 1) a by b, which has integer coefficients
+    """
+    n, lead = len(b) - 1, b[-1]
+    r = list(a)
+    for i in reversed(range(len(a) - n)):
+        c = r.pop()
+        r = [x * lead for x in r]
+        for j in range(n):
+            r[i + j] -= c * b[j]
+    return trim(r)
+
+
+def euclid_xgcd(a: list, b: list) -> tuple[list, list, list]:
+    """
+    xgcd_coefs() by Euclid's algorithm on exact coefficients, for small degrees
+    """
+    r0, r1, s0, s1, t0, t1 = a, b, [1], [], [], [1]
+    while r1:
+        q, r = divmod_coefs(r0, r1)
+        r0, r1 = r1, trim(r)
+        s0, s1 = s1, trim(sub_coefs(s0, multiply(q, s1) if s1 else []))
+        t0, t1 = t1, trim(sub_coefs(t0, multiply(q, t1) if t1 else []))
+    lead = r0[-1]
+    return monic(r0), [exact_div(c, lead) for c in s0], [exact_div(c, lead) for c in t0]
+
+
+def yun(f: list[int]) -> list[tuple[list[int], int]]:
+    """
+    Yun's square-free decomposition of a primitive integer polynomial with a positive leading coefficient
+    All the divisions are exact over the integers, by Gauss's lemma
+    """
+    df = derivative(f)
+    a = gcd_coefs(f, df)
+    b, c = floordiv_coefs(f, a), floordiv_coefs(df, a)
+    d = trim(sub_coefs(c, derivative(b)))
+    factors, k = [], 1
+    while len(b) > 1:
+        a = gcd_coefs(b, d)
+        b, c = floordiv_coefs(b, a), floordiv_coefs(d, a)
+        d = trim(sub_coefs(c, derivative(b)))
+        if len(a) > 1:
+            factors.append((a, k))
+        k += 1
+    return factors
+
+
+def squarefree_mod(f: list[int], p: int) -> list[tuple[list[int], int]]:
+    """
+    Square-free decomposition of a monic polynomial mod a prime p, where f' = 0 means f(x) = g(x^p) = g(x)^p
+    """
+    df = derivative(f, p)
+    if not df:
+        return [(g, k * p) for g, k in squarefree_mod(f[::p], p)]
+    factors, k = [], 1
+    c = gcd_coefs(f, df, p)
+    w = floordiv_coefs(f, c, p)
+    while len(w) > 1:
+        y = gcd_coefs(w, c, p)
+        z = floordiv_coefs(w, y, p)
+        if len(z) > 1:
+            factors.append((z, k))
+        k += 1
+        w, c = y, floordiv_coefs(c, y, p)
+    if len(c) > 1:
+        factors += [(g, j * p) for g, j in squarefree_mod(c[::p], p)]
+    return sorted(factors, key=lambda factor: factor[1])
+
+
+@lru_cache
+def euclid_primes() -> np.ndarray:
+    """
+    :return: The primes in the PRIME_WINDOW numbers below 2^31, largest first
+    """
+    return np.array(list(primes_in_range((1 << 31) - PRIME_WINDOW, 1 << 31))[::-1], dtype=np.int64)
+
+
+def euclid_mod(a: list[int], b: list[int], p: int, cofactors: bool = False) -> tuple:
+    """
+    euclid_rows() for one pair of polynomials reduced mod p, deg a >= deg b, in int64 when p < 2^31
+    """
+    dtype = np.int64 if p < 1 << 31 else object
+    return euclid_rows(np.array([a], dtype=dtype), np.array([b], dtype=dtype), np.array([p], dtype=dtype), cofactors)
+
+
+def euclid_rows(a: np.ndarray, b: np.ndarray, p: np.ndarray, cofactors: bool = False) -> tuple:
+    """
+    Euclid's algorithm mod a different prime in each row, vectorized over the rows
+    Rows share their degree sequence except where a prime divides a leading coefficient of the remainder sequence,
+    and those split off into groups of their own
+    Steps dividing by a divisor of one degree less take pseudo-remainders, which need no inverse; the powers of
+    leading coefficients they scale the resultant by are collected in a denominator, inverted once at the end
+    :param a: Array with row i the coefficients mod p[i] of a polynomial of degree m, with nonzero leading column
+    :param b: Array likewise of degree n <= m
+    :param p: Primes, below 2^31 for int64 rows, else object rows
+    :param cofactors: Whether to find the s and t with s a + t b = g as well
+    :return: The monic gcds (padded to n + 1 columns), their degrees, the resultants res(a, b),
+             and the arrays of s (n + 1 columns) and t (m + 1 columns), or None
+    """
+    k, m, n = len(p), a.shape[1] - 1, b.shape[1] - 1
+    g, degrees, res = np.zeros((k, n + 1), dtype=a.dtype), np.zeros(k, dtype=np.int64), np.zeros(k, dtype=a.dtype)
+    s, t = np.zeros((k, n + 1), dtype=a.dtype), np.zeros((k, m + 1), dtype=a.dtype)
+    # Cofactors of a and b, as wide as their degrees need (and left empty without cofactors)
+    one, zero = np.ones((k, int(cofactors)), dtype=a.dtype), np.zeros((k, 0), dtype=a.dtype)
+    groups = [(np.arange(k), a, b, np.ones(k, dtype=a.dtype), np.ones(k, dtype=a.dtype), one, zero, zero, one)]
+    while groups:
+        rows, a, b, acc, den, s0, t0, s1, t1 = groups.pop()
+        q = p[rows]
+        m, n = a.shape[1] - 1, b.shape[1] - 1
+        if n == 0:
+            # res(a, c) = c^m for a constant c
+            res[rows] = acc * pow_rows(b[:, 0], m, q) % q * pow_rows(den, q - 2, q) % q
+            finish_rows(rows, b, s1, t1, q, g, s, t)
+            degrees[rows] = 0
+            continue
+        quotient, r, scale = divmod_rows(a, b, q)
+        r_degrees = row_degrees(r)
+        if m * n % 2:
+            acc = -acc % q
+        splits = np.unique(r_degrees).tolist()
+        for d in splits:
+            same = slice(None) if len(splits) == 1 else r_degrees == d
+            if d < 0:
+                # b divides a, so b is the gcd and the resultant is 0
+                finish_rows(rows[same], b[same], s1[same], t1[same], q[same], g, s, t)
+                degrees[rows[same]], res[rows[same]] = n, 0
+                continue
+            if cofactors:
+                s2 = sub_mul_rows(s0[same], quotient[same], s1[same], q[same], None if scale is None else scale[same])
+                t2 = sub_mul_rows(t0[same], quotient[same], t1[same], q[same], None if scale is None else scale[same])
+            else:
+                s2 = t2 = zero[same]
+            # res(a, b) = (-1)^(mn) lc(b)^(m - deg r) res(b, r), and res(b, c r) = c^n res(b, r)
+            lead = b[same, -1]
+            if scale is None:
+                acc_d, den_d = acc[same] * pow_rows(lead, m - d, q[same]) % q[same], den[same]
+            else:
+                acc_d, den_d = acc[same], den[same] * pow_rows(lead, 2 * n - m + d, q[same]) % q[same]
+            groups.append((rows[same], b[same], r[same, :d + 1], acc_d, den_d, s1[same], t1[same], s2, t2))
+    return g, degrees, res, (s, t) if cofactors else None
+
+
+def finish_rows(rows: np.ndarray, b: np.ndarray, s1: np.ndarray, t1: np.ndarray, p: np.ndarray,
+                g: np.ndarray, s: np.ndarray, t: np.ndarray):
+    """
+    Stores the last nonzero remainder b, made monic, and its cofactors s1 and t1 scaled to match, in rows of g, s, t
+    """
+    inverse = pow_rows(b[:, -1], p - 2, p)[:, None]
+    g[rows] = 0
+    g[rows, :b.shape[1]] = b * inverse % p[:, None]
+    s[rows, :s1.shape[1]] = s1[:, :s.shape[1]] * inverse % p[:, None]
+    t[rows, :t1.shape[1]] = t1[:, :t.shape[1]] * inverse % p[:, None]
+
+
+def divmod_rows(a: np.ndarray, b: np.ndarray, p: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    :return: Quotients q and remainders r of the rows of a by those of b, row i mod p[i], and the scale c with
+             c a = q b + r, lc(b)^2 for divisors of one degree less and None (for 1) otherwise
+    Residues are below 2^31, so the remainder is only reduced after every other product
+    """
+    m, n = a.shape[1] - 1, b.shape[1] - 1
+    if m == n + 1:
+        # The usual step of a remainder sequence, lc(b)^2 a - (c1 x + c0) b with one reduction
+        lead = b[:, -1]
+        c1 = lead * a[:, -1] % p
+        c0 = (lead * a[:, -2] - a[:, -1] * b[:, -2]) % p
+        scale = lead * lead % p
+        r = scale[:, None] * a[:, :n] - c0[:, None] * b[:, :n]
+        r[:, 1:] -= c1[:, None] * b[:, :n - 1]
+        r %= p[:, None]
+        return np.stack((c0, c1), axis=1), r, scale
+    inverse = pow_rows(b[:, -1], p - 2, p)
+    r, quotient = a.copy(), np.zeros((len(p), m - n + 1), dtype=a.dtype)
+    for i in reversed(range(m - n + 1)):
+        c = r[:, i + n] % p * inverse % p
+        quotient[:, i] = c
+        r[:, i:i + n + 1] -= c[:, None] * b
+        if (m - n - i) % 2:
+            r[:, :i + n] %= p[:, None]
+    return quotient, r[:, :n] % p[:, None], None
+
+
+def sub_mul_rows(a: np.ndarray, q: np.ndarray, b: np.ndarray, p: np.ndarray, scale: np.ndarray | None) -> np.ndarray:
+    """
+    :return: scale a - q b, row by row mod p, as wide as the result needs
+    Like divmod_rows, reduced after every other product
+    """
+    width = max(a.shape[1], q.shape[1] + b.shape[1] - 1)
+    result = np.zeros((len(p), width), dtype=a.dtype)
+    result[:, :a.shape[1]] = a if scale is None else a * scale[:, None]
+    for j in range(q.shape[1]):
+        result[:, j:j + b.shape[1]] -= q[:, j, None] * b
+        if j % 2 and j + 1 < q.shape[1]:
+            result %= p[:, None]
+    return result % p[:, None]
+
+
+def row_degrees(r: np.ndarray) -> np.ndarray:
+    """
+    :return: Degree of the polynomial in each row, -1 for zero rows
+    """
+    if r.shape[1] and r[:, -1].all():
+        return np.full(len(r), r.shape[1] - 1)
+    nonzero = r != 0
+    return np.where(nonzero.any(axis=1), r.shape[1] - 1 - np.argmax(nonzero[:, ::-1], axis=1), -1)
+
+
+def pow_rows(x: np.ndarray, e: np.ndarray | int, p: np.ndarray) -> np.ndarray:
+    """
+    :return: x^e mod p elementwise, by square and multiply over the bits of the exponents (e = p - 2 for inverses)
+    Few rows are cheaper one by one than through NumPy
+    """
+    if x.dtype == object or len(x) < VECTOR_POW_ROWS:
+        e = np.broadcast_to(e, x.shape).tolist()
+        return np.array([pow(v, k, q) for v, k, q in zip(x.tolist(), e, p.tolist())], dtype=x.dtype)
+    result = np.ones_like(x)
+    for i in reversed(range(int(np.max(e)).bit_length())):
+        result = result * result % p
+        result = np.where(e >> i & 1, result * x % p, result)
+    return result
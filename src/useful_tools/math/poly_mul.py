@@ -0,0 +1,435 @@
+import math
+from fractions import Fraction
+from functools import lru_cache
+from itertools import chain, zip_longest
+
+import numpy as np
+
+__all__ = [
+    'multiply', 'schoolbook_mul', 'karatsuba_mul', 'toom3_mul', 'fft_mul', 'float_mul', 'ntt_mul', 'ntt_convolve',
+]
+
+# Product sizes (length of the shorter factor) at which each algorithm takes over,
+# from benchmarks/bench_polynomial.py
+KARATSUBA_THRESHOLD = 32
+TOOM3_THRESHOLD = 256
+FFT_THRESHOLD = 48
+# Bits of magnitude a float64 FFT convolution coefficient may reach and still round exactly;
+# the worst case error of a length 2^k transform is around 2^(bits - 53) * k
+FFT_EXACT_BITS = 44
+# NTT-friendly primes p = c * 2^k + 1 below 2^31, so a product of two residues fits in int64
+NTT_PRIMES = (2013265921, 1811939329, 2113929217, 469762049, 167772161, 998244353, 754974721)
+# Coefficients up to this many bits convert to int64 before reducing mod the NTT primes
+INT64_COEF_BITS = 62
+# Longest transform every prime in NTT_PRIMES supports (998244353 = 119 * 2^23 + 1)
+NTT_MAX_SIZE = 1 << 23
+# Narrowest limbs fft_mul splits wide coefficients into, whole bytes; below them the float transforms cannot stay
+# exact and the NTTs take over, which bench_algorithms otherwise finds 1.4 to 7 times slower than fft_mul
+MIN_LIMB_BITS = 8
+
+
+def multiply(a: list, b: list, modulus: int | None = None) -> list:
+    """
+    Product of two polynomials given as coefficient lists, constant term first
+    Picks the algorithm by the length of the shorter factor: schoolbook, then Karatsuba, then Toom-3,
+    or for integer coefficients an FFT, or NTTs for long factors with coefficients too wide for its limbs (see fft_mul)
+    :param a: Coefficients
+    :param b: Coefficients
+    :param modulus: If given, the coefficients of the product are reduced mod modulus (integer coefficients only)
+    :return: Coefficients of a * b, of length len(a) + len(b) - 1 (empty if either is empty)
+    """
+    if not a or not b:
+        return []
+    n = min(len(a), len(b))
+    if n >= FFT_THRESHOLD and all(isinstance(c, int) for c in a) and all(isinstance(c, int) for c in b):
+        return fft_mul(a, b, modulus)
+    # Toom-3 divides by 2 and 3, which is only exact for ints and Fractions (not Decimals or floats)
+    if n < KARATSUBA_THRESHOLD:
+        product = schoolbook_mul(a, b)
+    elif n < TOOM3_THRESHOLD or not all(isinstance(c, int | Fraction) for c in chain(a, b)):
+        product = karatsuba_mul(a, b)
+    else:
+        product = toom3_mul(a, b)
+    return product if modulus is None else [c % modulus for c in product]
+
+
+def schoolbook_mul(a: list, b: list) -> list:
+    """
+    :return: Coefficients of a * b, in O(len(a) len(b))
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    product = [0] * (len(a) + len(b) - 1)
+    for j, c in enumerate(b):
+        if c:
+            for i, d in enumerate(a, j):
+                product[i] += c * d
+    return product
+
+
+def karatsuba_mul(a: list, b: list) -> list:
+    """
+    Karatsuba multiplication, three half-size products per level, O(n^1.58)
+    Unbalanced factors are cut into pieces the size of the shorter one first
+    :return: Coefficients of a * b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if 2 * len(b) <= len(a):
+        return unbalanced_mul(a, b, karatsuba_mul)
+    if len(b) < KARATSUBA_THRESHOLD:
+        return schoolbook_mul(a, b)
+    k = len(a) // 2
+    a0, a1, b0, b1 = a[:k], a[k:], b[:k], b[k:]
+    z0 = karatsuba_mul(a0, b0)
+    z2 = karatsuba_mul(a1, b1)
+    z1 = sub_coefs(sub_coefs(karatsuba_mul(add_coefs(a0, a1), add_coefs(b0, b1)), z0), z2)
+    return combine([z0, z1, z2], k, len(a) + len(b) - 1)
+
+
+def toom3_mul(a: list, b: list) -> list:
+    """
+    Toom-Cook 3-way multiplication, five third-size products per level, O(n^1.46)
+    Evaluates at 0, 1, -1, -2 and infinity, and interpolates with Bodrato's sequence
+    The interpolation divides by 2 and 3, exactly for ints and Fractions
+    :return: Coefficients of a * b
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if 2 * len(b) <= len(a):
+        return unbalanced_mul(a, b, toom3_mul)
+    if len(b) < TOOM3_THRESHOLD:
+        return karatsuba_mul(a, b)
+    k = -(-len(a) // 3)
+    a0, a1, a2 = a[:k], a[k:2 * k], a[2 * k:]
+    b0, b1, b2 = b[:k], b[k:2 * k], b[2 * k:]
+    r0 = toom3_mul(a0, b0)
+    r4 = toom3_mul(a2, b2) if a2 and b2 else []
+    pa, pb = add_coefs(a0, a2), add_coefs(b0, b2)
+    pa1, pb1 = add_coefs(pa, a1), add_coefs(pb, b1)
+    pam1, pbm1 = sub_coefs(pa, a1), sub_coefs(pb, b1)
+    pam2 = sub_coefs(scale_coefs(add_coefs(pam1, a2), 2), a0)
+    pbm2 = sub_coefs(scale_coefs(add_coefs(pbm1, b2), 2), b0)
+    r1, rm1, rm2 = toom3_mul(pa1, pb1), toom3_mul(pam1, pbm1), toom3_mul(pam2, pbm2)
+
+    r3 = divide_coefs(sub_coefs(rm2, r1), 3)
+    r1 = divide_coefs(sub_coefs(r1, rm1), 2)
+    r2 = sub_coefs(rm1, r0)
+    r3 = add_coefs(divide_coefs(sub_coefs(r2, r3), 2), scale_coefs(r4, 2))
+    r2 = sub_coefs(add_coefs(r2, r1), r4)
+    r1 = sub_coefs(r1, r3)
+    return combine([r0, r1, r2, r3, r4], k, len(a) + len(b) - 1)
+
+
+def unbalanced_mul(a: list, b: list, mul) -> list:
+    """
+    a * b for len(a) >= 2 len(b), as a sum of products of len(b)-sized pieces of a
+    """
+    product = [0] * (len(a) + len(b) - 1)
+    for start in range(0, len(a), len(b)):
+        for i, c in enumerate(mul(a[start:start + len(b)], b), start):
+            product[i] += c
+    return product
+
+
+def fft_mul(a: list[int], b: list[int], modulus: int | None = None) -> list[int]:
+    """
+    Exact product of integer polynomials by floating point FFTs
+    Coefficients are split into signed limbs small enough that every limb convolution stays within FFT_EXACT_BITS,
+    so rounding recovers it exactly; a 2D transform over (limb, power) convolves along both at once
+    Factors so long that wide coefficients would need limbs below MIN_LIMB_BITS go to ntt_mul instead
+    :param a: Integer coefficients
+    :param b: Integer coefficients
+    :param modulus: If given, the coefficients of the product are reduced mod modulus
+    :return: Coefficients of a * b
+    """
+    if modulus is not None:
+        a, b = [c % modulus for c in a], [c % modulus for c in b]
+    bits = max(max(map(abs, a)).bit_length(), max(map(abs, b)).bit_length(), 1)
+    n = min(len(a), len(b))
+    limb_bits = FFT_EXACT_BITS - n.bit_length() >> 1
+    count = -(-bits // limb_bits)
+    # Each coefficient of a power of the limb base sums up to count limb products
+    limb_bits = FFT_EXACT_BITS - n.bit_length() - count.bit_length() >> 1
+    # Residues mod a modulus below 2^31 are recombined mod modulus in int64, whatever the size of the product
+    small_modulus = modulus is not None and modulus < 1 << 31
+    wide = not small_modulus and 2 * bits + n.bit_length() >= 63
+    if wide:
+        if limb_bits < MIN_LIMB_BITS:
+            return ntt_mul(a, b, modulus)
+        # Whole bytes per limb, so that big coefficients split and join through int.to_bytes and int.from_bytes
+        limb_bits = 16 if limb_bits >= 16 else 8
+    count = -(-bits // limb_bits)
+
+    length = len(a) + len(b) - 1
+    shape = 2 * count - 1, 1 << (length - 1).bit_length()
+    split = split_bytes if wide else split_limbs
+    fa = np.fft.rfft2(split(a, limb_bits, count), shape)
+    fb = fa if a is b else np.fft.rfft2(split(b, limb_bits, count), shape)
+    powers = np.rint(np.fft.irfft2(fa * fb, shape)[:2 * count - 1, :length]).astype(np.int64)
+
+    if wide:
+        product = join_limbs(powers, limb_bits)
+    elif small_modulus:
+        base, product = pow(2, limb_bits, modulus), powers[-1] % modulus
+        for power in powers[-2::-1]:
+            product = (product * base + power) % modulus
+        return product.tolist()
+    else:
+        # Horner in the limb base, the product's coefficients fit in int64
+        product = powers[-1]
+        for power in powers[-2::-1]:
+            product = (product << limb_bits) + power
+        product = product.tolist()
+    return product if modulus is None else [c % modulus for c in product]
+
+
+def split_limbs(coefs: list[int], limb_bits: int, count: int) -> np.ndarray:
+    """
+    :return: (count, len(coefs)) float64 array of signed limbs, sign(c) * (|c| >> limb_bits * i & mask) in row i,
+             for coefficients that fit in int64
+    """
+    array = np.array(coefs, dtype=np.int64)
+    shifts = limb_bits * np.arange(count, dtype=np.int64)[:, None]
+    return (np.sign(array) * (np.abs(array) >> shifts & (1 << limb_bits) - 1)).astype(np.float64)
+
+
+def split_bytes(coefs: list[int], limb_bits: int, count: int) -> np.ndarray:
+    """
+    split_limbs() for coefficients of any size, with limb_bits 8 or 16
+    """
+    width = limb_bits * count // 8
+    raw = b''.join(abs(c).to_bytes(width, 'little') for c in coefs)
+    limbs = np.frombuffer(raw, dtype=f'<u{limb_bits // 8}').reshape(len(coefs), count).T
+    return np.where(np.array(coefs, dtype=object) < 0, -1.0, 1.0) * limbs
+
+
+def join_limbs(powers: np.ndarray, limb_bits: int) -> list[int]:
+    """
+    :param powers: int64 array whose row t holds the coefficients of 2^(limb_bits t), with limb_bits 8 or 16
+    :return: Sum over the rows of powers[t] * 2^(limb_bits t), as Python ints
+    Carries are propagated in NumPy, leaving one limb per row, so that each result is a single int.from_bytes
+    """
+    width = limb_bits // 8
+    digits = np.empty(powers.shape, dtype=f'<u{width}')
+    carry = np.zeros(powers.shape[1], dtype=np.int64)
+    for t, power in enumerate(powers):
+        power = power + carry
+        digits[t] = power & (1 << limb_bits) - 1
+        carry = power >> limb_bits
+    raw, step, shift = digits.T.tobytes(), width * len(powers), limb_bits * len(powers)
+    return [int.from_bytes(raw[i:i + step], 'little') + (c << shift)
+            for i, c in zip(range(0, len(raw), step), carry.tolist())]
+
+
+def float_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    :param a: Floating point coefficients
+    :param b: Floating point coefficients
+    :return: Coefficients of a * b, by np.convolve for short factors and a real FFT for long ones
+    """
+    if min(len(a), len(b)) < FFT_THRESHOLD:
+        return np.convolve(a, b)
+    length = len(a) + len(b) - 1
+    size = 1 << (length - 1).bit_length()
+    return np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:length].astype(np.result_type(a, b))
+
+
+def ntt_mul(a: list[int], b: list[int], modulus: int | None = None) -> list[int]:
+    """
+    Exact product of integer polynomials by number-theoretic transforms modulo several primes,
+    as many as the size of the product's coefficients needs, recombined by CRT (Garner's algorithm)
+    Products longer than NTT_MAX_SIZE are cut in halves of the longer factor, and coefficients too wide for all
+    the primes in halves of their bits, see bit_split_mul
+    :param a: Integer coefficients
+    :param b: Integer coefficients
+    :param modulus: If given, the coefficients of the product are reduced mod modulus
+    :return: Coefficients of a * b
+    """
+    if len(a) + len(b) - 1 > NTT_MAX_SIZE:
+        if len(a) < len(b):
+            a, b = b, a
+        k = len(a) // 2
+        product = add_coefs(ntt_mul(a[:k], b, modulus), [0] * k + ntt_mul(a[k:], b, modulus))
+        return product if modulus is None else [c % modulus for c in product]
+    if modulus in NTT_PRIMES:
+        return ntt_convolve(a, b, modulus).tolist()
+    if modulus is None:
+        bound = 2 * min(len(a), len(b)) * max(map(abs, a)) * max(map(abs, b)) + 1
+    else:
+        a, b = [c % modulus for c in a], [c % modulus for c in b]
+        bound = min(len(a), len(b)) * (modulus - 1) ** 2 + 1
+    primes, prime_product = [], 1
+    for p in NTT_PRIMES:
+        primes.append(p)
+        prime_product *= p
+        if prime_product >= bound:
+            break
+    else:
+        return bit_split_mul(a, b, modulus)
+
+    a_array, b_array = int64_residues(a), int64_residues(b)
+    residues = [ntt_convolve(a_array, b_array, p) for p in primes]
+    product = garner(residues, primes)
+    if modulus is not None:
+        return [c % modulus for c in product]
+    # Residues are in [0, M), products of either sign are centered
+    half = prime_product // 2
+    return [c - prime_product if c > half else c for c in product]
+
+
+def bit_split_mul(a: list[int], b: list[int], modulus: int | None = None) -> list[int]:
+    """
+    Karatsuba on the bits of the coefficients: with c = h 2^s + l for every coefficient, l in [0, 2^s),
+    a * b = a_h b_h 2^2s + ((a_h + a_l)(b_h + b_l) - a_h b_h - a_l b_l) 2^s + a_l b_l,
+    three products of coefficients about half as wide, each by ntt_mul
+    :return: Coefficients of a * b, reduced mod modulus if given
+    """
+    shift = max(max(map(abs, a)).bit_length(), max(map(abs, b)).bit_length()) + 1 >> 1
+    mask = (1 << shift) - 1
+    a_low, a_high = [c & mask for c in a], [c >> shift for c in a]
+    b_low, b_high = [c & mask for c in b], [c >> shift for c in b]
+    low, high = ntt_mul(a_low, b_low), ntt_mul(a_high, b_high)
+    middle = ntt_mul(add_coefs(a_low, a_high), add_coefs(b_low, b_high))
+    product = [x + (y - x - z << shift) + (z << 2 * shift) for x, y, z in zip(low, middle, high)]
+    return product if modulus is None else [c % modulus for c in product]
+
+
+def int64_residues(coefs: list[int]) -> np.ndarray | list[int]:
+    """
+    :return: coefs as an int64 array if they fit, else unchanged (reduced per prime in ntt_convolve)
+    """
+    if max(map(abs, coefs)).bit_length() <= INT64_COEF_BITS:
+        return np.array(coefs, dtype=np.int64)
+    return coefs
+
+
+def ntt_convolve(a: np.ndarray | list[int], b: np.ndarray | list[int], p: int) -> np.ndarray:
+    """
+    :param a: Integer coefficients
+    :param b: Integer coefficients
+    :param p: One of NTT_PRIMES
+    :return: Coefficients of a * b mod p, as an int64 array
+    """
+    length = len(a) + len(b) - 1
+    size = 1 << (length - 1).bit_length()
+    fa, fb = np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64)
+    fa[:len(a)] = np.asarray(a) % p if isinstance(a, np.ndarray) else [c % p for c in a]
+    fb[:len(b)] = np.asarray(b) % p if isinstance(b, np.ndarray) else [c % p for c in b]
+    fa, fb = ntt(fa, p), ntt(fb, p)
+    product = ntt(fa * fb % p, p, inverse=True)
+    return product[:length]
+
+
+def ntt(a: np.ndarray, p: int, inverse: bool = False) -> np.ndarray:
+    """
+    Iterative radix-2 number-theoretic transform, with every butterfly of a stage done in one NumPy pass
+    :param a: int64 array of residues mod p, of power of two length
+    :param p: One of NTT_PRIMES
+    :param inverse: Whether to apply the inverse transform (scaled by 1 / len(a))
+    :return: Transformed array
+    """
+    n = len(a)
+    a = a[bit_reversal(n)]
+    length = 1
+    while length < n:
+        twiddles = ntt_twiddles(p, 2 * length, inverse)
+        blocks = a.reshape(-1, 2 * length)
+        u, v = blocks[:, :length], blocks[:, length:] * twiddles % p
+        a = np.concatenate(((u + v) % p, (u - v) % p), axis=1).reshape(-1)
+        length *= 2
+    if inverse:
+        a = a * pow(n, -1, p) % p
+    return a
+
+
+@lru_cache
+def ntt_twiddles(p: int, order: int, inverse: bool) -> np.ndarray:
+    """
+    :return: w^0, ..., w^(order / 2 - 1) mod p for a primitive order-th root of unity w (or its inverse)
+    """
+    w = pow(ntt_root(p), (p - 1) // order, p)
+    if inverse:
+        w = pow(w, -1, p)
+    twiddles = np.ones(1, dtype=np.int64)
+    while len(twiddles) < order // 2:
+        twiddles = np.concatenate((twiddles, twiddles * pow(w, len(twiddles), p) % p))
+    return twiddles[:order // 2]
+
+
+@lru_cache
+def ntt_root(p: int) -> int:
+    """
+    :return: A quadratic non-residue mod p, whose powers (p - 1) / 2^k are primitive 2^k-th roots of unity
+    """
+    return next(g for g in range(2, p) if pow(g, (p - 1) // 2, p) == p - 1)
+
+
+@lru_cache
+def bit_reversal(n: int) -> np.ndarray:
+    """
+    :return: The bit reversal permutation of range(n), for n a power of two
+    """
+    permutation = np.zeros(1, dtype=np.int64)
+    while len(permutation) < n:
+        permutation = np.concatenate((2 * permutation, 2 * permutation + 1))
+    return permutation
+
+
+def garner(residues: list[np.ndarray], primes: list[int]) -> list[int]:
+    """
+    CRT by Garner's algorithm, vectorized over coefficients
+    The mixed radix digits are computed in int64, and only the final sum uses Python ints
+    :param residues: Coefficients mod each prime
+    :param primes: Distinct primes
+    :return: Coefficients mod the product of the primes, in [0, product)
+    """
+    digits = []
+    for i, (r, p) in enumerate(zip(residues, primes)):
+        # Value of the digits so far mod p, then solve for the next digit
+        partial, radix = np.zeros_like(r), 1
+        for d, q in zip(digits, primes):
+            partial = (partial + d * radix) % p
+            radix = radix * q % p
+        digits.append((r - partial) % p * pow(radix, -1, p) % p)
+    if math.prod(primes) < 1 << 63:
+        value, radix = np.zeros_like(residues[0]), 1
+        for d, q in zip(digits, primes):
+            value += d * radix
+            radix *= q
+        return value.tolist()
+    value = digits[-1].astype(object)
+    for d, q in zip(reversed(digits[:-1]), reversed(primes[:-1])):
+        value = value * q + d
+    return value.tolist()
+
+
+def add_coefs(a: list, b: list) -> list:
+    return [x + y for x, y in zip_longest(a, b, fillvalue=0)]
+
+
+def sub_coefs(a: list, b: list) -> list:
+    return [x - y for x, y in zip_longest(a, b, fillvalue=0)]
+
+
+def scale_coefs(a: list, c) -> list:
+    return [x * c for x in a]
+
+
+def divide_coefs(a: list, d: int) -> list:
+    """
+    :return: a / d, exactly when the division is exact (ints stay ints)
+    """
+    return [x // d if isinstance(x, int) else x / d for x in a]
+
+
+def combine(parts: list[list], k: int, length: int) -> list:
+    """
+    :return: sum of parts[i] * x^(k * i), as a list of the given length
+    """
+    product = [0] * length
+    for i, part in enumerate(parts):
+        for j, c in enumerate(part, k * i):
+            if j < length:
+                product[j] += c
+    return product
@@ -0,0 +1,264 @@
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+import numpy.typing as npt
+
+from src.useful_tools.exceptions import PolynomialParseError
+
+__all__ = ['parse_terms', 'parse_many', 'coef_matrix', 'term_chunks']
+
+# Strings tokenized at once by term_chunks()
+CHUNK_SIZE = 1 << 14
+# Byte kinds for tokenize_chunk(), and which kind may follow which once spaces are dropped
+OTHER, DIGIT, VAR, CARET, SIGN, SPACE, SEP = range(7)
+BYTE_KINDS = np.full(256, OTHER, dtype=np.uint8)
+BYTE_KINDS[np.frombuffer(b'0123456789', dtype=np.uint8)] = DIGIT
+BYTE_KINDS[1] = VAR
+BYTE_KINDS[ord('^')] = CARET
+BYTE_KINDS[[ord('+'), ord('-')]] = SIGN
+BYTE_KINDS[np.frombuffer(b' \t\n\r\x0b\x0c', dtype=np.uint8)] = SPACE
+BYTE_KINDS[0] = SEP
+ALLOWED = np.zeros((7, 7), dtype=bool)
+for pair in [(SEP, SIGN), (SEP, DIGIT), (SEP, VAR), (SIGN, DIGIT), (SIGN, VAR), (DIGIT, DIGIT), (DIGIT, VAR),
+             (DIGIT, SIGN), (DIGIT, SEP), (VAR, CARET), (VAR, SIGN), (VAR, SEP), (CARET, DIGIT)]:
+    ALLOWED[pair] = True
+# Both as bytes.translate() tables, which look bytes up faster than NumPy indexing; pairs are looked up at
+# kind * 7 + next kind
+KIND_TABLE = BYTE_KINDS.tobytes()
+PAIR_TABLE = ALLOWED.tobytes().ljust(256, b'\0')
+# Longest number tokenize_chunk() reads into int64, longer ones are left to parse_terms()
+MAX_DIGITS = 18
+
+
+@lru_cache
+def term_patterns(variable: str) -> tuple[re.Pattern, re.Pattern]:
+    """
+    :param variable: The polynomial variable
+    :return: The pattern of a whole polynomial string, a sum of terms like 3, -x, +12x^7 with optional spaces
+             around the signs, and the pattern findall() picks the sign, coefficient, variable and power of each
+             term with
+    """
+    var = re.escape(variable)
+    term = fr'(?:\d+(?:{var}(?:\^\d+)?)?|{var}(?:\^\d+)?)'
+    whole = re.compile(fr'\s*[+-]?\s*{term}(?:\s*[+-]\s*{term})*\s*')
+    terms = re.compile(fr'([+-]?)\s*(?=\d|{var})(\d*)({var})?(?:\^(\d+))?')
+    return whole, terms
+
+
+def parse_terms(poly_str: str, variable: str = 'x') -> dict[int, int]:
+    """
+    Parses a polynomial string with integer coefficients, like 3x^4-x^2+7x-2, in one findall() pass
+    after validating it in one fullmatch(), both with patterns compiled once per variable
+    :param poly_str: The polynomial string
+    :param variable: The polynomial variable
+    :return: Power -> coefficient, repeated powers summed (zeros kept)
+    :raises PolynomialParseError: If poly_str isn't a sum of terms, with the position of the first bad character
+    """
+    whole, terms = term_patterns(variable)
+    if whole.fullmatch(poly_str) is None:
+        raise PolynomialParseError(poly_str, error_position(poly_str, variable))
+    coefs = {}
+    for sign, coef, var, power in terms.findall(poly_str):
+        c = int(sign + coef) if coef else -1 if sign == '-' else 1
+        k = int(power) if power else 1 if var else 0
+        coefs[k] = coefs.get(k, 0) + c
+    return coefs
+
+
+def error_position(poly_str: str, variable: str) -> int:
+    """
+    :return: Index of the first character of poly_str after its longest valid prefix
+    """
+    whole, _ = term_patterns(variable)
+    prefix = whole.match(poly_str)
+    return len(poly_str) - len(poly_str.lstrip()) if prefix is None else prefix.end()
+
+
+def parse_many(poly_strs: Iterable[str], variable: str = 'x',
+               errors: list[PolynomialParseError] | None = None) -> Iterator[dict[int, int] | None]:
+    """
+    parse_terms() over a stream of strings, such as the lines of a file
+    Reads CHUNK_SIZE strings at a time and tokenizes each chunk at once, see term_chunks()
+    :param poly_strs: Polynomial strings, surrounding whitespace (and newlines) allowed
+    :param variable: The polynomial variable
+    :param errors: If given, strings that fail to parse yield None and their error, with its line number
+                   (from 0), is appended to errors; otherwise the first error is raised
+    :return: Iterator of power -> coefficient dicts
+    """
+    for lines, powers, coefs, failed in term_chunks(poly_strs, variable, errors):
+        bounds = np.searchsorted(lines, np.arange(len(failed) + 1)).tolist()
+        powers, coefs = powers.tolist(), coefs.tolist()
+        for start, end, fail in zip(bounds, bounds[1:], failed.tolist()):
+            yield None if fail else dict(zip(powers[start:end], coefs[start:end]))
+
+
+def coef_matrix(poly_strs: Iterable[str], variable: str = 'x', dtype: npt.DTypeLike = np.int64,
+                errors: list[PolynomialParseError] | None = None) -> np.ndarray:
+    """
+    Parses many polynomial strings into one packed array, without building a dict per string
+    :param poly_strs: Polynomial strings
+    :param variable: The polynomial variable
+    :param dtype: NumPy dtype of the array
+    :param errors: See parse_many(), rows of strings that fail to parse are left zero
+    :return: Array of shape (number of strings, highest degree + 1), row i holding the coefficients of
+             string i, constant term first
+    """
+    lines, powers, coefs = [], [], []
+    count = 0
+    for chunk_lines, chunk_powers, chunk_coefs, failed in term_chunks(poly_strs, variable, errors):
+        lines.append(chunk_lines + count)
+        powers.append(chunk_powers)
+        coefs.append(chunk_coefs)
+        count += len(failed)
+    lines, powers = np.concatenate(lines or [[]]).astype(np.intp), np.concatenate(powers or [[]]).astype(np.intp)
+    matrix = np.zeros((count, powers.max(initial=-1) + 1), dtype=dtype)
+    matrix[lines, powers] = np.concatenate(coefs or [np.zeros(0, dtype=np.int64)])
+    return matrix
+
+
+def term_chunks(poly_strs: Iterable[str], variable: str = 'x', errors: list[PolynomialParseError] | None = None
+                ) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    The terms of CHUNK_SIZE strings at a time, as arrays: the entries of their rows of coef_matrix()
+    Strings tokenize_chunk() leaves over are parsed by parse_terms()
+    :param poly_strs: Polynomial strings
+    :param variable: The polynomial variable
+    :param errors: See parse_many(), strings that fail to parse have no terms
+    :return: Iterator of the line (in the chunk), power and coefficient of each term, sorted by line then power,
+             with repeated powers summed (zeros kept), coefficients in int64 unless some don't fit,
+             and a mask of the strings of the chunk that failed to parse
+    """
+    poly_strs = iter(poly_strs)
+    offset = 0
+    while chunk := list(islice(poly_strs, CHUNK_SIZE)):
+        lines, powers, coefs, slow = tokenize_chunk(chunk, variable)
+        failed = np.zeros(len(chunk), dtype=bool)
+        if slow.any():
+            lines, powers, coefs = [lines], [powers], [coefs]
+            for line in np.flatnonzero(slow).tolist():
+                try:
+                    terms = parse_terms(chunk[line], variable)
+                except PolynomialParseError as e:
+                    e.line = offset + line
+                    if errors is None:
+                        raise
+                    errors.append(e)
+                    failed[line] = True
+                    continue
+                values = list(terms.values())
+                lines.append(np.full(len(terms), line))
+                powers.append(np.fromiter(terms.keys(), dtype=np.int64, count=len(terms)))
+                coefs.append(np.array(values, dtype=np.int64 if fits_int64(values) else object))
+            lines, powers, coefs = np.concatenate(lines), np.concatenate(powers), np.concatenate(coefs)
+
+        top = int(powers.max(initial=0)) + 1
+        if top * len(chunk) < 1 << 62:
+            order = np.argsort(lines * top + powers, kind='stable')
+        else:
+            order = np.lexsort((powers, lines))
+        lines, powers, coefs = lines[order], powers[order], coefs[order]
+        new = np.ones(len(lines), dtype=bool)
+        new[1:] = (lines[1:] != lines[:-1]) | (powers[1:] != powers[:-1])
+        if not new.all():
+            # Repeated powers, summed in Python ints when int64 could overflow
+            firsts = np.flatnonzero(new)
+            longest = int(np.diff(np.append(firsts, len(lines))).max())
+            if not fits_int64([int(coefs.min()) * longest, int(coefs.max()) * longest]):
+                coefs = coefs.astype(object)
+            coefs = np.add.reduceat(coefs, firsts)
+            lines, powers = lines[firsts], powers[firsts]
+        yield lines, powers, coefs, failed
+        offset += len(chunk)
+
+
+def fits_int64(values: list[int]) -> bool:
+    """
+    :return: Whether all the values fit in int64
+    """
+    return -(1 << 63) <= min(values, default=0) and max(values, default=0) < 1 << 63
+
+
+def tokenize_chunk(poly_strs: list[str], variable: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Validates and tokenizes many polynomial strings at once on their bytes, in NumPy
+    The strings are joined by NUL bytes and every byte classified; a string is valid when every pair of
+    consecutive tokens (spaces dropped) is one the grammar allows, and spaces only touch signs or the ends.
+    Digit runs are then summed into numbers, and each term's sign, coefficient and power found from
+    the runs and the variable it starts at, all without a Python loop per character or term
+    :param poly_strs: Polynomial strings
+    :param variable: The polynomial variable
+    :return: Line (index into poly_strs), power and coefficient of each term of the strings that were parsed,
+             in order, and a mask of the strings left to parse_terms(): invalid ones,
+             and ones with numbers over MAX_DIGITS digits
+    """
+    blob = '\0'.join(poly_strs)
+    slow = np.zeros(len(poly_strs), dtype=bool)
+    if (blob.count('\0') != len(poly_strs) - 1 or '\1' in blob or not variable
+            or any(c in '0123456789+-^\0\1' or c.isspace() for c in variable)):
+        slow[:] = True
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, slow
+    # Bytes with a separator at both ends, and their kinds
+    codes = ('\0' + blob.replace(variable, '\1') + '\0').encode()
+    tokens, kinds = np.frombuffer(codes, dtype=np.uint8), np.frombuffer(codes.translate(KIND_TABLE), dtype=np.uint8)
+    bad = []
+    is_space = kinds == SPACE
+    if is_space.any():
+        spaced = np.concatenate(([False], is_space[:-1]))[~is_space]
+        tokens, kinds = tokens[~is_space], kinds[~is_space]
+        next_to_sign = (kinds == SIGN) | (kinds == SEP)
+        bad.append(np.flatnonzero(spaced[1:] & ~next_to_sign[1:] & ~next_to_sign[:-1]))
+    seps = np.flatnonzero(kinds == SEP)
+    pairs = (kinds[:-1] * len(ALLOWED) + kinds[1:]).tobytes().translate(PAIR_TABLE)
+    bad.append(np.flatnonzero(~np.frombuffer(pairs, dtype=bool)))
+
+    # Digit runs, and which of them are powers (right after a caret)
+    edges = np.diff((kinds == DIGIT).view(np.int8))
+    starts, ends = np.flatnonzero(edges == 1) + 1, np.flatnonzero(edges == -1)
+    is_power = kinds[starts - 1] == CARET
+    # A power followed by the variable (x^2x) is the only invalid pair the transition table can't see
+    bad.append(ends[is_power & (kinds[ends + 1] == VAR)])
+    bad.append(starts[ends - starts >= MAX_DIGITS])
+    slow[np.searchsorted(seps, np.concatenate(bad), 'right') - 1] = True
+
+    if slow.any():
+        # Only valid strings are read from here on, so every token belongs to the term before it
+        valid = ~np.append(slow, False)[np.cumsum(kinds == SEP) - 1]
+        tokens, kinds = tokens[valid], kinds[valid]
+        seps = np.flatnonzero(kinds == SEP)
+        edges = np.diff((kinds == DIGIT).view(np.int8))
+        starts, ends = np.flatnonzero(edges == 1) + 1, np.flatnonzero(edges == -1)
+        is_power = kinds[starts - 1] == CARET
+
+    # Value of each digit run, by Horner's rule over the digits counted back from the ends of the runs
+    lengths = ends - starts + 1
+    values = np.zeros(len(starts), dtype=np.int64)
+    for shift in range(lengths.max(initial=0) - 1, -1, -1):
+        digits = tokens.take(ends - shift).astype(np.int64) - ord('0')
+        values = values * 10 + np.where(shift < lengths, digits, 0)
+
+    # Terms start at a sign, or at a digit or the variable right after a separator, and are read from there:
+    # an optional coefficient run, then an optional variable with an optional caret and power run
+    term_start = kinds == SIGN
+    term_start[seps[:-1] + 1] = True
+    term_at = np.flatnonzero(term_start)
+    run_at = np.empty(len(kinds), dtype=np.intp)
+    run_at[starts] = np.arange(len(starts))
+    coef_at = term_at + (kinds.take(term_at) == SIGN)
+    has_coef = kinds.take(coef_at) == DIGIT
+    coef_runs = run_at.take(coef_at[has_coef])
+    var_at = coef_at.copy()
+    var_at[has_coef] = ends.take(coef_runs) + 1
+    has_var = kinds.take(var_at) == VAR
+    has_power = has_var.copy()
+    has_power[has_var] = kinds.take(var_at[has_var] + 1) == CARET
+    coefs = np.where(tokens.take(term_at) == ord('-'), -1, 1)
+    coefs[has_coef] *= values.take(coef_runs)
+    powers = has_var.astype(np.int64)
+    powers[has_power] = values.take(run_at.take(var_at[has_power] + 2))
+    lines = np.searchsorted(seps, term_at, 'right') - 1
+    # Separators are only left before the valid strings
+    return np.flatnonzero(~slow)[lines] if slow.any() else lines, powers, coefs, slow
@@ -0,0 +1,477 @@
+import math
+from decimal import Context, Decimal
+from fractions import Fraction
+from itertools import chain
+
+import numpy as np
+
+from src.useful_tools.math.poly_div import divmod_coefs, floordiv_coefs, mod_coefs
+from src.useful_tools.math.poly_eval import evaluate_many, horner, horner_array
+from src.useful_tools.math.poly_gcd import gcd_coefs, resultant_coefs, squarefree_coefs, xgcd_coefs
+from src.useful_tools.math.poly_mul import FFT_THRESHOLD, float_mul, multiply
+from src.useful_tools.math.poly_roots import find_roots, refine_roots, roots_coefs
+from src.useful_tools.math.primes import is_prime
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+__all__ = [
+    'Ring', 'DecimalRing', 'IntegerRing', 'RationalRing', 'FloatRing', 'GF', 'MpzRing', 'MpqRing',
+    'NUMBERS', 'DECIMALS', 'INTEGERS', 'RATIONALS', 'FLOATS', 'MPZ', 'MPQ',
+    'get_ring', 'common_ring', 'exact_coefs', 'to_decimal',
+]
+
+
+class Ring:
+    """
+    Coefficient ring of a polynomial: how coefficients are converted and stored,
+    and the kernels multiplying, dividing and evaluating dense coefficient lists (constant term first) in it
+    The base ring keeps coefficients as they are, dispatching on their types like poly_mul and poly_div do;
+    subclasses convert into one type and override the kernels that have faster versions for it
+    """
+    name = 'numbers'
+    # NumPy dtype the dense backend packs coefficients in, None for a Python list
+    dtype: np.dtype | None = None
+    zero = 0
+
+    def __call__(self, c):
+        return self.convert(c)
+
+    def __eq__(self, other):
+        return isinstance(other, Ring) and type(self) is type(other) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return self.name
+
+    @property
+    def field(self) -> 'Ring':
+        """
+        :return: Ring that quotients land in, self for fields
+        """
+        return self
+
+    def convert(self, c):
+        """
+        :return: c as a coefficient of the ring
+        """
+        return c
+
+    def convert_all(self, coefs):
+        """
+        :param coefs: Coefficients, a sequence or a NumPy array
+        :return: Coefficients converted by convert(), vectorized where the ring can
+        """
+        return coefs
+
+    def reduce(self, c):
+        """
+        :return: c, the result of adding or multiplying coefficients, back in its canonical form
+        """
+        return c
+
+    def point(self, x):
+        """
+        :return: x as a point to evaluate at
+        """
+        return x
+
+    def power(self, x, n: int):
+        return x ** n
+
+    def multiply(self, a: list, b: list) -> list | np.ndarray:
+        return multiply(a, b)
+
+    def divmod(self, a: list, b: list) -> tuple[list, list]:
+        """
+        :return: q, r for a = b q + r, with coefficients in self.field
+        """
+        return divmod_coefs(a, b)
+
+    def floordiv(self, a: list, b: list) -> list:
+        return floordiv_coefs(a, b)
+
+    def mod(self, a: list, b: list) -> list:
+        return mod_coefs(a, b)
+
+    def evaluate(self, coefs: list, x):
+        return horner(coefs, self.point(x))
+
+    def evaluate_many(self, coefs: list, points, modulus: int | None = None) -> list | np.ndarray:
+        """
+        :param modulus: If given, evaluates integer coefficients at integer points mod modulus
+        :return: Values at the points, see poly_eval.evaluate_many
+        """
+        return evaluate_many(coefs, points, modulus)
+
+    def gcd(self, a: list, b: list) -> list:
+        """
+        Coefficients are taken exactly, whole numbers as ints
+        :return: gcd of a and b, see poly_gcd.gcd_coefs
+        """
+        return gcd_coefs(self.exact(a), self.exact(b))
+
+    def xgcd(self, a: list, b: list) -> tuple[list, list, list]:
+        """
+        :return: g, s, t with s a + t b = g, the monic gcd, in self.field, see poly_gcd.xgcd_coefs
+        """
+        return xgcd_coefs(self.exact(a), self.exact(b))
+
+    def resultant(self, a: list, b: list):
+        return resultant_coefs(self.exact(a), self.exact(b))
+
+    def squarefree(self, a: list) -> tuple[object, list[tuple[list, int]]]:
+        """
+        :return: c, [(f_1, k_1), ...] with a = c f_1^k_1 ..., see poly_gcd.squarefree_coefs
+        """
+        return squarefree_coefs(self.exact(a))
+
+    def roots(self, a: list, digits: int | None = None) -> list:
+        """
+        :param digits: If given, the roots are refined to this many significant digits
+        :return: Complex roots of a with multiplicity, see poly_roots.roots_coefs; non-real coefficients have no
+                 exact square-free decomposition, so their roots come straight from poly_roots.find_roots
+        """
+        if any(isinstance(c, complex) and c.imag for c in a):
+            roots = find_roots(np.asarray(a, dtype=np.complex128))
+            roots = roots.tolist() if digits is None else refine_roots(a, roots, digits)
+            return sorted(roots, key=lambda z: (z.real, z.imag))
+        return roots_coefs(self.exact(a), digits)
+
+    def exact(self, coefs: list) -> list:
+        """
+        :return: Coefficients as ints and Fractions, for the exact algorithms of poly_gcd
+        """
+        return exact_coefs(coefs)
+
+
+class DecimalRing(Ring):
+    """
+    Decimals, in the current decimal context
+    Products and quotients are worked out exactly over ints and Fractions and rounded once at the end
+    """
+    name = 'decimal'
+    zero = Decimal(0)
+    # Converts 64 bit integers (at most 20 digits) exactly, faster than Decimal() one at a time
+    int64_context = Context(prec=20)
+
+    def convert(self, c):
+        return to_decimal(c) if isinstance(c, Fraction) else Decimal(c)
+
+    def convert_all(self, coefs):
+        if isinstance(coefs, np.ndarray) and coefs.dtype.kind in 'iu':
+            return list(map(self.int64_context.create_decimal, coefs.tolist()))
+        return [self.convert(c) for c in coefs]
+
+    def point(self, x):
+        return Decimal(x)
+
+    def multiply(self, a: list, b: list) -> list:
+        if all(c == c.to_integral_value() for c in chain(a, b)):
+            return multiply([int(c) for c in a], [int(c) for c in b])
+        return multiply(a, b)
+
+    def divmod(self, a: list, b: list) -> tuple[list, list]:
+        return divmod_coefs(exact_coefs(a), exact_coefs(b))
+
+    def floordiv(self, a: list, b: list) -> list:
+        return floordiv_coefs(exact_coefs(a), exact_coefs(b))
+
+    def mod(self, a: list, b: list) -> list:
+        return mod_coefs(exact_coefs(a), exact_coefs(b))
+
+    def evaluate_many(self, coefs: list, points, modulus: int | None = None) -> list | np.ndarray:
+        values = evaluate_many(exact_coefs(coefs), points, modulus)
+        if isinstance(values, np.ndarray) or modulus is not None:
+            return values
+        return [self.convert(v) for v in values]
+
+
+class IntegerRing(Ring):
+    """
+    Python ints, whose quotients are Fractions
+    """
+    name = 'int'
+
+    @property
+    def field(self) -> Ring:
+        return RATIONALS
+
+    def convert(self, c):
+        n = int(c)
+        if n != c:
+            raise ValueError(f'{c!r} is not an integer')
+        return n
+
+    def convert_all(self, coefs):
+        return [self.convert(c) for c in coefs]
+
+
+class RationalRing(Ring):
+    """
+    Fractions
+    """
+    name = 'fraction'
+    zero = Fraction(0)
+
+    def convert(self, c):
+        return c if isinstance(c, Fraction) else Fraction(c)
+
+    def convert_all(self, coefs):
+        return [self.convert(c) for c in coefs]
+
+    def exact(self, coefs: list) -> list:
+        return coefs
+
+    def multiply(self, a: list, b: list) -> list:
+        """
+        Clears denominators so the product is one integer multiplication, FFT-based for long factors
+        """
+        da, db = math.lcm(*(c.denominator for c in a)), math.lcm(*(c.denominator for c in b))
+        product = multiply([c.numerator * (da // c.denominator) for c in a],
+                           [c.numerator * (db // c.denominator) for c in b])
+        return [Fraction(c, da * db) for c in product]
+
+
+class FloatRing(Ring):
+    """
+    Double precision floats, packed in float64 arrays by the dense backend
+    Products go through the real FFT, and evaluation through Horner vectorized over the points
+    """
+    name = 'float'
+    dtype = np.dtype(np.float64)
+    zero = 0.0
+
+    def convert(self, c):
+        return float(c)
+
+    def convert_all(self, coefs):
+        if isinstance(coefs, np.ndarray):
+            return coefs.astype(np.float64)
+        return [float(c) for c in coefs]
+
+    def multiply(self, a: list, b: list) -> np.ndarray:
+        return float_mul(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+
+    def evaluate_many(self, coefs: list, points, modulus: int | None = None) -> np.ndarray:
+        if modulus is not None:
+            raise ValueError('float coefficients cannot be evaluated mod a modulus')
+        return horner_array(np.asarray(coefs, dtype=np.float64), np.asarray(points, dtype=np.float64))
+
+    def roots(self, a: list, digits: int | None = None) -> list:
+        """
+        Double precision roots come straight from the coefficients, without the exact square-free decomposition
+        """
+        if digits is not None:
+            return super().roots(a, digits)
+        return sorted(find_roots(np.asarray(a, dtype=np.float64)).tolist(), key=lambda z: (z.real, z.imag))
+
+
+class GF(Ring):
+    """
+    Integers mod a prime p, as residues in [0, p)
+    Packed in int64 arrays by the dense backend when the product of two residues fits, p < 2^31
+    Fractions (and non-integral Decimals, exactly) map to numerator * denominator^-1 mod p
+    """
+    zero = 0
+
+    def __init__(self, p: int):
+        """
+        :param p: Prime modulus
+        """
+        if not is_prime(p):
+            raise ValueError(f'GF(p) needs a prime modulus, got {p}')
+        self.p = p
+        self.name = f'GF({p})'
+        self.dtype = np.dtype(np.int64) if p < 1 << 31 else None
+
+    def convert(self, c):
+        if isinstance(c, int | np.integer):
+            return int(c) % self.p
+        c = Fraction(c)
+        return c.numerator * pow(c.denominator, -1, self.p) % self.p
+
+    def convert_all(self, coefs):
+        if isinstance(coefs, np.ndarray) and coefs.dtype.kind in 'iu' and self.dtype is not None:
+            return coefs.astype(np.int64) % self.p
+        return [self.convert(c) for c in coefs]
+
+    def reduce(self, c):
+        return c % self.p
+
+    def point(self, x):
+        return self.convert(x)
+
+    def power(self, x, n: int):
+        return pow(x, n, self.p)
+
+    def multiply(self, a: list, b: list) -> list:
+        return multiply(a, b, self.p)
+
+    def divmod(self, a: list, b: list) -> tuple[list, list]:
+        return divmod_coefs(a, b, self.p)
+
+    def floordiv(self, a: list, b: list) -> list:
+        return floordiv_coefs(a, b, self.p)
+
+    def mod(self, a: list, b: list) -> list:
+        return mod_coefs(a, b, self.p)
+
+    def evaluate(self, coefs: list, x):
+        return horner(coefs, self.point(x), self.p)
+
+    def gcd(self, a: list, b: list) -> list:
+        return gcd_coefs(a, b, self.p)
+
+    def xgcd(self, a: list, b: list) -> tuple[list, list, list]:
+        return xgcd_coefs(a, b, self.p)
+
+    def resultant(self, a: list, b: list):
+        return resultant_coefs(a, b, self.p)
+
+    def squarefree(self, a: list) -> tuple[object, list[tuple[list, int]]]:
+        return squarefree_coefs(a, self.p)
+
+    def roots(self, a: list, digits: int | None = None) -> list:
+        raise ValueError(f'{self} coefficients have no complex roots')
+
+    def evaluate_many(self, coefs: list, points, modulus: int | None = None) -> list:
+        if modulus not in (None, self.p):
+            raise ValueError(f'{self} coefficients cannot be evaluated mod {modulus}')
+        points = points.tolist() if isinstance(points, np.ndarray) else points
+        return evaluate_many(coefs, [self.point(x) for x in points], self.p)
+
+
+class MpzRing(Ring):
+    """
+    gmpy2 mpz integers, whose quotients are mpq
+    Long products are done over Python ints by poly_mul's FFT, short ones directly on the mpz
+    """
+    name = 'mpz'
+
+    @property
+    def field(self) -> Ring:
+        return MPQ
+
+    def convert(self, c):
+        n = gmpy2.mpz(int(c))
+        if n != c:
+            raise ValueError(f'{c!r} is not an integer')
+        return n
+
+    def convert_all(self, coefs):
+        return [self.convert(c) for c in coefs]
+
+    def multiply(self, a: list, b: list) -> list:
+        if min(len(a), len(b)) < FFT_THRESHOLD:
+            return multiply(a, b)
+        return multiply([int(c) for c in a], [int(c) for c in b])
+
+    def divmod(self, a: list, b: list) -> tuple[list, list]:
+        return divmod_coefs([int(c) for c in a], [int(c) for c in b])
+
+    def floordiv(self, a: list, b: list) -> list:
+        return floordiv_coefs([int(c) for c in a], [int(c) for c in b])
+
+    def mod(self, a: list, b: list) -> list:
+        return mod_coefs([int(c) for c in a], [int(c) for c in b])
+
+
+class MpqRing(Ring):
+    """
+    gmpy2 mpq rationals, divided exactly as Fractions
+    """
+    name = 'mpq'
+
+    def convert(self, c):
+        c = Fraction(c)
+        return gmpy2.mpq(c.numerator, c.denominator)
+
+    def convert_all(self, coefs):
+        return [self.convert(c) for c in coefs]
+
+    def exact(self, coefs: list) -> list:
+        return to_fractions(coefs)
+
+    def divmod(self, a: list, b: list) -> tuple[list, list]:
+        return divmod_coefs(to_fractions(a), to_fractions(b))
+
+    def floordiv(self, a: list, b: list) -> list:
+        return floordiv_coefs(to_fractions(a), to_fractions(b))
+
+    def mod(self, a: list, b: list) -> list:
+        return mod_coefs(to_fractions(a), to_fractions(b))
+
+
+NUMBERS = Ring()
+DECIMALS = DecimalRing()
+INTEGERS = IntegerRing()
+RATIONALS = RationalRing()
+FLOATS = FloatRing()
+MPZ = MpzRing() if gmpy2 is not None else None
+MPQ = MpqRing() if gmpy2 is not None else None
+
+RINGS = {
+    'numbers': NUMBERS, 'decimal': DECIMALS, 'int': INTEGERS, 'fraction': RATIONALS, 'float': FLOATS,
+    Decimal: DECIMALS, int: INTEGERS, Fraction: RATIONALS, float: FLOATS,
+}
+if gmpy2 is not None:
+    RINGS.update({'mpz': MPZ, 'mpq': MPQ, type(gmpy2.mpz(0)): MPZ, type(gmpy2.mpq(0)): MPQ})
+
+
+def get_ring(ring: Ring | str | type | None, default: Ring = NUMBERS) -> Ring:
+    """
+    :param ring: A Ring such as GF(7), the name of one ('numbers', 'decimal', 'int', 'fraction', 'float',
+                 and 'mpz' and 'mpq' with gmpy2), or the coefficient type (Decimal, int, Fraction, float...)
+    :param default: Ring for None
+    :return: The Ring
+    """
+    if ring is None:
+        return default
+    if isinstance(ring, Ring):
+        return ring
+    try:
+        return RINGS[ring]
+    except (KeyError, TypeError):
+        pass
+    if ring in ('mpz', 'mpq'):
+        raise ImportError(f'The {ring} coefficient ring needs gmpy2')
+    names = ', '.join(name for name in RINGS if isinstance(name, str))
+    raise ValueError(f'Unknown coefficient ring {ring!r}, expected a Ring or one of {names}')
+
+
+def common_ring(a: Ring, b: Ring) -> Ring | None:
+    """
+    :return: The ring both a and b embed in, one of them or its field of fractions, None if there isn't one
+    """
+    for ring in (a, b, a.field, b.field):
+        if ring in (a, a.field) and ring in (b, b.field):
+            return ring
+    return None
+
+
+def exact_coefs(coefs: list) -> list[int | Fraction]:
+    """
+    :return: Decimal (or float, or real complex) coefficients as ints where they are whole numbers and Fractions
+             otherwise
+    """
+    coefs = [c.real if isinstance(c, complex) else c for c in coefs]
+    return [int(c) if c == int(c) else Fraction(c) for c in coefs]
+
+
+def to_fractions(coefs: list) -> list[Fraction]:
+    """
+    :return: mpq coefficients as Fractions
+    """
+    return [Fraction(int(c.numerator), int(c.denominator)) for c in coefs]
+
+
+def to_decimal(c: int | Fraction) -> Decimal:
+    """
+    :return: c as a Decimal, Fractions rounded to the Decimal context
+    """
+    return Decimal(c) if isinstance(c, int) else Decimal(c.numerator) / Decimal(c.denominator)
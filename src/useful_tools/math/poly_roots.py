@@ -0,0 +1,308 @@
+import math
+import sys
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import numpy as np
+
+from src.useful_tools.math.complex_decimal import ComplexDecimal
+from src.useful_tools.math.poly_gcd import squarefree_coefs, trim
+
+__all__ = ['find_roots', 'roots_coefs', 'companion_roots', 'aberth_roots', 'refine_roots']
+
+# Degree from which Aberth's iterations, O(n^2) each, beat the eigenvalues of the companion matrix, O(n^3),
+# for one polynomial and for batches of at least BATCH_ROWS, which the iterations take at once but LAPACK one by one,
+# from benchmarks/bench_polynomial.py
+ABERTH_THRESHOLD = 100
+BATCH_ABERTH_THRESHOLD = 5
+BATCH_ROWS = 100
+ABERTH_MAX_ITERATIONS = 100
+# Most coefficients, and root differences, held at once by one step of Aberth's iterations, to bound the memory
+# of large batches
+ABERTH_CHUNK = 1 << 22
+# Extra digits the refinement works to, and its cap on iterations, which converge cubically from double precision
+GUARD_DIGITS = 10
+REFINE_MAX_ITERATIONS = 50
+# Significant digits of the Decimal iterations for roots whose coefficients do not fit in floats, enough to round
+# them to doubles
+DOUBLE_DIGITS = 17
+
+
+def find_roots(coefs, method: str | None = None) -> np.ndarray:
+    """
+    Complex roots of a polynomial, or of many polynomials of the same degree at once, in double precision
+    :param coefs: Coefficients, constant term first, or a 2D array with the coefficients of one polynomial per row,
+    whose leading coefficients all have to be nonzero
+    :param method: 'eig' for the eigenvalues of the companion matrices, 'aberth' for Aberth's iterations,
+    by default the first below ABERTH_THRESHOLD (BATCH_ABERTH_THRESHOLD for large batches) and the second from it
+    :return: complex128 array of the roots, with multiplicity, one row per polynomial for a 2D input
+    """
+    if method not in (None, 'eig', 'aberth'):
+        raise ValueError(f"Unknown root finding method {method!r}, expected 'eig' or 'aberth'")
+    coefs = np.asarray(coefs)
+    if coefs.ndim == 1:
+        if coefs.dtype == object:
+            coefs = coefs.astype(np.complex128)
+        nonzero = np.flatnonzero(coefs)
+        if not len(nonzero):
+            raise ValueError('The zero polynomial has no finite set of roots')
+        # Zero roots are split off exactly; they slow Aberth's iterations down to linear convergence
+        low, high = nonzero[0], nonzero[-1]
+        roots = find_roots(coefs[None, low:high + 1], method)[0] if high > low else np.empty(0, np.complex128)
+        return np.concatenate([np.zeros(low, np.complex128), roots])
+    if coefs.ndim != 2:
+        raise ValueError(f'Expected the coefficients of one polynomial or a 2D array of them, got {coefs.ndim}D')
+    coefs = coefs.astype(np.complex128)
+    if not coefs[:, -1].all():
+        raise ValueError('Every polynomial in a batch needs a nonzero leading coefficient')
+    degree = coefs.shape[1] - 1
+    if degree < 2:
+        # Adding zero clears the negative zeros negation leaves in the imaginary parts
+        return -coefs[:, :degree] / coefs[:, degree:] + 0
+    threshold = BATCH_ABERTH_THRESHOLD if len(coefs) >= BATCH_ROWS else ABERTH_THRESHOLD
+    if method == 'aberth' or method is None and degree >= threshold:
+        return aberth_roots(coefs)
+    return companion_roots(coefs)
+
+
+def roots_coefs(coefs: list, digits: int | None = None) -> list:
+    """
+    Roots of a polynomial with exact coefficients
+    Each factor of its square-free decomposition (see poly_gcd.squarefree_coefs) is solved on its own, so that
+    repeated roots come out as accurately as simple ones, rather than spread around a circle of radius eps^(1/k)
+    :param coefs: int or Fraction coefficients, constant term first
+    :param digits: If given, the roots are refined to this many significant digits, see refine_roots
+    :return: The roots with multiplicity, sorted by real then imaginary part, as complex numbers,
+    or ComplexDecimals if digits is given
+    """
+    coefs = trim(coefs)
+    if not coefs:
+        raise ValueError('The zero polynomial has no finite set of roots')
+    zeros = next(i for i, c in enumerate(coefs) if c)
+    roots = [0j if digits is None else ComplexDecimal(0, 0)] * zeros
+    for factor, k in squarefree_coefs(coefs[zeros:])[1]:
+        roots += [root for root in factor_roots(factor, digits) for _ in range(k)]
+    return sorted(roots, key=lambda z: (z.real, z.imag))
+
+
+def companion_roots(coefs: np.ndarray) -> np.ndarray:
+    """
+    Roots as the eigenvalues of the companion matrices, which LAPACK balances before the QR algorithm, in O(n^3)
+    :param coefs: complex128 array, one polynomial per row, constant term first, with nonzero leading coefficients
+    :return: Array of the roots, one row per polynomial
+    """
+    rows, degree = coefs.shape[0], coefs.shape[1] - 1
+    companion = np.zeros((rows, degree, degree), dtype=np.complex128)
+    companion[:, np.arange(1, degree), np.arange(degree - 1)] = 1
+    companion[:, :, -1] = -coefs[:, :-1] / coefs[:, -1:]
+    return np.linalg.eigvals(companion)
+
+
+def aberth_roots(coefs: np.ndarray, max_iterations: int = ABERTH_MAX_ITERATIONS) -> np.ndarray:
+    """
+    Aberth-Ehrlich iterations, Newton's method on every root at once with the pull of the other roots taken off,
+    z_k -= N_k / (1 - N_k sum_j 1 / (z_k - z_j)) for the Newton correction N_k = p(z_k) / p'(z_k)
+    Roots are started on circles given by the Newton polygon of the coefficients, and each stops moving once
+    its backward error is down to rounding error, or its correction is below the last bit
+    Points outside the unit circle are evaluated through the reversed polynomial at 1 / z, which cannot overflow
+    :param coefs: complex128 array, one polynomial per row, constant term first, with nonzero leading coefficients
+    :param max_iterations: Cap on the iterations, reached only by multiple roots, which converge linearly
+    :return: Array of the roots, one row per polynomial
+    """
+    coefs = coefs / coefs[:, -1:]
+    z = initial_roots(coefs)
+    rows, cols = np.divmod(np.arange(z.size), z.shape[1])
+    for _ in range(max_iterations):
+        if not len(rows):
+            break
+        moving = aberth_step(coefs, z, rows, cols)
+        rows, cols = rows[moving], cols[moving]
+    return z
+
+
+def aberth_step(coefs: np.ndarray, z: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    One of Aberth's iterations on the roots z[rows, cols], in place, in chunks of ABERTH_CHUNK coefficients and
+    root differences
+    :return: Mask of the roots that are still moving
+    """
+    degree = coefs.shape[1] - 1
+    eps = np.finfo(np.float64).eps
+    moving = np.empty(len(rows), dtype=bool)
+    step = max(1, ABERTH_CHUNK // (degree + 1))
+    for start in range(0, len(rows), step):
+        r, c = rows[start:start + step], cols[start:start + step]
+        points = z[r, c]
+        outside = np.abs(points) > 1
+        x = np.where(outside, 1 / np.where(outside, points, 1), points)
+        # Coefficients by power of x, reversed for the points outside the unit circle, one row per power
+        a = np.where(outside, coefs[r, ::-1].T, coefs[r].T)
+        value, slope, bound, size = a[degree], np.zeros_like(x), np.abs(a[degree]), np.abs(x)
+        for k in range(degree - 1, -1, -1):
+            slope = slope * x + value
+            value = value * x + a[k]
+            bound = bound * size + np.abs(a[k])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = np.where(outside, points * value / (degree * value - x * slope), value / slope)
+            diff = points[:, None] - z[r]
+            diff[np.arange(len(r)), c] = np.inf
+            correction = newton / (1 - newton * (1 / diff).sum(axis=1))
+        correction[~np.isfinite(correction)] = 0
+        z[r, c] = points - correction
+        moving[start:start + step] = (np.abs(value) > eps * bound) & (np.abs(correction) > 4 * eps * np.abs(points))
+    return moving
+
+
+def initial_roots(coefs: np.ndarray) -> np.ndarray:
+    """
+    Starting points for Aberth's iterations, after Bini: the upper convex hull of the points (k, log |a_k|) splits
+    the roots into groups by modulus, each group evenly spread on a circle of the radius its edge's slope gives
+    The hulls of all the rows are built at once, by the monotone chain with one stack per row
+    :param coefs: Monic polynomials, one per row, constant term first
+    :return: Array of starting points, one row per polynomial
+    """
+    rows = coefs.shape[0]
+    with np.errstate(divide='ignore'):
+        logs = np.log(np.abs(coefs))
+    # Roots at zero, from a vanishing constant term, start on a tiny circle rather than all at one point
+    lowest = np.isfinite(logs).argmax(axis=1)
+    logs[:, 0] = np.where(lowest, logs[np.arange(rows), lowest] - 40 * lowest, logs[:, 0])
+    log_radii, angles = newton_circles(logs)
+    return np.exp(log_radii + 1j * angles)
+
+
+def newton_circles(logs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param logs: log |a_k|, one polynomial per row, constant term first, finite at both ends
+    :return: Logs of the radii and angles of the starting points of initial_roots, one row per polynomial
+    """
+    rows, degree = logs.shape[0], logs.shape[1] - 1
+    stack_k, stack_y = np.zeros((rows, degree + 1), dtype=np.int64), np.zeros((rows, degree + 1))
+    length, every = np.zeros(rows, dtype=np.int64), np.arange(rows)
+    for k in range(degree + 1):
+        y, valid = logs[:, k], np.isfinite(logs[:, k])
+        while True:
+            top, below = np.maximum(length - 1, 0), np.maximum(length - 2, 0)
+            k1, y1, k0, y0 = stack_k[every, top], stack_y[every, top], stack_k[every, below], stack_y[every, below]
+            with np.errstate(invalid='ignore'):
+                pop = valid & (length > 1) & ((y1 - y0) * (k - k1) <= (y - y1) * (k1 - k0))
+            if not pop.any():
+                break
+            length -= pop
+        stack_k[valid, length[valid]], stack_y[valid, length[valid]] = k, y[valid]
+        length += valid
+    on_hull = np.zeros((rows, degree + 1), dtype=bool)
+    on_hull[every.repeat(length), stack_k[np.arange(degree + 1) < length[:, None]]] = True
+    # Each root position t lies on the edge between the last hull vertex at or before it and the first one after it
+    positions = np.arange(degree + 1)
+    left = np.maximum.accumulate(np.where(on_hull, positions, 0), axis=1)[:, :-1]
+    right = np.minimum.accumulate(np.where(on_hull, positions, degree)[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    log_radii = (np.take_along_axis(logs, left, 1) - np.take_along_axis(logs, right, 1)) / (right - left)
+    angles = 2 * np.pi * (positions[:-1] - left) / (right - left) + 2 * np.pi * left / degree + 0.4
+    return log_radii, angles
+
+
+def refine_roots(coefs: list, roots, digits: int, max_iterations: int = REFINE_MAX_ITERATIONS) -> list[ComplexDecimal]:
+    """
+    Refines approximate roots to arbitrary precision, by Aberth's iterations in Decimal arithmetic
+    They converge cubically from double precision to simple roots, so a few passes reach hundreds of digits;
+    repeated roots only converge linearly, so coefs should be square-free (see roots_coefs)
+    :param coefs: Exact coefficients, ints, Fractions or Decimals, or complex numbers, constant term first
+    :param roots: Approximations to all the roots, complex numbers or ComplexDecimals
+    :param digits: Significant digits wanted
+    :param max_iterations: Cap on the iterations, to raise when the approximations are rougher than double precision
+    :return: The roots as ComplexDecimals, rounded to digits significant digits
+    """
+    with localcontext() as ctx:
+        ctx.prec = digits + GUARD_DIGITS
+        a = [Decimal(c.numerator) / Decimal(c.denominator) if isinstance(c, Fraction)
+             else ComplexDecimal.from_complex(c) if isinstance(c, complex) else Decimal(c) for c in coefs]
+        z = [root if isinstance(root, ComplexDecimal) else ComplexDecimal.from_complex(complex(root)) for root in roots]
+        tolerance = Decimal(10) ** -(digits + 1)
+        for _ in range(max_iterations):
+            converged = True
+            for k, zk in enumerate(z):
+                value, slope = ComplexDecimal(0, 0), ComplexDecimal(0, 0)
+                for coef in reversed(a):
+                    slope = slope * zk + value
+                    value = value * zk + coef
+                if not value:
+                    continue
+                newton = value / slope
+                pull = ComplexDecimal(0, 0)
+                for j, zj in enumerate(z):
+                    if j != k:
+                        pull += ComplexDecimal(1, 0) / (zk - zj)
+                correction = newton / (ComplexDecimal(1, 0) - newton * pull)
+                z[k] = zk - correction
+                converged &= abs(correction) <= tolerance * abs(z[k])
+            if converged:
+                break
+        ctx.prec = digits
+        return [round_root(zk, tolerance) for zk in z]
+
+
+def round_root(z: ComplexDecimal, tolerance: Decimal) -> ComplexDecimal:
+    """
+    :return: z rounded to the Decimal context, with a real or imaginary part below tolerance * |z| set to zero
+    """
+    size = abs(z)
+    return +ComplexDecimal(*(part if abs(part) > tolerance * size else 0 for part in (z.real, z.imag)))
+
+
+def factor_roots(coefs: list, digits: int | None) -> list:
+    """
+    Roots of one square-free factor for roots_coefs, found in double precision for p(2^s y), balanced so that its
+    coefficients fit in floats, then scaled back by 2^s. When even those span more than the float range, the roots
+    are found by Aberth's iterations in Decimal arithmetic instead, from the Newton polygon of the exact coefficients
+    :param coefs: Exact coefficients, constant term first, with a nonzero constant term
+    :param digits: As in roots_coefs
+    :return: The roots, as complex numbers, infinite for those beyond the float range, or as ComplexDecimals
+    """
+    floats, shift = balanced_floats(coefs)
+    smallest = min(abs(x) for x, c in zip(floats, coefs) if c)
+    if smallest >= sys.float_info.min:
+        # Coefficients below the rounding error of the largest, about 1, are lost in the companion matrix, taking
+        # the smallest roots with them, but not in the Horner evaluations of Aberth's iterations
+        approx = find_roots(floats, 'aberth' if smallest < sys.float_info.epsilon else None)
+        if digits is not None:
+            with localcontext() as ctx:
+                ctx.prec = digits + GUARD_DIGITS
+                scale = ComplexDecimal(Decimal(2) ** shift, 0)
+                return refine_roots(coefs, [ComplexDecimal.from_complex(z) * scale for z in approx], digits)
+        roots = np.empty_like(approx)
+        with np.errstate(over='ignore'):
+            roots.real, roots.imag = np.ldexp(approx.real, shift), np.ldexp(approx.imag, shift)
+        # Roots beyond the float range go through Decimal, which rounds their tiny real or imaginary parts to zero
+        if np.isfinite(roots).all():
+            return roots.tolist()
+    logs = [math.log(abs(c.numerator)) - math.log(c.denominator) if c else -math.inf for c in map(Fraction, coefs)]
+    log_radii, angles = newton_circles(np.array([logs]))
+    with localcontext() as ctx:
+        ctx.prec = (digits or DOUBLE_DIGITS) + GUARD_DIGITS
+        starts = []
+        for log_radius, angle in zip(log_radii[0].tolist(), angles[0].tolist()):
+            radius = Decimal(log_radius).exp()
+            starts.append(ComplexDecimal(radius * Decimal(math.cos(angle)), radius * Decimal(math.sin(angle))))
+    roots = refine_roots(coefs, starts, digits or DOUBLE_DIGITS, ABERTH_MAX_ITERATIONS)
+    return roots if digits is not None else [complex(root) for root in roots]
+
+
+def balanced_floats(coefs: list) -> tuple[np.ndarray, int]:
+    """
+    Coefficients of p(2^s y) as floats, for the s that evens out the sizes of the constant and leading ones,
+    scaled by a power of two so that the largest is about 1; those still beyond the float range round to 0.0
+    :param coefs: Exact coefficients, constant term first, with a nonzero constant term
+    :return: The floats and s
+    """
+    fractions = list(map(Fraction, coefs))
+    sizes = [c.numerator.bit_length() - c.denominator.bit_length() if c else None for c in fractions]
+    shift = round((sizes[0] - sizes[-1]) / (len(sizes) - 1)) if len(sizes) > 1 else 0
+    top = max(size + shift * k for k, size in enumerate(sizes) if size is not None)
+    floats = []
+    for k, c in enumerate(fractions):
+        # Integer true division rounds correctly, without the numerator or denominator fitting in a float
+        exponent = shift * k - top
+        floats.append((c.numerator << exponent) / c.denominator if exponent >= 0 else
+                      c.numerator / (c.denominator << -exponent))
+    return np.array(floats), shift
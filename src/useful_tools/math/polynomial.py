@@ -1,121 +1,301 @@
-import copy
 import re
 from collections import defaultdict
 from decimal import Decimal
-from itertools import chain, product
+from itertools import chain, compress, product, zip_longest
 from math import prod
-from typing import Sequence
+from typing import Any, Iterable, Iterator, Literal, Sequence
 
-from src.useful_tools.exceptions import InvalidPolynomialTypeError
+import numpy as np
+import numpy.typing as npt
+
+from src.useful_tools.exceptions import InvalidPolynomialTypeError, PolynomialParseError
+from src.useful_tools.math.poly_mul import FFT_THRESHOLD, KARATSUBA_THRESHOLD, float_mul, multiply
+from src.useful_tools.math.poly_parse import parse_terms, term_chunks
+from src.useful_tools.math.poly_ring import DECIMALS, NUMBERS, Ring, common_ring, get_ring
+
+Backend = Literal['dict', 'dense']
+BACKENDS = ('dict', 'dense')
+RingLike = Ring | str | type | None
 
 
 class CoefDict:
     """
     Defaultdict wrapper for coefficients of a polynomial
+    Zero coefficients are never stored, and the highest power is kept up to date as terms are set and removed,
+    so degree(), bool() and == need no cleanup pass; the in-place operators update the dict without temporaries
+    Coefficients live in a poly_ring.Ring, Decimals by default, whose kernels do the dense arithmetic
     """
+    __slots__ = ('dict', 'top', 'ring')
 
-    def __init__(self, *args):
-        if len(args) == 1 and isinstance(args[0], dict | defaultdict | type(self)):
-            self.dict = defaultdict(Decimal, {int(k): Decimal(v) for k, v in args[0].items()})
+    def __init__(self, *args, ring: RingLike = None):
+        """
+        :param args: A dict or CoefDict of power -> coefficient, or iterables of (power, coefficient) pairs
+        :param ring: Coefficient ring (see poly_ring.get_ring), a copied CoefDict's ring or DECIMALS by default
+        """
+        if len(args) == 1 and isinstance(args[0], CoefDict) and get_ring(ring, args[0].ring) == args[0].ring:
+            self.ring = args[0].ring
+            self.dict = defaultdict(Decimal, args[0].dict)
+            self.top = args[0].top
+            return
+        if len(args) == 1 and isinstance(args[0], CoefDict):
+            self.ring = get_ring(ring)
+            items = args[0].items()
+        elif len(args) == 1 and isinstance(args[0], dict | defaultdict):
+            self.ring = get_ring(ring, DECIMALS)
+            items = args[0].items()
         else:
-            self.dict = defaultdict(Decimal, [(int(k), Decimal(v)) for k, v in chain(*args)])
+            self.ring = get_ring(ring, DECIMALS)
+            items = chain(*args)
+        self.dict = defaultdict(Decimal)
+        self.top = None
+        for k, v in items:
+            self[int(k)] = self.ring(v)
+
+    @classmethod
+    def from_terms(cls, powers: list[int], coefs: list, ring: Ring):
+        """
+        Builds a CoefDict straight from its terms, without setting them one at a time
+        :param powers: Distinct powers, in ascending order
+        :param coefs: Their nonzero coefficients, already in ring (see Ring.convert_all)
+        :param ring: Coefficient ring
+        :return: CoefDict
+        """
+        coef_dict = object.__new__(cls)
+        coef_dict.ring = ring
+        coef_dict.dict = defaultdict(Decimal, zip(powers, coefs))
+        coef_dict.top = powers[-1] if powers else None
+        return coef_dict
 
     def sanitize(self):
         """
-        Removes zero values from dict
+        Removes zero values from dict and recomputes the highest power
+        Only needed after editing self.dict directly, every other operation keeps it free of zeros
         :return: self
         """
-        self.dict = defaultdict(Decimal, {i: v for i, v in self.items() if not v.is_zero()})
+        self.dict = defaultdict(Decimal, {i: v for i, v in self.dict.items() if v})
+        self.top = max(self.dict, default=None)
         return self
 
+    def lower_top(self):
+        """
+        Finds the highest power after the old one was removed, scanning down from it
+        for as many powers as there are terms before falling back to max()
+        """
+        if self.top is None or self.top in self.dict:
+            return
+        for power in range(self.top - 1, self.top - 1 - len(self.dict), -1):
+            if power in self.dict:
+                self.top = power
+                return
+        self.top = max(self.dict, default=None)
+
     def __neg__(self):
-        return CoefDict({i: -v for i, v in self.items()})
+        coef_dict = CoefDict(ring=self.ring)
+        coef_dict.dict.update((i, self.ring.reduce(-v)) for i, v in self.items())
+        coef_dict.top = self.top
+        return coef_dict
 
     def __eq__(self, other):
-        self.sanitize()
-        other.sanitize()
+        if not isinstance(other, CoefDict):
+            return NotImplemented
         return self.dict == other.dict
 
     def __bool__(self):
-        self.sanitize()
         return bool(self.dict)
 
+    def __len__(self) -> int:
+        """
+        :return: Number of nonzero terms
+        """
+        return len(self.dict)
+
     def __repr__(self):
         dict_str = re.search(r'defaultdict\(<class \'.+\'>, (.+)\)', str(self.dict)).group(1)
-        return f'CoefDict({dict_str})'
+        ring_str = '' if self.ring == DECIMALS else f', ring={self.ring}'
+        return f'CoefDict({dict_str}{ring_str})'
+
+    def common(self, other) -> Ring:
+        """
+        :return: Ring of the result of an operation with other, see poly_ring.common_ring
+        """
+        ring = common_ring(self.ring, getattr(other, 'ring', self.ring))
+        return self.ring if ring is None else ring
+
+    def coerce(self, other):
+        """
+        :return: other as a CoefDict, a CoefArray's coefficients (as Python numbers) keeping their ring
+        """
+        return CoefDict(enumerate(other.tolist()), ring=other.ring) if isinstance(other, CoefArray) else other
 
     def __add__(self, other):
-        coef_dict = copy.deepcopy(self)
-        for power, coef in other.items():
-            coef_dict[power] += coef
-        return CoefDict(coef_dict)
+        return CoefDict(self, ring=self.common(other)).__iadd__(other)
 
     def __sub__(self, other):
-        return self.__add__(other.__neg__())
+        return CoefDict(self, ring=self.common(other)).__isub__(other)
+
+    def __iadd__(self, other):
+        return self.addmul(other)
+
+    def __isub__(self, other):
+        return self.addmul(other, -1)
+
+    def __imul__(self, other):
+        """
+        In place multiplication by a scalar; polynomials fall back to __mul__
+        """
+        if isinstance(other, CoefDict | CoefArray):
+            return NotImplemented
+        scalar = self.ring(other)
+        if not scalar:
+            self.dict.clear()
+            self.top = None
+            return self
+        for power, coef in list(self.items()):
+            self[power] = self.ring.reduce(coef * scalar)
+        return self
+
+    def addmul(self, other, scalar=1, shift: int = 0):
+        """
+        Fused multiply-add in place, self += scalar * x^shift * other, without building the shifted product
+        :param other: CoefDict, CoefArray or any (power, coefficient) pairs through items()
+        :param scalar: Coefficient to multiply other by
+        :param shift: Power of x to multiply other by
+        :return: self
+        """
+        ring = self.ring
+        scalar = ring(scalar)
+        if not scalar:
+            return self
+        items = list(other.items()) if other is self else other.items()
+        coefs, top = self.dict, self.top
+        for power, coef in items:
+            power += shift
+            value = ring.reduce(coefs.get(power, 0) + scalar * ring(coef))
+            if value:
+                coefs[power] = value
+                if top is None or power > top:
+                    top = power
+            elif power in coefs:
+                del coefs[power]
+        self.top = top
+        self.lower_top()
+        return self
 
     def __mul__(self, other):
-        # Todo: Karatsuba
-        coef_dict = CoefDict()
-        for power, coef in ((sum(p), prod(c))
-                            for p, c in (zip(*i) for i in product(self.items(), other.items()))):
-            coef_dict[power] += coef
-        return coef_dict
+        """
+        Sparse products multiply term by term, dense ones go through the ring's multiply kernel
+        (for Decimals, poly_mul.multiply with exact integer arithmetic when every coefficient is a whole number)
+        """
+        other = self.coerce(other)
+        ring = self.common(other)
+        if ring != self.ring:
+            return CoefDict(self, ring=ring) * other
+        if not self.dict or not other.dict:
+            return CoefDict(ring=ring)
+        low, high = min(self.keys()) + min(other.keys()), self.top + other.top
+        if (min(len(self.dict), len(other.dict)) < KARATSUBA_THRESHOLD
+                or len(self.dict) * len(other.dict) <= high - low):
+            coef_dict = CoefDict(ring=ring)
+            for power, coef in ((sum(p), prod(c))
+                                for p, c in (zip(*i) for i in product(self.items(), other.items()))):
+                coef_dict[power] = ring.reduce(coef_dict[power] + coef)
+            return coef_dict
+        coefs = ring.multiply(self.dense(), [ring(c) for c in other.dense()])
+        return CoefDict(enumerate(coefs, low), ring=ring)
+
+    def dense(self, low: int | None = None) -> list:
+        """
+        :param low: Power of the first coefficient, the lowest power present by default
+        :return: Coefficients from power low to the highest power, zeros included
+        """
+        if not self.dict:
+            return []
+        if low is None:
+            low = min(self.keys())
+        elif low > min(self.keys()):
+            raise ValueError(f'CoefDict has powers below {low}')
+        coefs = [self.ring.zero] * (self.top - low + 1)
+        for power, coef in self.items():
+            coefs[power - low] = coef
+        return coefs
 
     def __divmod__(self, other) -> tuple:
         """
-        Implements expanded polynomial synthetic division
-        P(x) = D(x)Q(x) + R(x)
+        Polynomial division, P(x) = D(x)Q(x) + R(x), by the ring's kernels on the dense coefficients
+        Decimals are converted to ints and Fractions so that the division is exact,
+        and rounded back to Decimal once at the end; ints divide into Fractions
         :param self: P(x)
         :param other: D(x)
         :return: Q(x), R(x)
         """
-        # Zero checks
+        other = self.coerce(other)
         if not other:
             raise ZeroDivisionError
-        elif not self:
-            return CoefDict(), CoefDict()
+        ring = self.common(other)
+        quotient, remainder = ring.divmod(self.dense(0), [ring(c) for c in other.dense(0)])
+        return CoefDict(enumerate(quotient), ring=ring.field), CoefDict(enumerate(remainder), ring=ring.field)
 
-        # Check if degree of numerator >= degree of denominator
-        self_deg, other_deg = self.degree(), other.degree()
-        if self_deg < other_deg:
-            return CoefDict(), self
-
-        # Shifts quotient power so that the remainder coefficients have negative power
-        quotient = CoefDict({i - other_deg: v for i, v in self.items()})
-
-        # Extracts leading term and negates divisor
-        leading_coef = other[other_deg]
-        divisor = copy.deepcopy(other)
-        del divisor[other_deg]
-        divisor = -divisor
+    def __floordiv__(self, other):
+        other = self.coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        ring = self.common(other)
+        return CoefDict(enumerate(ring.floordiv(self.dense(0), [ring(c) for c in other.dense(0)])), ring=ring.field)
 
-        # Synthetic division
-        for i in reversed(range(self_deg - other_deg + 1)):
-            dropped_coef = quotient[i] / leading_coef
-            quotient += CoefDict({i - other_deg + p: dropped_coef * v for p, v in divisor.items()})
+    def __mod__(self, other):
+        other = self.coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        ring = self.common(other)
+        return CoefDict(enumerate(ring.mod(self.dense(0), [ring(c) for c in other.dense(0)])), ring=ring.field)
 
-        # Extracts remainder from negative powers of quotient
-        remainder = CoefDict({p + other_deg: quotient.pop(p) for p in [*quotient.keys()] if p < 0})
+    def gcd(self, other):
+        """
+        Greatest common divisor by the ring's kernel, see poly_gcd.gcd_coefs
+        :return: The gcd, in Z[x] for whole number coefficients and monic otherwise
+        """
+        other = self.coerce(other)
+        ring = self.common(other)
+        return CoefDict(enumerate(ring.gcd(self.dense(0), [ring(c) for c in other.dense(0)])), ring=ring)
 
-        # Rescales the quotient for non-monic divisors
-        quotient = CoefDict({i: v / leading_coef for i, v in quotient.items()})
+    def xgcd(self, other) -> tuple:
+        """
+        :return: G(x), S(x), T(x) with S(x)P(x) + T(x)D(x) = G(x), the monic gcd
+        """
+        other = self.coerce(other)
+        ring = self.common(other)
+        return tuple(CoefDict(enumerate(coefs), ring=ring.field)
+                     for coefs in ring.xgcd(self.dense(0), [ring(c) for c in other.dense(0)]))
 
-        return quotient, remainder
+    def resultant(self, other):
+        other = self.coerce(other)
+        ring = self.common(other)
+        return ring(ring.resultant(self.dense(0), [ring(c) for c in other.dense(0)]))
 
-    def __floordiv__(self, other):
-        return self.__divmod__(other)[0]
+    def squarefree(self) -> tuple:
+        """
+        :return: c, [(F_1(x), k_1), ...] with P(x) = c F_1(x)^k_1 ..., see poly_gcd.squarefree_coefs
+        """
+        constant, factors = self.ring.squarefree(self.dense(0))
+        return self.ring(constant), [(CoefDict(enumerate(f), ring=self.ring), k) for f, k in factors]
 
-    def __mod__(self, other):
-        return self.__divmod__(other)[1]
+    def roots(self, digits: int | None = None) -> list:
+        return self.ring.roots(self.dense(0), digits)
 
     def __getitem__(self, k):
-        return self.dict.__getitem__(k)
+        return self.dict.get(k, self.ring.zero)
 
     def __setitem__(self, k, v):
-        self.dict.__setitem__(k, v)
+        if v:
+            self.dict[k] = v
+            if self.top is None or k > self.top:
+                self.top = k
+        elif k in self.dict:
+            del self[k]
 
     def __delitem__(self, k):
-        self.dict.__delitem__(k)
+        del self.dict[k]
+        self.lower_top()
 
     def keys(self):
         return self.dict.keys()
@@ -127,89 +307,408 @@ class CoefDict:
         return self.dict.items()
 
     def pop(self, k):
-        return self.dict.pop(k)
+        v = self.dict.pop(k)
+        self.lower_top()
+        return v
 
     def degree(self):
-        self.sanitize()
-        return max(self.keys()) if self else Decimal('Inf')
+        return Decimal('Inf') if self.top is None else self.top
 
     def is_constant(self) -> bool:
         """
         :return:  Whether the polynomial is a constant one (Zero polynomial is not constant)
         """
-        self.sanitize()
-        try:
-            x = any(i != 1 for i in self.keys()) and bool(self.dict[0])
-            return x
-        except KeyError:
-            return False
+        return self.top == 0 and len(self.dict) == 1
+
+    def evaluate(self, inp_num):
+        """
+        Horner's rule over the nonzero terms, raising inp_num to the gap between consecutive powers
+        :param inp_num: Specified number, converted by the ring (to a Decimal by default)
+        :return: The polynomial evaluated at inp_num
+        """
+        ring = self.ring
+        x = ring.point(inp_num)
+        powers = sorted(self.keys(), reverse=True)
+        total = ring.zero
+        for power, lower in zip(powers, powers[1:] + [0]):
+            total = ring.reduce(total + self[power])
+            if power != lower:
+                total = ring.reduce(total * ring.power(x, power - lower))
+        return total
+
+    def evaluate_many(self, points, modulus: int | None = None) -> list | np.ndarray:
+        """
+        :param points: Sequence of points, or a NumPy array
+        :param modulus: If given, evaluates mod modulus (integer coefficients and points only)
+        :return: The polynomial evaluated at each point, see poly_eval.evaluate_many
+        """
+        return self.ring.evaluate_many(self.dense(0), points, modulus)
+
+
+class CoefArray:
+    """
+    Dense coefficients of a polynomial, in ascending order of power
+    Stored as a Python list (of ints, Fractions, Decimals...) or, given a dtype, a NumPy array
+    Given a poly_ring.Ring, coefficients are converted into it, packed in its dtype (float64 for FLOATS,
+    int64 for GF(p) with p < 2^31), and multiplied, divided and evaluated by its kernels
+    Trailing zeros are trimmed after every operation, so the degree is always len(coefs) - 1
+    """
+    __slots__ = ('coefs', 'dtype', 'ring')
+
+    def __init__(self, coefs: Iterable = (), dtype: npt.DTypeLike | None = None, ring: RingLike = None):
+        """
+        :param coefs: Coefficients, constant term first
+        :param dtype: NumPy dtype to store coefficients in, or None for a Python list (the ring's dtype if given)
+        :param ring: Coefficient ring (see poly_ring.get_ring), by default coefficients are kept as they are
+        """
+        self.ring = get_ring(ring)
+        if dtype is None:
+            dtype = self.ring.dtype
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        coefs = self.ring.convert_all(coefs if isinstance(coefs, np.ndarray) else list(coefs))
+        if self.dtype is None:
+            self.coefs = coefs.tolist() if isinstance(coefs, np.ndarray) else coefs
+        else:
+            self.coefs = np.array(coefs, dtype=self.dtype)
+        self.trim()
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[int, Any]], dtype: npt.DTypeLike | None = None,
+                   ring: RingLike = None):
+        """
+        :param items: (power, coefficient) pairs, powers may repeat
+        :param dtype: NumPy dtype, or None for a Python list
+        :param ring: Coefficient ring
+        :return: CoefArray
+        """
+        items = [(int(power), coef) for power, coef in items]
+        if any(power < 0 for power, _ in items):
+            raise ValueError('CoefArray cannot store negative powers')
+        coefs = [0] * (max((power for power, _ in items), default=-1) + 1)
+        for power, coef in items:
+            coefs[power] += coef
+        return cls(coefs, dtype, ring)
+
+    def same(self, coefs: Iterable):
+        """
+        :param coefs: Coefficients, constant term first
+        :return: CoefArray with the same storage and ring as self, reducing the coefficients into the ring
+        """
+        return CoefArray(coefs, self.dtype, self.ring)
+
+    def like(self, coefs: Iterable):
+        """
+        :param coefs: Coefficients, constant term first
+        :return: CoefArray with the same storage as self, for quotients and remainders
+        Integer arrays whose results stopped being integers (e.g. after division) switch to object arrays,
+        and rings that aren't fields move to their field of fractions
+        """
+        if self.ring is not NUMBERS:
+            field = self.ring.field
+            return CoefArray(coefs, self.dtype if field == self.ring else None, field)
+        dtype = self.dtype
+        if dtype is not None and dtype.kind in 'iu' and not isinstance(coefs, np.ndarray):
+            coefs = list(coefs)
+            if not all(isinstance(c, int | np.integer) for c in coefs):
+                dtype = np.dtype(object)
+        return CoefArray(coefs, dtype)
+
+    def coerce(self, other):
+        """
+        :return: other as a CoefArray with the same storage and ring as self
+        """
+        if isinstance(other, CoefArray):
+            if other.dtype == self.dtype and other.ring == self.ring:
+                return other
+            return CoefArray(other.coefs, self.dtype, self.ring)
+        return CoefArray.from_items(other.items(), self.dtype, self.ring)
+
+    def trim(self):
+        """
+        Drops trailing zero coefficients, only looking at as many as there are
+        :return: self
+        """
+        n = len(self.coefs)
+        while n and not self.coefs[n - 1]:
+            n -= 1
+        if n < len(self.coefs):
+            self.coefs = self.coefs[:n]
+        return self
+
+    def tolist(self) -> list:
+        """
+        :return: Coefficients as a list of Python numbers, constant term first
+        """
+        return self.coefs if self.dtype is None else self.coefs.tolist()
+
+    def __len__(self) -> int:
+        return len(self.coefs)
+
+    def __neg__(self):
+        if self.dtype is None:
+            return self.same([-c for c in self.coefs])
+        return self.same(-self.coefs)
+
+    def __eq__(self, other):
+        if isinstance(other, CoefArray):
+            return len(self) == len(other) and all(a == b for a, b in zip(self.tolist(), other.tolist()))
+        if isinstance(other, CoefDict):
+            return dict(self.items()) == {i: v for i, v in other.items() if v}
+        return NotImplemented
+
+    def __bool__(self):
+        return bool(len(self.coefs))
+
+    def __repr__(self):
+        dtype_str = '' if self.dtype is None or self.dtype == self.ring.dtype else f', dtype={self.dtype}'
+        ring_str = '' if self.ring is NUMBERS else f', ring={self.ring}'
+        return f'CoefArray({self.tolist()}{dtype_str}{ring_str})'
+
+    def __add__(self, other):
+        other = self.coerce(other)
+        if self.dtype is None:
+            return self.same([a + b for a, b in zip_longest(self.coefs, other.coefs, fillvalue=0)])
+        if len(self) < len(other):
+            return other + self
+        coefs = self.coefs.copy()
+        coefs[:len(other)] += other.coefs
+        return self.same(coefs)
+
+    def __sub__(self, other):
+        return self + -self.coerce(other)
+
+    def __mul__(self, other):
+        other = self.coerce(other)
+        if not self or not other:
+            return self.same(())
+        if self.ring is not NUMBERS:
+            return self.same(self.ring.multiply(self.tolist(), other.tolist()))
+        if self.dtype is None:
+            return CoefArray(multiply(self.coefs, other.coefs))
+        if self.dtype.kind == 'f':
+            return CoefArray(float_mul(self.coefs, other.coefs), self.dtype)
+        if self.dtype.kind not in 'iu':
+            return CoefArray(multiply(self.tolist(), other.tolist()), self.dtype)
+        info = np.iinfo(self.dtype)
+        n = min(len(self), len(other))
+        if n < FFT_THRESHOLD and n * magnitude(self.coefs) * magnitude(other.coefs) <= info.max:
+            return CoefArray(np.convolve(self.coefs, other.coefs), self.dtype)
+        # Products that overflow the integer dtype move to an object array of Python ints
+        coefs = multiply(self.tolist(), other.tolist())
+        return CoefArray(coefs, self.dtype if info.min <= min(coefs) and max(coefs) <= info.max else object)
+
+    def __divmod__(self, other) -> tuple:
+        """
+        Polynomial division by the ring's kernels (poly_div by default), P(x) = D(x)Q(x) + R(x)
+        Integer coefficients stay exact, becoming Fractions where the leading coefficient doesn't divide
+        :param self: P(x)
+        :param other: D(x)
+        :return: Q(x), R(x)
+        """
+        other = self.coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        quotient, remainder = self.ring.divmod(self.tolist(), other.tolist())
+        return self.like(quotient), self.like(remainder)
+
+    def __floordiv__(self, other):
+        other = self.coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        return self.like(self.ring.floordiv(self.tolist(), other.tolist()))
+
+    def __mod__(self, other):
+        other = self.coerce(other)
+        if not other:
+            raise ZeroDivisionError
+        return self.like(self.ring.mod(self.tolist(), other.tolist()))
+
+    def gcd(self, other):
+        other = self.coerce(other)
+        return self.same(self.ring.gcd(self.tolist(), other.tolist()))
+
+    def xgcd(self, other) -> tuple:
+        other = self.coerce(other)
+        return tuple(self.like(coefs) for coefs in self.ring.xgcd(self.tolist(), other.tolist()))
+
+    def resultant(self, other):
+        return self.ring(self.ring.resultant(self.tolist(), self.coerce(other).tolist()))
+
+    def squarefree(self) -> tuple:
+        constant, factors = self.ring.squarefree(self.tolist())
+        return self.ring(constant), [(self.same(f), k) for f, k in factors]
+
+    def roots(self, digits: int | None = None) -> list:
+        return self.ring.roots(self.tolist(), digits)
+
+    def __getitem__(self, k: int):
+        return self.coefs[k] if 0 <= k < len(self.coefs) else self.ring.zero
+
+    def keys(self):
+        return (i for i, _ in self.items())
+
+    def values(self):
+        return (v for _, v in self.items())
+
+    def items(self):
+        """
+        :return: (power, coefficient) pairs of the nonzero coefficients, like CoefDict
+        """
+        return ((i, v) for i, v in enumerate(self.coefs) if v)
+
+    def degree(self):
+        return len(self.coefs) - 1 if len(self.coefs) else Decimal('Inf')
+
+    def is_constant(self) -> bool:
+        """
+        :return:  Whether the polynomial is a constant one (Zero polynomial is not constant)
+        """
+        return len(self.coefs) == 1
+
+    def evaluate(self, inp_num):
+        """
+        Horner's rule, in O(degree) multiplications
+        :param inp_num: Specified number
+        :return: The polynomial evaluated at inp_num
+        """
+        return self.ring.evaluate(self.tolist(), inp_num)
+
+    def evaluate_many(self, points, modulus: int | None = None) -> list | np.ndarray:
+        """
+        :param points: Sequence of points, or a NumPy array
+        :param modulus: If given, evaluates mod modulus (integer coefficients and points only)
+        :return: The polynomial evaluated at each point, see poly_eval.evaluate_many
+        """
+        return self.ring.evaluate_many(self.tolist(), points, modulus)
+
+
+def magnitude(coefs: np.ndarray) -> int:
+    """
+    :return: Largest absolute value in an integer array, as a Python int
+    """
+    return max(-int(coefs.min()), int(coefs.max()))
 
 
 class Polynomial:
     """
     Class for a single variable polynomial
     Priority for descending ordered polynomials (except for from_iterable)
-    Stored as a dictionary: power -> coefficient, and an integer degree
+    Stored as a CoefDict (power -> coefficient) or, with the dense backend, a CoefArray
+    Coefficients are Decimals by default, or in any poly_ring.Ring: int, Fraction, float, GF(p), gmpy2 mpz and mpq
     """
+    __slots__ = ('variable', 'coef_dict')
 
-    def __init__(self, /, coef_dict: CoefDict, *, variable: str = 'x'):
+    def __init__(self, /, coef_dict: CoefDict | CoefArray, *, variable: str = 'x'):
         """
         Dunder Init
-        :param coef_dict: CoefDict
+        :param coef_dict: CoefDict or CoefArray
         :param variable: The polynomial variable
         """
         self.variable = variable
         self.coef_dict = coef_dict
 
     @classmethod
-    def from_str(cls, /, poly_str: str, *, variable: str = 'x'):
+    def from_str(cls, /, poly_str: str, *, variable: str = 'x', backend: Backend = 'dict',
+                 dtype: npt.DTypeLike | None = None, ring: RingLike = None):
         """
-        Create a polynomial object from a string. Has to be a valid polynomial string for proper usage
+        Create a polynomial object from a string of integer terms, like 3x^4-x^2+7x-2 (spaces around signs allowed)
         :param poly_str: The given string
         :param variable: The polynomial variable
+        :param backend: 'dict' for a CoefDict of Decimals, 'dense' for a CoefArray of ints
+        :param dtype: NumPy dtype for the dense backend, None for a Python list
+        :param ring: Coefficient ring (see poly_ring.get_ring), instead of the backend's default
         :return: The corresponding polynomial object
+        :raises PolynomialParseError: If poly_str isn't a valid polynomial string
+        """
+        return cls(make_coefs(parse_terms(poly_str, variable).items(), backend, dtype, ring), variable=variable)
+
+    @classmethod
+    def from_str_many(cls, /, poly_strs: Iterable[str], *, variable: str = 'x', backend: Backend = 'dict',
+                      dtype: npt.DTypeLike | None = None, ring: RingLike = None,
+                      errors: list[PolynomialParseError] | None = None) -> Iterator['Polynomial | None']:
+        """
+        Streams polynomial strings, such as the lines of a file, into polynomials, tokenizing them in chunks
+        Each polynomial is built from its row of the chunk's coefficients (see poly_parse.term_chunks), the
+        coefficients converted into the ring all at once
+        See poly_parse.coef_matrix for one packed array of their coefficients instead
+        :param poly_strs: Polynomial strings
+        :param variable: The polynomial variable
+        :param backend: 'dict' for a CoefDict of Decimals, 'dense' for a CoefArray of ints
+        :param dtype: NumPy dtype for the dense backend, None for a Python list
+        :param ring: Coefficient ring (see poly_ring.get_ring), instead of the backend's default
+        :param errors: If given, strings that fail to parse yield None and their PolynomialParseError,
+                       with its line number, is appended to errors; otherwise the first one is raised
+        :return: Iterator of polynomials, one per string
         """
-        groups = re.findall(fr'(\A\b|[+-])(\d*)({variable})?(?:\^(\d*))?', poly_str)
-        coef_dict = CoefDict()
-        for sgn, coef, var, power in groups:
-            coefficient = Decimal(coef if coef else 1) * (-1 if sgn == '-' else 1)
-            term_power = int(power) if power else 1 if var else 0
-            coef_dict[term_power] += coefficient
-        return cls(coef_dict, variable=variable)
+        check_backend(backend)
+        ring = get_ring(ring, DECIMALS if backend == 'dict' else NUMBERS)
+        for lines, powers, coefs, failed in term_chunks(poly_strs, variable, errors):
+            bounds = np.searchsorted(lines, np.arange(len(failed) + 1))
+            if backend == 'dense':
+                for row, fail in zip(dense_rows(powers, coefs, bounds), failed.tolist()):
+                    yield None if fail else cls(CoefArray(row, dtype, ring), variable=variable)
+                continue
+            coefs = ring.convert_all(coefs)
+            coefs = coefs.tolist() if isinstance(coefs, np.ndarray) else coefs
+            if not all(coefs):
+                nonzero = np.fromiter(map(bool, coefs), dtype=bool, count=len(coefs))
+                lines, powers, coefs = lines[nonzero], powers[nonzero], list(compress(coefs, nonzero))
+                bounds = np.searchsorted(lines, np.arange(len(failed) + 1))
+            powers, bounds = powers.tolist(), bounds.tolist()
+            for start, end, fail in zip(bounds, bounds[1:], failed.tolist()):
+                yield None if fail else cls(CoefDict.from_terms(powers[start:end], coefs[start:end], ring),
+                                            variable=variable)
 
     @classmethod
-    def from_iterable(cls, /, coef_iter: Sequence[Decimal], *, is_descending: bool = False, variable: str = 'x'):
+    def from_iterable(cls, /, coef_iter: Sequence[Decimal], *, is_descending: bool = False, variable: str = 'x',
+                      backend: Backend = 'dict', dtype: npt.DTypeLike | None = None, ring: RingLike = None):
         """
         Create a polynomial object from an Iterable
         Has to be an Iterable[Decimal | int] of either ascending or descending order
         :param coef_iter: The given iterable
         :param is_descending: Whether the iterable has descending coefficients
         :param variable: The polynomial variable
+        :param backend: 'dict' for a CoefDict of Decimals, 'dense' for a CoefArray of the given coefficients
+        :param dtype: NumPy dtype for the dense backend, None for a Python list
+        :param ring: Coefficient ring (see poly_ring.get_ring), instead of the backend's default
         :return: The corresponding polynomial object
         """
-        coef_dict = CoefDict()
         if is_descending:
-            coef_iter = reversed(coef_iter)
-        for p, v in enumerate(coef_iter):
-            coef_dict[p] += v
-        return cls(coef_dict, variable=variable)
+            coef_iter = coef_iter[::-1]
+        if backend == 'dense':
+            return cls(CoefArray(coef_iter, dtype, ring), variable=variable)
+        return cls(make_coefs(enumerate(coef_iter), backend, dtype, ring), variable=variable)
+
+    @property
+    def ring(self) -> Ring:
+        """
+        :return: The coefficient ring
+        """
+        return self.coef_dict.ring
 
     def __eq__(self, other):
-        return self.variable == other.variable and (
-                {i: v for i, v in self.coef_dict.items() if not v.is_zero()} ==
-                {i: v for i, v in other.coef_dict.items() if not v.is_zero()}
-        )
+        return self.variable == other.variable and self.coef_dict == other.coef_dict
 
     def __bool__(self):
-        return bool(self.degree)
+        return bool(self.coef_dict)
 
-    def __call__(self, inp_num: int | float | Decimal) -> Decimal:
+    def __call__(self, inp_num: int | float | Decimal):
         """
         Evaluates the polynomial at the specified number
         :param inp_num: Specified number
-        :return: Result
+        :return: Result, a Decimal by default, else in the coefficient ring
+        """
+        return self.coef_dict.evaluate(inp_num)
+
+    def evaluate_many(self, points, *, modulus: int | None = None) -> list | np.ndarray:
+        """
+        Evaluates the polynomial at every point, by NumPy for float and complex arrays
+        and through a subproduct tree for many exact points
+        :param points: Sequence of points, or a NumPy array
+        :param modulus: If given, evaluates mod modulus (integer coefficients and points only)
+        :return: Results, an array for NumPy float or complex points, else a list
         """
-        return sum((coef * Decimal(inp_num ** power) for power, coef in self.coef_dict.items()), Decimal(0))
+        return self.coef_dict.evaluate_many(points, modulus)
 
     def __add__(self, other):
         if self.variable != other.variable:
@@ -244,6 +743,49 @@ class Polynomial:
             return NotImplemented
         return Polynomial(self.coef_dict.__mod__(other.coef_dict), variable=self.variable)
 
+    def gcd(self, other) -> 'Polynomial':
+        """
+        Greatest common divisor, by the subresultant PRS for short polynomials and otherwise modulo many primes
+        at once (see poly_gcd), so that the coefficients never blow up like in Euclid's algorithm over Decimals
+        :param other: The other polynomial
+        :return: The gcd, the gcd of the contents times a primitive polynomial with positive leading coefficient
+                 for whole number coefficients, else monic
+        """
+        self.check_variable(other)
+        return Polynomial(self.coef_dict.gcd(other.coef_dict), variable=self.variable)
+
+    def xgcd(self, other) -> tuple['Polynomial', 'Polynomial', 'Polynomial']:
+        """
+        Extended Euclidean algorithm, S(x)P(x) + T(x)D(x) = G(x)
+        :param self: P(x)
+        :param other: D(x)
+        :return: G(x), the monic gcd, and the cofactors S(x), T(x) of lowest degree
+        """
+        self.check_variable(other)
+        return tuple(Polynomial(i, variable=self.variable) for i in self.coef_dict.xgcd(other.coef_dict))
+
+    def resultant(self, other):
+        """
+        Resultant, the determinant of the Sylvester matrix, zero exactly when the polynomials have a common root
+        :param other: The other polynomial
+        :return: res(self, other), in the coefficient ring
+        """
+        self.check_variable(other)
+        return self.coef_dict.resultant(other.coef_dict)
+
+    def squarefree_decomposition(self) -> tuple[Any, list[tuple['Polynomial', int]]]:
+        """
+        Square-free decomposition by Yun's algorithm, P(x) = c F_1(x)^k_1 F_2(x)^k_2 ...
+        with the F_i square-free, pairwise coprime, and normalized like gcd()
+        :return: c, [(F_1(x), k_1), (F_2(x), k_2), ...] by increasing multiplicity
+        """
+        constant, factors = self.coef_dict.squarefree()
+        return constant, [(Polynomial(f, variable=self.variable), k) for f, k in factors]
+
+    def check_variable(self, other):
+        if self.variable != other.variable:
+            raise ValueError(f'Polynomials in {self.variable} and {other.variable} cannot be combined')
+
     def get_list(self, *, descending: bool = True) -> list[Decimal]:
         if descending:
             return [self.coef_dict[i] for i in reversed(range(self.degree() + 1))]
@@ -277,31 +819,87 @@ class Polynomial:
     def is_constant(self) -> bool:
         return self.coef_dict.is_constant()
 
-    def get_roots(self) -> tuple[...]:
-        pass
+    def get_roots(self, *, digits: int | None = None) -> tuple:
+        """
+        Complex roots, by the eigenvalues of the companion matrix or Aberth's iterations (see poly_roots.find_roots)
+        Exact coefficients are split into square-free factors first, so repeated roots are as accurate as simple ones
+        :param digits: If given, the roots are refined to this many significant digits in Decimal arithmetic
+        :return: The roots with multiplicity, sorted by real then imaginary part,
+        as complex numbers, or ComplexDecimals if digits is given
+        """
+        return tuple(self.coef_dict.roots(digits))
+
+
+def make_coefs(items: Iterable[tuple[int, Any]], backend: Backend = 'dict',
+               dtype: npt.DTypeLike | None = None, ring: RingLike = None) -> CoefDict | CoefArray:
+    """
+    :param items: (power, coefficient) pairs, powers may repeat
+    :param backend: 'dict' for a CoefDict, 'dense' for a CoefArray
+    :param dtype: NumPy dtype for the dense backend, None for a Python list
+    :param ring: Coefficient ring, DECIMALS for a CoefDict and none for a CoefArray by default
+    :return: Coefficient storage for a Polynomial
+    """
+    check_backend(backend)
+    if backend == 'dense':
+        return CoefArray.from_items(items, dtype, ring)
+    coefs = {}
+    for power, coef in items:
+        coefs[power] = coefs.get(power, 0) + coef
+    return CoefDict(coefs, ring=ring)
+
+
+def check_backend(backend: Backend):
+    """
+    :raises ValueError: If backend isn't one of BACKENDS
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown polynomial backend {backend!r}, expected one of {", ".join(BACKENDS)}')
+
+
+def dense_rows(powers: np.ndarray, coefs: np.ndarray, bounds: np.ndarray) -> list[np.ndarray]:
+    """
+    :param powers: Powers of the terms of each row, ascending within the row
+    :param coefs: Their coefficients
+    :param bounds: Row i's terms are [bounds[i], bounds[i + 1])
+    :return: Each row's coefficients up to its highest power, constant term first, cut out of one array
+    """
+    counts = np.diff(bounds)
+    sizes = np.where(counts > 0, powers[bounds[1:] - 1] + 1 if len(powers) else 0, 0)
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    flat = np.zeros(offsets[-1], dtype=coefs.dtype)
+    flat[np.repeat(offsets[:-1], counts) + powers] = coefs
+    return np.split(flat, offsets[1:-1])
 
 
-def polyify(inp: str | Sequence | CoefDict, /, **kwargs) -> Polynomial:
+def polyify(inp: str | Sequence | np.ndarray | CoefDict | CoefArray, /, **kwargs) -> Polynomial:
     """
     Converts an input into a polynomial
-    :param inp: A str of the polynomial, an iterable with the coefficients of the polynomial, or the CoefDict
+    :param inp: A str of the polynomial, an iterable or array with the coefficients of the polynomial,
+    or the CoefDict / CoefArray
     :param kwargs:
         - variable: The polynomial variable, defaults to x
         - is_descending: Descending kwarg for Polynomial.from_iterable
+        - backend: 'dict' (default, Decimal coefficients) or 'dense' (CoefArray); arrays default to 'dense'
+        - dtype: NumPy dtype for the dense backend, None for a Python list; arrays default to their own
+          unless a ring is given
+        - ring: Coefficient ring, a poly_ring.Ring such as GF(7) or a name ('int', 'fraction', 'float'...)
     :return: Polynomial object
     """
     match inp:
         case str():
             return Polynomial.from_str(inp, **kwargs)
+        case np.ndarray():
+            dtype = None if 'ring' in kwargs else inp.dtype
+            return Polynomial.from_iterable(inp, **{'backend': 'dense', 'dtype': dtype, **kwargs})
         case inp if isinstance(inp, Sequence):
             return Polynomial.from_iterable(inp, **kwargs)
-        case CoefDict():
+        case CoefDict() | CoefArray():
             return Polynomial(inp, **kwargs)
         case unknown:
             raise InvalidPolynomialTypeError(type(unknown))
 
 
-def coef_display(num: Decimal, *, is_first: bool = False, is_constant: bool = False):
+def coef_display(num, *, is_first: bool = False, is_constant: bool = False):
     """
     Returns '+num' or 'num' or '-num' depending on the polynomial term
     Also removes 1 if needed
@@ -310,9 +908,9 @@ def coef_display(num: Decimal, *, is_first: bool = False, is_constant: bool = Fa
     :param is_constant: Whether the term is the constant term
     :return: The operator string
     """
-    sign = Decimal(1).copy_sign(num)
-    sign = '' if is_first and sign == 1 else ('+' if sign == 1 else '-')
-    mag = num.copy_abs()
+    is_negative = num.is_signed() if isinstance(num, Decimal) else num < 0
+    sign = '-' if is_negative else ('' if is_first else '+')
+    mag = abs(num)
     return f'{sign}{"" if not is_constant and mag == 1 else mag}'
 
 
@@ -322,9 +920,6 @@ def polynomial_main():
 
 if __name__ == '__main__':
     # Todo: more tests
-    # Todo: Implement Horner's rule
-    # Todo: Maybe Karatsuba?
     # Todo: Restructure class to remove CoefDict
     # Todo: Change repr to add spaces
-    # Todo: Use gmpy types
     polynomial_main()
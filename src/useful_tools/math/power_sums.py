@@ -5,9 +5,9 @@ from itertools import chain, repeat, starmap
 from math import isclose, prod
 from operator import itemgetter
 
-import numpy.polynomial.polynomial as npoly
 from attrs import define, field
 
+from src.useful_tools.math.poly_roots import find_roots
 from src.useful_tools.math.polynomial import polyify
 
 SUPERSCRIPT = str.maketrans('0123456789', '⁰¹²³⁴⁵⁶⁷⁸⁹')
@@ -93,7 +93,7 @@ def newton_method(poly: list[int], k: int) -> int:
     return solve(k)
 
 def numpy_method(poly, k):
-    return round(sum(r**k for r in npoly.Polynomial(poly[::-1]).roots()).real)
+    return round((find_roots(poly[::-1]) ** k).sum().real)
 
 
 def multiset_perms(c: Counter, prev=None):
@@ -0,0 +1,150 @@
+import mmap
+import os
+import struct
+from bisect import bisect
+from collections.abc import Iterator
+from typing import Self
+
+import numpy as np
+from bitarray import bitarray
+
+from src.useful_tools.math.primes import is_prime, prime_pi, segmented_sieve
+from src.useful_tools.math.wheels import WHEEL_30
+
+__all__ = ['PrimeTable', 'build_prime_table']
+
+MAGIC = b'UTPRIME1'
+# magic, bound, rank_bytes, bitmap bytes
+HEADER = struct.Struct('<8sQQQ')
+# Bytes of bitmap (one byte per 30 integers) between prime count checkpoints
+RANK_BYTES = 1 << 12
+WHEEL_RESIDUES = WHEEL_30.residues
+
+
+def build_prime_table(bound: int, path: str | os.PathLike, *, rank_bytes: int = RANK_BYTES) -> None:
+    """
+    Sieves up to bound and writes the wheel-30 compressed bitmap (as from sieve_of_eratosthenes(compressed=True))
+    to path, followed by cumulative prime counts every rank_bytes bytes for pi(x) lookups
+    :param bound: Largest number covered by the table
+    :param path: Output file
+    :param rank_bytes: Bytes of bitmap between prime count checkpoints
+    """
+    nbytes = bound // 30 + 1
+    ranks = [0]
+    pending = bitarray(endian='big')
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, bound, rank_bytes, nbytes))
+        for _, segment in segmented_sieve(bound):
+            f.write(segment.tobytes())
+            pending += segment
+            full = len(pending) // (8 * rank_bytes) * 8 * rank_bytes
+            for i in range(0, full, 8 * rank_bytes):
+                ranks.append(ranks[-1] + pending.count(1, i, i + 8 * rank_bytes))
+            del pending[:full]
+        f.write(bytes(-(HEADER.size + nbytes) % 8))
+        f.write(np.array(ranks, dtype='<u8').tobytes())
+
+
+class PrimeTable:
+    """
+    Read-only, memory-mapped view of a file written by build_prime_table
+    Pages are shared between every process that opens the same file, and nothing is computed on open
+    Queries above the table's bound fall back to the functions in primes.py
+    """
+    __slots__ = ('bound', 'rank_bytes', '_file', '_mmap', '_bits', '_ranks')
+
+    def __init__(self, path: str | os.PathLike):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bound, self.rank_bytes, nbytes = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a prime table')
+        self._bits = bitarray(buffer=memoryview(self._mmap)[HEADER.size:HEADER.size + nbytes], endian='big')
+        ranks_offset = HEADER.size + nbytes + -(HEADER.size + nbytes) % 8
+        self._ranks = np.frombuffer(self._mmap, dtype='<u8', offset=ranks_offset,
+                                    count=nbytes // self.rank_bytes + 1)
+
+    @classmethod
+    def build(cls, bound: int, path: str | os.PathLike, **kwargs) -> Self:
+        """
+        build_prime_table(), then open the result
+        """
+        build_prime_table(bound, path, **kwargs)
+        return cls(path)
+
+    def close(self):
+        # Views into the map have to be released before it can close
+        self._bits = self._ranks = None
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, n: int) -> bool:
+        return self.is_prime(n)
+
+    def is_prime(self, n: int) -> bool:
+        """
+        :param n: number
+        :return: bool(n is prime), by a single bit lookup when n <= bound
+        """
+        if n > self.bound:
+            return is_prime(n)
+        if n < 7:
+            return n in (2, 3, 5)
+        j = WHEEL_30.index[n % 30]
+        return j >= 0 and bool(self._bits[8 * (n // 30) + j])
+
+    def pi(self, x: int) -> int:
+        """
+        :param x: number
+        :return: Number of primes <= x, from the nearest checkpoint and one bit count when x <= bound
+        """
+        if x > self.bound:
+            return prime_pi(x)
+        if x < 7:
+            return bisect((2, 3, 5), x)
+        block = x // 30
+        checkpoint = block // self.rank_bytes
+        start = 8 * checkpoint * self.rank_bytes
+        stop = 8 * block + bisect(WHEEL_RESIDUES, x % 30)
+        return 3 + int(self._ranks[checkpoint]) + self._bits.count(1, start, stop)
+
+    def next_prime(self, n: int) -> int:
+        """
+        :param n: number
+        :return: Smallest prime > n
+        """
+        if n < 5:
+            return next(p for p in (2, 3, 5) if p > n)
+        i = self._bits.find(1, self._index(n + 1))
+        if i < 0:
+            p = max(n, self.bound) + 1
+            while not is_prime(p):
+                p += 1
+            return p
+        return 30 * (i >> 3) + WHEEL_RESIDUES[i & 7]
+
+    def primes(self, lo: int, hi: int) -> Iterator[int]:
+        """
+        Generates the primes p with lo <= p < hi, which must be within the table
+        :param lo: Window start
+        :param hi: Window end (exclusive)
+        :return: Primes
+        """
+        if hi - 1 > self.bound:
+            raise ValueError(f'{hi - 1} is above the table bound {self.bound}')
+        yield from (p for p in (2, 3, 5) if lo <= p < hi)
+        for i in self._bits.search(1, self._index(max(lo, 0)), self._index(max(hi, 0))):
+            yield 30 * (i >> 3) + WHEEL_RESIDUES[i & 7]
+
+    def _index(self, n: int) -> int:
+        """
+        :return: Bit index of the first wheel residue >= n (clamped to the bitmap)
+        """
+        return min(8 * (n // 30) + bisect(WHEEL_RESIDUES, n % 30 - 1), len(self._bits))
@@ -1,17 +1,59 @@
 import math
+import os
+import random
 from bisect import bisect
-from collections import Counter, deque
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
-from itertools import accumulate, chain, cycle, product
-from typing import Iterator
+from itertools import cycle
+from typing import Callable, Iterable, Iterator
 
+import numpy as np
+import numpy.typing as npt
 from bitarray import bitarray
 
-from src.useful_tools.utils import round_robin
+from src.useful_tools.caching import configurable_cache
+from src.useful_tools.math.wheels import WHEEL_30, Wheel
 
-__all__ = ['next_prime', 'is_prime', 'check_prime',
-           'prime_factorization', 'factors',
-           'gen_primes_below_n', 'sieve_of_eratosthenes', 'infinisieve']
+__all__ = ['next_prime', 'is_prime', 'check_prime', 'is_prime_batch', 'check_prime_batch',
+           'miller_rabin', 'strong_lucas_prp',
+           'prime_factorization', 'factors', 'trial_division', 'find_factor', 'pollard_brent', 'lenstra_ecm',
+           'prime_pi', 'nth_prime', 'spf_sieve', 'load_spf_table', 'unload_spf_table', 'spf_factorization',
+           'multiplicative_table', 'euler_phi_table', 'mobius_table', 'divisor_count_table', 'divisor_sum_table',
+           'gen_primes_below_n', 'sieve_of_eratosthenes', 'segmented_sieve', 'range_sieve', 'parallel_sieve',
+           'primes_in_range', 'sieve_wheel_segment', 'wheel_values', 'wheel_array', 'infinisieve']
+
+
+# Defaults for the local caches of is_prime and prime_factorization, see CachedFunction.configure
+IS_PRIME_CACHE_SIZE = 1 << 12
+FACTORIZATION_CACHE_SIZE = 1 << 10
+
+SMALL_SIEVE_LIMIT = 1 << 16
+# https://miller-rabin.appspot.com/ (Jim Sinclair)
+MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+# Sorenson and Webster, first 13 primes are deterministic below this bound
+MR_BASES_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MR_PRIMES_BOUND = 3_317_044_064_679_887_385_961_981
+
+TRIAL_DIVISION_BOUND = 1 << 12
+# Vectorized trial division before is_prime_batch's Miller-Rabin, (2, 3, ..., 199)
+BATCH_TRIAL_PRIME_COUNT = 46
+POLLARD_MAX_ITER = 1 << 16
+ECM_STAGE2_D = 105
+# (B1, curves) per expected factor size, from GMP-ECM's recommended table for 15-30 digit factors
+ECM_SCHEDULE = ((2_000, 25), (11_000, 90), (50_000, 300), (250_000, 700), (1_000_000, 1800))
+
+# Segments are sized to stay resident in a typical L2 cache
+SEGMENT_BYTES = 1 << 18
+# Primes above this cross off segments in vectorized passes instead of per-prime slices
+WHEEL_VECTOR_CUTOFF = 1 << 12
+SEGMENTED_SIEVE_THRESHOLD = 1 << 12
+INFINISIEVE_START = 1 << 16
+# Largest window nth_prime sieves through instead of calling prime_pi again
+NTH_PRIME_WINDOW = 1 << 22
+
+# Smallest prime factor table read by prime_factorization, see load_spf_table
+spf_table: np.ndarray | None = None
 
 
 def next_prime(n: int) -> int:
@@ -22,111 +64,782 @@ def next_prime(n: int) -> int:
     return 3 if n == 2 else next(p for p in range(n + 2, n * 2, 2) if is_prime(p))
 
 
-@lru_cache(maxsize=100)
+# Small n are a table lookup, several times faster than a trip through the cache
+@configurable_cache(maxsize=IS_PRIME_CACHE_SIZE, bypass=lambda n: n < SMALL_SIEVE_LIMIT)
 def is_prime(n: int) -> bool:
     """
     Checks if n is prime
+    Tiered: small-prime table lookup, then deterministic Miller-Rabin below 3.3e24, then strong BPSW
     :param n: a number
     :return: bool(n is prime)
     """
-    if n < 2:
+    if n < SMALL_SIEVE_LIMIT:
+        return n > 1 and bool(SMALL_SIEVE[n])
+    if math.gcd(n, SMALL_PRIMORIAL) != 1:
         return False
-    if n in (2, 3):
-        return True
-    # TODO: Bigger wheel
-    # TODO: probabilistic methods/better methods than trial div
-    end = math.isqrt(n) + 1
-    return all(n % p for p in chain((2, 3), round_robin(
-        range(5, end, 6),
-        range(7, end, 6)
-    )))
+    if n < 1 << 64:
+        return miller_rabin(n, MR_BASES_64)
+    if n < MR_PRIMES_BOUND:
+        return miller_rabin(n, MR_BASES_PRIMES)
+    return miller_rabin(n, (2,)) and strong_lucas_prp(n)
 
 
 def check_prime(n: int) -> int:
     """
     is_prime(), but returns an integer that divides the number if it is composite
     :param n: num
-    :return: 0 if n is prime else a divisor of n
+    :return: 0 if n is prime else the smallest prime divisor of n
     """
     if n < 2:
         raise ValueError(f'primality of {n} is undefined')
-    if n in (2, 3):
+    if is_prime(n):
         return 0
-    end = int(math.sqrt(n)) + 1
-    for p in chain(
-            (2, 3),
-            round_robin(range(5, end, 6),
-                        range(7, end, 6))
-    ):
+    for p in TRIAL_PRIMES:
+        if p > TRIAL_DIVISION_BOUND:
+            break
         if not n % p:
             return p
-    return 0
+    return min(prime_factorization(n))
+
+
+def is_prime_batch(arr: npt.ArrayLike) -> np.ndarray:
+    """
+    is_prime() over an array of 64-bit unsigned integers
+    Small values are looked up, the rest are filtered by small primes, then run through vectorized
+    Miller-Rabin (plain uint64 arithmetic below 2^32, Montgomery multiplication above)
+    :param arr: Numbers, convertible to uint64
+    :return: Boolean array, bool(n is prime) elementwise
+    """
+    n = np.asarray(arr, dtype=np.uint64)
+    result = np.zeros(n.shape, dtype=bool)
+    small = n < SMALL_SIEVE_LIMIT
+    result[small] = SMALL_SIEVE_ARRAY[n[small]]
+
+    candidates = np.flatnonzero(~small)
+    values = n.ravel()[candidates]
+    for p in BATCH_TRIAL_PRIMES:
+        keep = values % p != 0
+        candidates, values = candidates[keep], values[keep]
+
+    mid = values < 1 << 32
+    result.ravel()[candidates[mid]] = miller_rabin_batch_32(values[mid])
+    result.ravel()[candidates[~mid]] = miller_rabin_batch_64(values[~mid])
+    return result
+
+
+def check_prime_batch(arr: npt.ArrayLike) -> np.ndarray:
+    """
+    check_prime() over an array of 64-bit unsigned integers
+    :param arr: Numbers >= 2, convertible to uint64
+    :return: uint64 array, 0 where n is prime else the smallest prime divisor of n
+    """
+    n = np.asarray(arr, dtype=np.uint64)
+    if np.any(n < 2):
+        raise ValueError('primality of numbers below 2 is undefined')
+    result = np.zeros(n.shape, dtype=np.uint64)
+    composite = np.flatnonzero(~is_prime_batch(n))
+    values = n.ravel()[composite]
+    for p in BATCH_TRIAL_PRIMES:
+        divides = values % p == 0
+        result.ravel()[composite[divides]] = p
+        composite, values = composite[~divides], values[~divides]
+    # Composites without small factors are rare enough to factor one at a time
+    result.ravel()[composite] = [check_prime(int(v)) for v in values]
+    return result
+
+
+def miller_rabin_batch_32(n: np.ndarray) -> np.ndarray:
+    """
+    Deterministic Miller-Rabin for odd uint64 n < 2^32, with bases 2, 7, 61
+    Products of residues fit in uint64, so plain % reduction is exact
+    :param n: Numbers not divisible by any base
+    :return: Boolean array
+    """
+    one = np.uint64(1)
+    result = np.zeros(n.shape, dtype=bool)
+    alive = np.arange(len(n))
+    d, s = split_power_of_two(n - one)
+    for a in (2, 7, 61):
+        x = np.ones(n.shape, dtype=np.uint64)
+        base = np.uint64(a) % n
+        e = d.copy()
+        while np.any(e):
+            x = np.where(e & one, x * base % n, x)
+            base = base * base % n
+            e >>= one
+        passed = strong_witness_loop(x, s, n - one, one, lambda y, m=n: y * y % m)
+        # Only the survivors of a base, which are mostly primes, go on to the next one
+        alive, n, d, s = alive[passed], n[passed], d[passed], s[passed]
+    result[alive] = True
+    return result
+
+
+def miller_rabin_batch_64(n: np.ndarray) -> np.ndarray:
+    """
+    Deterministic Miller-Rabin for odd uint64 n, with MR_BASES_64 and Montgomery multiplication (R = 2^64)
+    :param n: Numbers > 2^32 with no factors below 200
+    :return: Boolean array
+    """
+    one = np.uint64(1)
+    result = np.zeros(n.shape, dtype=bool)
+    alive = np.arange(len(n))
+    # -n^-1 mod 2^64 by Newton's iteration, each step doubling the correct low bits
+    inv = n.copy()
+    for _ in range(5):
+        inv *= np.uint64(2) - n * inv
+    n_prime = -inv
+    # R mod n, which is 1 in Montgomery form
+    r1 = -n % n
+    d, s = split_power_of_two(n - one)
+    for a in MR_BASES_64:
+        x = r1.copy()
+        top = int(d.max(initial=0)).bit_length()
+        if a == 2:
+            # Left-to-right, where multiplying by 2 is a modular doubling
+            for bit in reversed(range(top)):
+                x = montgomery_mul_batch(x, x, n, n_prime)
+                doubled = np.where(x >= n - x, x - (n - x), x + x)
+                x = np.where((d >> np.uint64(bit)) & one, doubled, x)
+        else:
+            # a * R mod n, by doubling a mod n 64 times
+            base = np.uint64(a) % n
+            for _ in range(64):
+                base = np.where(base >= n - base, base - (n - base), base + base)
+            for bit in reversed(range(top)):
+                x = montgomery_mul_batch(x, x, n, n_prime)
+                x = np.where((d >> np.uint64(bit)) & one, montgomery_mul_batch(x, base, n, n_prime), x)
+        passed = strong_witness_loop(x, s, n - r1, r1,
+                                     lambda y, m=n, m_prime=n_prime: montgomery_mul_batch(y, y, m, m_prime))
+        # Only the survivors of a base, which are mostly primes, go on to the next one
+        alive, n, n_prime, r1, d, s = alive[passed], n[passed], n_prime[passed], r1[passed], d[passed], s[passed]
+    result[alive] = True
+    return result
+
+
+def montgomery_mul_batch(a: np.ndarray, b: np.ndarray, n: np.ndarray, n_prime: np.ndarray) -> np.ndarray:
+    """
+    Montgomery product a * b / 2^64 mod n of uint64 arrays
+    :param n_prime: -n^-1 mod 2^64
+    """
+    hi, lo = mul_hi_64(a, b), a * b
+    # lo + low(m * n) = 0 mod 2^64, carrying exactly when lo != 0
+    m = lo * n_prime
+    t = hi + mul_hi_64(m, n)
+    overflow = t < hi
+    carried = t + (lo != 0).astype(np.uint64)
+    overflow |= carried < t
+    return np.where(overflow | (carried >= n), carried - n, carried)
+
+
+def split_power_of_two(n: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param n: Positive uint64 array
+    :return: (d, s) with n = d * 2^s and d odd, elementwise
+    """
+    low_bit = n & -n
+    # Exact, as low_bit is a power of two
+    s = np.log2(low_bit).astype(np.uint64)
+    return n >> s, s
+
+
+def strong_witness_loop(x: np.ndarray, s: np.ndarray, minus_one: np.ndarray, one: np.ndarray,
+                        square: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Final stage of vectorized Miller-Rabin, given x = a^d
+    :return: Whether x == 1 or x^(2^r) == -1 for some r < s, elementwise
+    """
+    passed = (x == one) | (x == minus_one)
+    for r in range(1, int(s.max(initial=0))):
+        x = square(x)
+        passed |= (x == minus_one) & (np.uint64(r) < s)
+    return passed
+
+
+def mul_hi_64(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    High 64 bits of the 128-bit products of uint64 arrays, from 32-bit limbs
+    """
+    mask, shift = np.uint64(0xFFFFFFFF), np.uint64(32)
+    a0, a1, b0, b1 = a & mask, a >> shift, b & mask, b >> shift
+    mid, cross, hi = a0 * b1, a1 * b0, a1 * b1
+    # Reuses a0 as the low product to save allocations
+    a0 *= b0
+    a0 >>= shift
+    hi += mid >> shift
+    hi += cross >> shift
+    mid &= mask
+    cross &= mask
+    mid += cross
+    mid += a0
+    mid >>= shift
+    hi += mid
+    return hi
+
+
+def miller_rabin(n: int, bases: Iterable[int]) -> bool:
+    """
+    Strong probable prime test of odd n > 2 to each of the given bases
+    Deterministic when bases is MR_BASES_64 (n < 2^64) or MR_BASES_PRIMES (n < MR_PRIMES_BOUND)
+    :param n: odd number
+    :param bases: witnesses
+    :return: False if some base witnesses that n is composite, else True
+    """
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in bases:
+        a %= n
+        if not a:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def jacobi(a: int, n: int) -> int:
+    """
+    Jacobi symbol (a/n)
+    :param a: number
+    :param n: odd positive number
+    :return: -1, 0 or 1
+    """
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def strong_lucas_prp(n: int) -> bool:
+    """
+    Strong Lucas probable prime test with Selfridge's parameters (method A)
+    Combined with miller_rabin(n, (2,)), this is the BPSW test
+    :param n: odd number, not divisible by small primes
+    :return: False if n is definitely composite, else True
+    """
+    if math.isqrt(n) ** 2 == n:
+        return False
+    d = 5
+    while (j := jacobi(d, n)) != -1:
+        if not j:
+            return False
+        d = -d - 2 if d > 0 else -d + 2
+    q = (1 - d) // 4
+
+    k = n + 1
+    s = (k & -k).bit_length() - 1
+    k >>= s
+
+    # U_1, V_1, Q^1 with P = 1
+    u, v, qk = 1, 1, q % n
+    for bit in bin(k)[3:]:
+        u, v, qk = u * v % n, (v * v - 2 * qk) % n, qk * qk % n
+        if bit == '1':
+            u, v = u + v, d * u + v
+            if u & 1:
+                u += n
+            if v & 1:
+                v += n
+            u, v, qk = (u >> 1) % n, (v >> 1) % n, qk * q % n
+
+    if not u or not v:
+        return True
+    for _ in range(s - 1):
+        v, qk = (v * v - 2 * qk) % n, qk * qk % n
+        if not v:
+            return True
+    return False
 
 
+@configurable_cache(maxsize=FACTORIZATION_CACHE_SIZE, copy=Counter)
 def prime_factorization(n: int) -> Counter[int]:
     """
     Determines the prime factorization of n
+    Reads the smallest prime factor table if one is loaded and covers n (see load_spf_table),
+    otherwise trial division by small primes, then Pollard-Brent rho, then Lenstra ECM on what remains
     :param n: number
     :return: Counter[prime, power] (Returns {1: 1} for n=1,
     but this is an implementation detail and should not be relied upon)
     """
+    if n < 1:
+        raise ValueError(f'prime factorization of {n} is undefined')
     if n == 1:
         return Counter({1: 1})
+    if spf_table is not None and n < len(spf_table):
+        return spf_factorization(n, spf_table)
+    factorization = Counter()
+    n = trial_division(n, factorization)
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factorization[m] += 1
+            continue
+        d = find_factor(m)
+        stack += d, m // d
+    return factorization
+
+
+def factors(n: int) -> list[int]:
+    """
+    :param n: number
+    :return: Sorted divisors of n
+    """
+    divisors = [1]
+    if n == 1:
+        return divisors
+    for prime, power in prime_factorization(n).items():
+        divisors += [d * prime ** k for k in range(1, power + 1) for d in divisors]
+    divisors.sort()
+    return divisors
+
+
+def trial_division(n: int, factorization: Counter[int], bound: int = TRIAL_DIVISION_BOUND) -> int:
+    """
+    Divides out all primes below bound from n, recording them in factorization
+    :param n: number
+    :param factorization: Counter[prime, power] to update
+    :param bound: Largest prime to divide by
+    :return: The remaining cofactor, which has no prime factors below bound
+    """
+    for p in TRIAL_PRIMES:
+        if p > bound:
+            break
+        if p * p > n:
+            if n > 1:
+                factorization[n] += 1
+            return 1
+        while not n % p:
+            factorization[p] += 1
+            n //= p
+    return n
+
+
+def find_factor(n: int) -> int:
+    """
+    Finds a nontrivial factor of a composite n with no small prime factors
+    :param n: composite number
+    :return: Some divisor 1 < d < n
+    """
+    for k in TRIAL_PRIMES:
+        if 1 << k > n:
+            break
+        if (r := integer_root(n, k)) ** k == n:
+            return r
+    for c in range(1, 4):
+        if 1 < (d := pollard_brent(n, c)) < n:
+            return d
+    for b1, curves in ECM_SCHEDULE:
+        for _ in range(curves):
+            if d := lenstra_ecm(n, b1):
+                return d
+    # Unreachable in practice; the last schedule entry is extended indefinitely
+    while not (d := lenstra_ecm(n, ECM_SCHEDULE[-1][0])):
+        pass
+    return d
+
+
+def integer_root(n: int, k: int) -> int:
+    """
+    :param n: nonnegative number
+    :param k: root degree
+    :return: floor(n ** (1 / k))
+    """
+    if k == 2:
+        return math.isqrt(n)
+    x = 1 << -(-n.bit_length() // k)
+    while (y := ((k - 1) * x + n // x ** (k - 1)) // k) < x:
+        x = y
+    return x
+
+
+def pollard_brent(n: int, c: int = 1, max_iter: int = POLLARD_MAX_ITER) -> int:
+    """
+    Brent's variant of Pollard's rho on x -> x^2 + c
+    :param n: composite number
+    :param c: Polynomial constant
+    :param max_iter: Iteration budget before giving up
+    :return: A divisor of n, which is n itself on failure
+    """
+    y, r, q, g = 2, 1, 1, 1
+    m = 128
+    x = ys = y
+    while g == 1:
+        x = y
+        for _ in range(r):
+            y = (y * y + c) % n
+        k = 0
+        while k < r and g == 1:
+            ys = y
+            for _ in range(min(m, r - k)):
+                y = (y * y + c) % n
+                q = q * (x - y) % n
+            g = math.gcd(q, n)
+            k += m
+        r <<= 1
+        if r > max_iter:
+            return n
+    if g == n:
+        # Backtrack over the last batch one step at a time
+        while (g := math.gcd(x - (ys := (ys * ys + c) % n), n)) == 1:
+            pass
+    return g
+
+
+def lenstra_ecm(n: int, b1: int, sigma: int | None = None) -> int:
+    """
+    One curve of Lenstra's elliptic curve method, with Montgomery curves and Suyama's parametrization
+    Stage 1 multiplies by every prime power below b1, stage 2 looks for a single prime in (b1, 100 * b1)
+    :param n: composite number
+    :param b1: Stage 1 bound
+    :param sigma: Curve parameter, random if not given
+    :return: A nontrivial divisor of n, or 0 if the curve failed
+    """
+    if sigma is None:
+        sigma = random.randrange(6, n - 1)
+    u = (sigma * sigma - 5) % n
+    v = 4 * sigma % n
+    x, z = pow(u, 3, n), pow(v, 3, n)
+    a24_den = 16 * x * v % n
+    try:
+        a24 = pow(v - u, 3, n) * (3 * u + v) * pow(a24_den, -1, n) % n
+    except ValueError:
+        g = math.gcd(a24_den, n)
+        return g if g < n else 0
+
+    # Stage 1
+    for p in ecm_primes(b1).search(1):
+        pk = p
+        while pk * p <= b1:
+            pk *= p
+        x, z = montgomery_ladder(pk, x, z, a24, n)
+    g = math.gcd(z, n)
+    if g != 1:
+        return g if g < n else 0
+
+    # Stage 2, with S[d] = 2d * Q
+    b2 = 100 * b1
+    step = 2 * ECM_STAGE2_D
+    s = [(0, 0)] * (ECM_STAGE2_D + 1)
+    s[1] = xdbl(x, z, a24, n)
+    s[2] = xdbl(*s[1], a24, n)
+    for d in range(3, ECM_STAGE2_D + 1):
+        s[d] = xadd(*s[d - 1], *s[1], *s[d - 2], n)
+    beta = [sx * sz % n for sx, sz in s]
+
+    r = b1 - 1 | 1
+    tx, tz = montgomery_ladder(r - step, x, z, a24, n)
+    rx, rz = montgomery_ladder(r, x, z, a24, n)
+    primes = ecm_primes(b2)
+    g = 1
+    for q in primes.search(1, b1 + 1, b2):
+        while q > r + step:
+            (rx, rz), (tx, tz) = xadd(rx, rz, *s[ECM_STAGE2_D], tx, tz, n), (rx, rz)
+            r += step
+        sx, sz = s[(q - r) >> 1]
+        g = g * ((rx - sx) * (rz + sz) - rx * rz + beta[(q - r) >> 1]) % n
+    g = math.gcd(g, n)
+    return g if 1 < g < n else 0
+
+
+def montgomery_ladder(k: int, x: int, z: int, a24: int, n: int) -> tuple[int, int]:
+    """
+    Scalar multiplication k * (x : z) on a Montgomery curve, x-only
+    :return: (X : Z) of the product
+    """
+    if k == 1:
+        return x, z
+    x0, z0 = x, z
+    x1, z1 = xdbl(x, z, a24, n)
+    for bit in bin(k)[3:]:
+        if bit == '1':
+            x0, z0 = xadd(x1, z1, x0, z0, x, z, n)
+            x1, z1 = xdbl(x1, z1, a24, n)
+        else:
+            x1, z1 = xadd(x1, z1, x0, z0, x, z, n)
+            x0, z0 = xdbl(x0, z0, a24, n)
+    return x0, z0
+
+
+def xdbl(x: int, z: int, a24: int, n: int) -> tuple[int, int]:
+    """
+    Point doubling on a Montgomery curve, with a24 = (A + 2) / 4
+    """
+    t1 = (x + z) ** 2
+    t2 = (x - z) ** 2
+    t3 = t1 - t2
+    return t1 * t2 % n, t3 * (t2 + a24 * t3) % n
+
+
+def xadd(xp: int, zp: int, xq: int, zq: int, xd: int, zd: int, n: int) -> tuple[int, int]:
+    """
+    Differential addition P + Q on a Montgomery curve, given (xd : zd) = P - Q
+    """
+    u = (xp - zp) * (xq + zq)
+    v = (xp + zp) * (xq - zq)
+    return zd * (u + v) ** 2 % n, xd * (u - v) ** 2 % n
+
+
+@lru_cache(maxsize=4)
+def ecm_primes(bound: int) -> bitarray:
+    """
+    Cached sieve for ECM's prime loops
+    """
+    return sieve_of_eratosthenes(bound)
+
+
+def prime_pi(x: int) -> int:
+    """
+    Prime counting function, with Lucy_Hedgehog's O(x^(3/4)) algorithm vectorized over NumPy
+    :param x: number
+    :return: Number of primes <= x
+    """
+    if x < SMALL_SIEVE_LIMIT:
+        return bisect(TRIAL_PRIMES, x)
+    r = math.isqrt(x)
+    # small[v] = S(v) for v <= r, large[i] = S(x // i) for 1 <= i <= r,
+    # where S(v) counts numbers in [2, v] with no prime factor below the current p
+    small = np.arange(-1, r, dtype=np.int64)
+    large = x // np.arange(1, r + 1, dtype=np.int64) - 1
+    large = np.concatenate(([0], large))
+    for c, p in enumerate(gen_primes_below_n(r)):
+        # c = pi(p - 1); sieving by p removes S(v // p) - c from S(v) for v >= p^2
+        p2 = p * p
+        if p2 > x:
+            break
+        end = min(r, x // p2)
+        mid = min(end, r // p)
+        large[1:mid + 1] -= large[p:mid * p + 1:p] - c
+        if end > mid:
+            large[mid + 1:end + 1] -= small[x // (np.arange(mid + 1, end + 1, dtype=np.int64) * p)] - c
+        if p2 <= r:
+            small[p2:] -= small[np.arange(p2, r + 1, dtype=np.int64) // p] - c
+    return int(large[1])
+
+
+def nth_prime(n: int) -> int:
+    """
+    :param n: index, 1-indexed
+    :return: nth prime
+    """
+    if n < 1:
+        raise ValueError(f'{n}th prime is undefined')
+    if n <= len(TRIAL_PRIMES):
+        return TRIAL_PRIMES[n - 1]
+    # Cipolla's asymptotic estimate, then Newton steps on prime_pi until the remaining gap is cheap to sieve
+    log_n = math.log(n)
+    log_log_n = math.log(log_n)
+    x = int(n * (log_n + log_log_n - 1 + (log_log_n - 2) / log_n))
+    while abs(n - (count := prime_pi(x))) * math.log(x) > NTH_PRIME_WINDOW:
+        x += int((n - count) * math.log(x))
+
+    window = NTH_PRIME_WINDOW
+    if count < n:
+        # Walk forward from x
+        while True:
+            primes = [*primes_in_range(x + 1, x + 1 + window)]
+            if count + len(primes) >= n:
+                return primes[n - count - 1]
+            count += len(primes)
+            x += window
+    # Walk backward from x, count is the index of the largest prime <= x
+    while True:
+        primes = [*primes_in_range(x + 1 - window, x + 1)]
+        if count - len(primes) < n:
+            return primes[n - count - 1]
+        count -= len(primes)
+        x -= window
+
+
+def spf_sieve(n: int) -> np.ndarray:
+    """
+    Smallest prime factor sieve, crossing off multiples of each prime up to sqrt(n) with NumPy slices
+    :param n: Sieve size, below 2^32
+    :return: uint32 array with spf[k] = smallest prime factor of k (spf[0] = 0, spf[1] = 1)
+    """
+    spf = np.zeros(n + 1, dtype=np.uint32)
+    for p in gen_primes_below_n(math.isqrt(n)):
+        multiples = spf[p * p::p]
+        multiples[multiples == 0] = p
+    unmarked = np.flatnonzero(spf == 0)
+    spf[unmarked] = unmarked
+    return spf
+
+
+def load_spf_table(n: int) -> np.ndarray:
+    """
+    Sieves and loads the smallest prime factor table that prime_factorization() and factors() read for k <= n
+    :param n: Table size, below 2^32
+    :return: The table
+    """
+    global spf_table
+    spf_table = spf_sieve(n)
+    return spf_table
+
+
+def unload_spf_table():
+    global spf_table
+    spf_table = None
+
+
+def spf_factorization(n: int, spf: np.ndarray) -> Counter[int]:
+    """
+    Factorization by repeatedly dividing out the smallest prime factor, in O(log n) steps
+    :param n: number, 1 < n < len(spf)
+    :param spf: Table from spf_sieve()
+    :return: Counter[prime, power]
+    """
     factorization = Counter()
-    while p := check_prime(n):
-        # TODO: Make it a progressive alg so it avoids re-looping
-        # Probably will require getting rid of check_prime
-        # TODO: Use faster methods
+    while n > 1:
+        p = int(spf[n])
         factorization[p] += 1
         n //= p
-    factorization[n] += 1
     return factorization
 
 
-def factors(n: int) -> list[int]:
-    prime_powers = (tuple(prime ** i for i in range(power + 1))
-                    for prime, power in prime_factorization(n).items())
-    prime_products = product(*prime_powers)
-    return sorted(math.prod(i) for i in prime_products)
+def multiplicative_table(n: int, prime_power_value: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray],
+                         spf: np.ndarray | None = None, dtype: npt.DTypeLike = np.int64) -> np.ndarray:
+    """
+    Values f(0..n) of a multiplicative function f, all computed at once from a smallest prime factor table
+    Each k splits into p^e * rest, with p = spf[k] not dividing rest, so f(k) = f(p^e) * f(rest),
+    where the split of k follows from that of k // p, filled in vectorized over [2^j, 2^(j+1)) blocks
+    :param n: Table size
+    :param prime_power_value: Vectorized (p, p^e, e) -> f(p^e)
+    :param spf: Table from spf_sieve() covering n, sieved if not given
+    :param dtype: Result dtype
+    :return: Array of f(k), with f(0) = 0
+    """
+    if spf is None:
+        spf = spf_sieve(n)
+    p = spf[:n + 1].astype(np.int64)
+    p[:2] = 1
+    quotient = np.arange(n + 1, dtype=np.int64) // p
+    rest, power, exponent = quotient.copy(), p.copy(), np.ones(n + 1, dtype=np.int64)
+    # k // p <= k / 2, so every k in [lo, 2 * lo) only looks back at blocks that are already done
+    for block in octave_slices(n):
+        q = quotient[block]
+        same = p[q] == p[block]
+        rest[block] = np.where(same, rest[q], q)
+        power[block] = np.where(same, power[q] * p[block], p[block])
+        exponent[block] = np.where(same, exponent[q] + 1, 1)
 
+    prime_part = prime_power_value(p, power, exponent).astype(dtype)
+    values = np.zeros(n + 1, dtype=dtype)
+    values[1:2] = 1
+    for block in octave_slices(n):
+        values[block] = prime_part[block] * values[rest[block]]
+    return values
 
-def gen_primes_below_n(n: int) -> Iterator[int]:
+
+def octave_slices(n: int) -> Iterator[slice]:
+    """
+    :return: slice(2, 4), slice(4, 8), ... covering [2, n]
+    """
+    lo = 2
+    while lo <= n:
+        yield slice(lo, min(2 * lo, n + 1))
+        lo *= 2
+
+
+def euler_phi_table(n: int, spf: np.ndarray | None = None) -> np.ndarray:
+    """
+    :return: phi(0..n), with phi(0) = 0
+    """
+    return multiplicative_table(n, lambda p, pk, e: pk - pk // p, spf)
+
+
+def mobius_table(n: int, spf: np.ndarray | None = None) -> np.ndarray:
+    """
+    :return: mu(0..n), with mu(0) = 0
+    """
+    return multiplicative_table(n, lambda p, pk, e: np.where(e == 1, -1, 0), spf, np.int8)
+
+
+def divisor_count_table(n: int, spf: np.ndarray | None = None) -> np.ndarray:
+    """
+    :return: d(0..n), with d(0) = 0
+    """
+    return multiplicative_table(n, lambda p, pk, e: e + 1, spf)
+
+
+def divisor_sum_table(n: int, spf: np.ndarray | None = None) -> np.ndarray:
+    """
+    :return: sigma(0..n), with sigma(0) = 0
+    """
+    return multiplicative_table(n, lambda p, pk, e: (pk * p - 1) // np.maximum(p - 1, 1), spf)
+
+
+def gen_primes_below_n(n: int, *, segmented: bool | None = None, chunked: bool = False,
+                       wheel: Wheel = WHEEL_30) -> Iterator[int] | Iterator[np.ndarray]:
     """
     Generates primes less than or equal to n
-    Uses sieve of eratosthenes with (2, 3, 5) wheel
+    Uses sieve of eratosthenes with a wheel
     :param n: Max limit
-    :return: Primes
+    :param segmented: Whether to stream primes out of segmented_sieve, using O(sqrt(n)) memory
+    Defaults to True for n >= SEGMENTED_SIEVE_THRESHOLD
+    :param chunked: Whether to yield an int64 array of primes per segment instead of one int at a time
+    Always segmented, and avoids creating a Python int per prime
+    :param wheel: Wheel to skip multiples of small primes with
+    :return: Primes, or ascending chunks of primes
     """
+    if chunked:
+        if small := [p for p in wheel.primes if p <= n]:
+            yield np.array(small, dtype=np.int64)
+        for block, segment in segmented_sieve(n, wheel=wheel):
+            yield wheel_array(segment, block, wheel)
+        return
     if n < 31:
         smol_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
         yield from smol_primes[:bisect(smol_primes, n)]
         return
+    if segmented is None:
+        segmented = n >= SEGMENTED_SIEVE_THRESHOLD
+    yield from wheel.primes
+    if segmented:
+        for block, segment in segmented_sieve(n, wheel=wheel):
+            yield from wheel_values(segment, block, wheel)
+        return
 
     sieve = bitarray(n + 1)
     sieve.setall(1)
-
-    sieve[4::2] = 0
-    sieve[6::3] = 0
-    sieve[10::5] = 0
-    yield from (2, 3, 5)
+    for q in wheel.primes:
+        sieve[q * q::q] = 0
 
     end = math.isqrt(n)
-    diffs = cycle((4, 2, 4, 2, 4, 6, 2, 6))
-    p = 7
-    while p <= end:
+    for p in wheel_candidates(wheel, end):
         if sieve[p]:
             yield p
             sieve[p * p::p] = False
-        p += next(diffs)
-    yield from (i for i, v in enumerate(sieve[end + 1:], end + 1) if v)
+    yield from sieve.search(1, max(end, wheel.primes[-1]) + 1)
 
 
-def sieve_of_eratosthenes(n: int) -> bitarray:
+def sieve_of_eratosthenes(n: int, *, compressed: bool = False, wheel: Wheel = WHEEL_30) -> bitarray:
     """
     Sieve of eratosthenes
     :param n: Sieve size
+    :param compressed: Whether to return the wheel compressed sieve instead (see segmented_sieve)
+    :param wheel: Wheel to skip multiples of small primes with
     :return: Sieve
     """
+    if compressed:
+        sieve = bitarray()
+        for _, segment in segmented_sieve(n, wheel=wheel):
+            sieve += segment
+        return sieve
     if n < 31:
         return bitarray('0011010100010100010100010000010')[:n+1]
 
@@ -134,71 +847,229 @@ def sieve_of_eratosthenes(n: int) -> bitarray:
     sieve.setall(1)
 
     sieve[:2] = 0
-    sieve[4::2] = 0
-    sieve[6::3] = 0
-    sieve[10::5] = 0
+    for q in wheel.primes:
+        sieve[q * q::q] = 0
 
-    end = math.isqrt(n)
-    diffs = cycle((4, 2, 4, 2, 4, 6, 2, 6))
-    p = 7
-    while p <= end:
+    for p in wheel_candidates(wheel, math.isqrt(n)):
         if sieve[p]:
             sieve[p * p::p] = False
+    return sieve
+
+
+def wheel_candidates(wheel: Wheel, n: int) -> Iterator[int]:
+    """
+    Generates the numbers coprime to the wheel's modulus from its first prime after wheel.primes, up to n
+    :param wheel: Wheel
+    :param n: Max limit
+    :return: Candidates
+    """
+    p = wheel.residues[1]
+    diffs = cycle(wheel.gaps[1:] + wheel.gaps[:1])
+    while p <= n:
+        yield p
         p += next(diffs)
+
+
+def segmented_sieve(n: int, *, segment_bytes: int = SEGMENT_BYTES,
+                    wheel: Wheel = WHEEL_30) -> Iterator[tuple[int, bitarray]]:
+    """
+    Segmented sieve of eratosthenes over the residues of a wheel
+    Bit wheel.size * i + j of a segment starting at block k is set iff wheel.modulus * (k + i) + wheel.residues[j]
+    is prime (wheel.primes are not represented, and bits for numbers above n are cleared)
+    :param n: Sieve size
+    :param segment_bytes: Size of each segment, in bytes (wheel.block_bytes per block, one for the default wheel)
+    :param wheel: Wheel to compress by
+    :return: (starting block, segment)
+    """
+    return range_sieve(0, n + 1, segment_bytes=segment_bytes, wheel=wheel)
+
+
+def range_sieve(lo: int, hi: int, *, segment_bytes: int = SEGMENT_BYTES,
+                wheel: Wheel = WHEEL_30) -> Iterator[tuple[int, bitarray]]:
+    """
+    segmented_sieve() restricted to the window [lo, hi), only crossing off with primes up to sqrt(hi)
+    Bits for numbers outside the window are cleared
+    :param lo: Window start, clamped to 0
+    :param hi: Window end (exclusive)
+    :param segment_bytes: Size of each segment, in bytes (wheel.block_bytes per block, one for the default wheel)
+    Raised to the number of base primes if smaller, since each segment costs a pass over all of them
+    :param wheel: Wheel to compress by
+    :return: (starting block, segment)
+    """
+    lo = max(lo, 0)
+    if hi <= lo:
+        return
+    size, modulus = wheel.size, wheel.modulus
+    first, end = lo // modulus, (hi - 1) // modulus + 1
+    primes = base_primes(math.isqrt(hi - 1), wheel)
+    blocks = max(segment_bytes, len(primes)) // wheel.block_bytes or 1
+    for block in range(first, end, blocks):
+        segment = sieve_wheel_segment(block, min(block + blocks, end), primes, wheel)
+        if block == first:
+            segment[:bisect(wheel.residues, lo % modulus - 1)] = 0
+        if block + blocks >= end:
+            segment[len(segment) - size + bisect(wheel.residues, (hi - 1) % modulus):] = 0
+        yield block, segment
+
+
+def parallel_sieve(n: int, *, workers: int | None = None) -> bitarray:
+    """
+    sieve_of_eratosthenes(n, compressed=True), with the range split into chunks that are sieved across processes
+    :param n: Sieve size
+    :param workers: Number of processes, defaults to os.cpu_count()
+    :return: Wheel-30 compressed sieve
+    """
+    workers = workers or os.cpu_count() or 1
+    end = n // 30 + 1
+    # A few chunks per worker to even out the load, each at least a segment long
+    chunk = max(SEGMENT_BYTES, -(-end // (4 * workers)))
+    if workers == 1 or chunk >= end:
+        return sieve_of_eratosthenes(n, compressed=True)
+    los = range(0, 30 * end, 30 * chunk)
+    his = [*los[1:], n + 1]
+    sieve = bitarray()
+    with ProcessPoolExecutor(workers) as executor:
+        for window in executor.map(sieve_window, los, his):
+            sieve += window
     return sieve
 
 
+def sieve_window(lo: int, hi: int) -> bitarray:
+    """
+    Concatenated range_sieve(lo, hi), for lo divisible by 30
+    :param lo: Window start
+    :param hi: Window end (exclusive)
+    :return: Wheel-30 compressed sieve of the window
+    """
+    window = bitarray()
+    for _, segment in range_sieve(lo, hi):
+        window += segment
+    return window
+
+
+def primes_in_range(lo: int, hi: int, *, wheel: Wheel = WHEEL_30) -> Iterator[int]:
+    """
+    Generates the primes p with lo <= p < hi, without sieving from zero
+    :param lo: Window start, clamped to 0
+    :param hi: Window end (exclusive)
+    :param wheel: Wheel to compress by
+    :return: Primes
+    """
+    lo = max(lo, 0)
+    yield from (p for p in wheel.primes if lo <= p < hi)
+    for block, segment in range_sieve(lo, hi, wheel=wheel):
+        yield from wheel_values(segment, block, wheel)
+
+
+def base_primes(n: int, wheel: Wheel = WHEEL_30) -> np.ndarray:
+    """
+    :param n: Max limit
+    :param wheel: Wheel whose primes are left out
+    :return: Primes wheel.primes[-1] < p <= n, as an int64 array
+    """
+    if n < SMALL_SIEVE_LIMIT:
+        return np.array(TRIAL_PRIMES[len(wheel.primes):bisect(TRIAL_PRIMES, n)], dtype=np.int64)
+    return np.concatenate([wheel_array(segment, block, wheel) for block, segment in segmented_sieve(n, wheel=wheel)])
+
+
+def sieve_wheel_segment(lo: int, hi: int, primes: np.ndarray, wheel: Wheel = WHEEL_30) -> bitarray:
+    """
+    Sieves the wheel blocks [lo, hi), that is the numbers [modulus * lo, modulus * hi) coprime to the modulus
+    Primes below WHEEL_VECTOR_CUTOFF cross off with strided slices, larger ones with vectorized NumPy passes
+    :param lo: First block
+    :param hi: Last block (exclusive)
+    :param primes: Ascending primes after wheel.primes, up to at least sqrt(modulus * hi), as returned by base_primes()
+    :param wheel: Wheel to compress by
+    :return: Wheel compressed segment
+    """
+    size, modulus = wheel.size, wheel.modulus
+    segment = bitarray(size * (hi - lo), endian='big')
+    segment.setall(1)
+    start, stop = modulus * lo, modulus * hi
+    primes = primes[:np.searchsorted(primes, math.isqrt(stop - 1), side='right')]
+    split = np.searchsorted(primes, WHEEL_VECTOR_CUTOFF) if stop < 1 << 62 else len(primes)
+
+    multiplier_rows = wheel.multipliers.tolist()
+    for p in primes[:split].tolist():
+        # Smallest multiplier that lands in the segment, without crossing off p itself
+        m0 = max(p, -(-start // p))
+        for j, m in enumerate(multiplier_rows[wheel.index[p % modulus]]):
+            # p * m is the first multiple of p in the segment congruent to wheel.residues[j]
+            # Each further one is modulus * p higher, i.e. p blocks later
+            segment[size * (p * (m0 + (m - m0) % modulus) // modulus - lo) + j::size * p] = 0
+
+    if split < len(primes):
+        # wheel.block_bytes bytes per block, with residue j at bit 0x80 >> j % 8 of its (j // 8)th byte
+        buffer = np.frombuffer(segment, dtype=np.uint8)
+        large = primes[split:]
+        m0 = np.maximum(large, -(-start // large))
+        rows = np.array(wheel.index)[large % modulus]
+        for j in range(size):
+            p = large
+            blocks = p * (m0 + (wheel.multipliers[rows, j] - m0) % modulus) // modulus - lo
+            mask = ~np.uint8(0x80 >> (j & 7))
+            while len(blocks):
+                hits = blocks < hi - lo
+                blocks, p = blocks[hits], p[hits]
+                buffer[wheel.block_bytes * blocks + (j >> 3)] &= mask
+                blocks = blocks + p
+        del buffer
+
+    if not lo:
+        segment[0] = 0
+    return segment
+
+
+def wheel_values(segment: bitarray, block: int = 0, wheel: Wheel = WHEEL_30) -> Iterator[int]:
+    """
+    Generates the numbers whose bits are set in a wheel compressed segment
+    :param segment: Wheel compressed segment
+    :param block: The segment's starting block
+    :param wheel: Wheel the segment is compressed by
+    :return: Numbers
+    """
+    offset, size, modulus, residues = wheel.modulus * block, wheel.size, wheel.modulus, wheel.residues
+    if size == 8:
+        return (offset + modulus * (i >> 3) + residues[i & 7] for i in segment.search(1))
+    return (offset + modulus * (i // size) + residues[i % size] for i in segment.search(1))
+
+
+def wheel_array(segment: bitarray, block: int = 0, wheel: Wheel = WHEEL_30) -> np.ndarray:
+    """
+    wheel_values(), as an int64 array
+    :param segment: Wheel compressed segment
+    :param block: The segment's starting block
+    :param wheel: Wheel the segment is compressed by
+    :return: Numbers
+    """
+    # flatnonzero is several times faster on bools than on the uint8 that unpackbits returns
+    bits = np.flatnonzero(np.unpackbits(np.frombuffer(segment, dtype=np.uint8), count=len(segment)).view(bool))
+    if wheel.size == 8:
+        blocks, residues = bits >> 3, bits & 7
+    else:
+        blocks, residues = np.divmod(bits, wheel.size)
+    return wheel.modulus * (block + blocks) + wheel.residue_array.take(residues)
+
+
+# Tables for is_prime's and prime_factorization's fast paths
+SMALL_SIEVE = sieve_of_eratosthenes(SMALL_SIEVE_LIMIT - 1)
+SMALL_PRIMORIAL = math.prod(SMALL_SIEVE.search(1, 0, 100))
+TRIAL_PRIMES = tuple(SMALL_SIEVE.search(1))
+SMALL_SIEVE_ARRAY = np.unpackbits(np.frombuffer(SMALL_SIEVE.tobytes(), dtype=np.uint8),
+                                  count=SMALL_SIEVE_LIMIT).astype(bool)
+BATCH_TRIAL_PRIMES = tuple(np.uint64(p) for p in TRIAL_PRIMES[:BATCH_TRIAL_PRIME_COUNT])
+
+
 def infinisieve() -> Iterator[int]:
     """
-    Uses an incremental sieve that postpones adding numbers to the net until the sieve exceeds the number's square
-    Modified from https://stackoverflow.com/questions/2211990
-    """
-    # All primes below 49, which is 7**2 as 7 is the first prime after the wheel
-    yield from (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
-
-    # net of {numbers: (step_idx, step_mul)}
-    # keeps an incremental sieve for infinite sieving
-    nets = {}
-    sieve = infinisieve()
-
-    # 2 3 5 wheel sieve
-    wheel = [4, 2, 4, 2, 4, 6, 2, 6]
-    # Setup cumulative wheel for later step adjustments
-    step_idx_dict = {v % 30: i for i, v in enumerate(accumulate(wheel[:-1], initial=7))}
-    wheel = deque(wheel)
-
-    # p should start at 7
-    [next(sieve) for _ in range(3)]
-    p = next(sieve)
-    q = p * p
-
-    for i in accumulate(chain([49], cycle((4, 6, 2, 6, 4, 2, 4, 2)))):
-        if i in nets:  # If number has been marked -> composite
-            step_idx, step_mul = nets.pop(i)  # Prepare step for incrementing net
-        elif i < q:  # Number less than p*p which is unmarked -> prime
-            yield i
-            continue
-        else:  # i=p*p since p coprime to 30 => p*p coprime to 30
-            # Prepare step for incrementing net since
-            # p*p is now another composite to mark off
-            step_idx = step_idx_dict[p % 30]
-            step_mul = p
-            p = next(sieve)
-            q = p * p
-        wheel_shift = step_idx
-        wheel.rotate(-wheel_shift)
-        # This works as in (Z/nZ)*, f(n)=p*n is a bijection
-        # Hence, if p*p+n*p = p(n+p) is in (Z/nZ)*, then
-        # n+p must also be in (Z/nZ)*, and so we can roll the
-        # wheel with p's residue, starting from p*p and multiplying
-        # by p to ensure we hit only relevant composites
-        for m in cycle(wheel):
-            i += step_mul * m
-            step_idx = (step_idx + 1) % 8
-            if i not in nets:
-                break
-        wheel.rotate(wheel_shift)
-        nets[i] = step_idx, step_mul
+    Generates primes indefinitely, by sieving consecutive windows with primes_in_range
+    Each window is twice as long as the last, so base primes are recomputed only O(log n) times,
+    while memory stays bounded by the segment size
+    """
+    lo, hi = 0, INFINISIEVE_START
+    while True:
+        yield from primes_in_range(lo, hi)
+        lo, hi = hi, 2 * hi
 
 
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+import math
+from functools import cache
+
+import numpy as np
+from attrs import define, field
+
+__all__ = ['Wheel', 'make_wheel', 'WHEEL_30']
+
+WHEEL_PRIMES = (2, 3, 5, 7, 11, 13)
+
+
+@define(frozen=True, eq=False)
+class Wheel:
+    """
+    Residue tables for the wheel modulo a primorial, for sieves that skip multiples of its primes
+    Compressed sieves over a wheel store one block of len(residues) bits per modulus integers,
+    where bit j of block k stands for modulus * k + residues[j]
+    """
+    primes: tuple[int, ...]
+    modulus: int
+    # Residues in [1, modulus) coprime to modulus, ascending
+    residues: tuple[int, ...]
+    # gaps[j] = residues[j + 1] - residues[j], wrapping around to modulus + 1
+    gaps: tuple[int, ...]
+    # index[r] = j if r = residues[j], else -1
+    index: tuple[int, ...]
+    residue_array: np.ndarray = field(repr=False)
+    # multipliers[i, j] * residues[i] = residues[j] (mod modulus)
+    multipliers: np.ndarray = field(repr=False)
+
+    @property
+    def size(self) -> int:
+        return len(self.residues)
+
+    @property
+    def block_bytes(self) -> int:
+        return self.size // 8
+
+
+@cache
+def make_wheel(k: int) -> Wheel:
+    """
+    :param k: Number of primes in the wheel, from 3 (mod 30) to 6 (mod 30030)
+    :return: Wheel modulo the product of the first k primes
+    """
+    if not 3 <= k <= len(WHEEL_PRIMES):
+        raise ValueError(f'Wheels are built from 3 to {len(WHEEL_PRIMES)} primes, got {k}')
+    primes = WHEEL_PRIMES[:k]
+    modulus = math.prod(primes)
+    residues = tuple(r for r in range(1, modulus) if math.gcd(r, modulus) == 1)
+    gaps = tuple(b - a for a, b in zip(residues, residues[1:] + (modulus + 1,)))
+    index = [-1] * modulus
+    for j, r in enumerate(residues):
+        index[r] = j
+    residue_array = np.array(residues, dtype=np.int64)
+    inverses = np.array([pow(r, -1, modulus) for r in residues], dtype=np.int64)
+    multipliers = np.outer(inverses, residue_array) % modulus
+    return Wheel(primes, modulus, residues, gaps, tuple(index), residue_array, multipliers)
+
+
+# The default of every sieve: larger wheels cross off fewer bits, but pay per residue in both the slice and the
+# vectorized passes, and came out slower at every size bench_wheels in benchmarks/bench_primes.py measured
+# (1e5 to 1e8, from 0 and from 1e12)
+WHEEL_30 = make_wheel(3)
@@ -0,0 +1,91 @@
+from fractions import Fraction
+
+import pytest
+
+from src.useful_tools.math.number_theory import *
+
+
+# OEIS A000041
+PARTITIONS = [1, 1, 2, 3, 5, 7, 11, 15, 22, 30, 42, 56, 77, 101, 135, 176, 231, 297, 385, 490, 627, 792, 1002, 1255,
+              1575, 1958, 2436, 3010, 3718, 4565, 5604, 6842, 8349, 10143, 12310, 14883, 17977, 21637, 26015, 31185,
+              37338, 44583, 53174, 63261, 75175, 89134, 105558, 124754, 147273, 173525]
+
+
+@pytest.mark.parametrize('num,count', [
+    *enumerate(PARTITIONS), (-1, 0), (100, 190569292), (1000, 24061467864032622473692149727991),
+    (10 ** 4,
+     36167251325636293988820471890953695495016030339315650422081868605887952568754066420592310556052906916435144
+     ),
+])
+def test_count_non_strict_integer_partitions(num: int, count: int):
+    assert count_non_strict_integer_partitions(num) == count
+
+
+def test_partition_table():
+    assert partition_table(len(PARTITIONS) - 1) == PARTITIONS
+    table = partition_table(3000)
+    assert [rademacher_partitions(n) for n in range(2, 3001, 37)] == table[2::37]
+    for modulus in (1, 2, 10 ** 9 + 7, 1 << 62):
+        assert [int(p) for p in partition_table(3000, modulus)] == [p % modulus for p in table]
+    assert count_non_strict_integer_partitions(3000, 10 ** 9 + 7) == table[3000] % (10 ** 9 + 7)
+
+
+def test_partition_table_domain():
+    with pytest.raises(ValueError):
+        partition_table(-1)
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 3, 10, 1000])
+def test_pentagonal_array(count: int):
+    array = pentagonal_array(count)
+    assert array.tolist() == [*generalized_pentagonal_nums(count)]
+    assert not array.flags.writeable
+
+
+@pytest.mark.parametrize('n', [*range(50), 1000, 10 ** 6, 10 ** 12 + 7])
+def test_largest_pentagonal(n: int):
+    pentagonal = [*generalized_pentagonal_nums(pentagonal_count(n) + 1)]
+    assert pentagonal[-2] <= n < pentagonal[-1]
+    assert largest_pentagonal(n) == pentagonal[-2]
+
+
+def test_largest_pentagonal_domain():
+    assert pentagonal_count(-1) == 0
+    with pytest.raises(ValueError):
+        largest_pentagonal(-1)
+
+
+@pytest.mark.parametrize('p,q', [
+    (3, 5), (2, 7), (5, 121), (7, 22), (4, 13), (3, 1_000_000_000_039), (99, 100), (6, 8), (17, 210), (11, 1024),
+])
+@pytest.mark.parametrize('force', [False, True])
+def test_egyptian_decomposition(p: int, q: int, force: bool):
+    denoms = egyptian_decomposition(p, q, force=force)
+    assert denoms == sorted(set(denoms))
+    assert sum(Fraction(1, d) for d in denoms) == Fraction(p, q)
+    if not force:
+        assert denoms[-1] <= 120 * q ** 2
+
+
+@pytest.mark.parametrize('p,q,denoms', [(3, 5, [2, 10]), (5, 121, [33, 121, 363]), (1, 7, [7]), (2, 4, [2])])
+def test_egyptian_decomposition_values(p: int, q: int, denoms: list[int]):
+    assert egyptian_decomposition(p, q) == denoms
+
+
+@pytest.mark.parametrize('p,q', [(0, 5), (5, 5), (6, 5), (-1, 5)])
+def test_egyptian_decomposition_domain(p: int, q: int):
+    with pytest.raises(ValueError):
+        egyptian_decomposition(p, q)
+
+
+def test_egyptian_decompositions():
+    fractions = [(p, q) for q in range(2, 60) for p in range(1, q)] + [(10, 242), (5, 121)]
+    assert egyptian_decompositions(fractions) == [egyptian_decomposition(p, q) for p, q in fractions]
+
+
+@pytest.mark.parametrize('n,practical', [
+    (1, True), (2, True), (3, False), (4, True), (6, True), (10, False), (12, True), (18, True), (20, True),
+    (22, False), (66, True), (726, True),
+])
+def test_is_practical(n: int, practical: bool):
+    assert is_practical(n) == practical
@@ -0,0 +1,109 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+from itertools import zip_longest
+
+import pytest
+
+from src.useful_tools.math.poly_div import *
+from src.useful_tools.math.poly_div import schoolbook_divide
+from src.useful_tools.math.poly_mul import multiply
+from src.useful_tools.math.polynomial import CoefDict, polyify
+
+
+def random_coefs(n: int, bits: int) -> list[int]:
+    return [random.randint(-(1 << bits), 1 << bits) for _ in range(n)]
+
+
+def dividend(b: list, q: list, r: list) -> list:
+    return [x + y for x, y in zip_longest(multiply(b, q), r, fillvalue=0)]
+
+
+@pytest.mark.parametrize('n,m,lead', [
+    (5, 3, 1), (300, 250, 1), (700, 300, -1), (1000, 200, 2), (600, 400, 7), (2000, 1000, 1), (400, 2, 3),
+])
+def test_integer_division(n: int, m: int, lead: int):
+    random.seed(n + m)
+    b = random_coefs(m - 1, 20) + [lead]
+    q, r = random_coefs(n - m + 1, 20), random_coefs(m - 1, 20)
+    a = dividend(b, q, r)
+    expected = schoolbook_divide(a, b)
+    if lead in (1, -1):
+        assert expected == (q, r)
+    assert divmod_coefs(a, b) == expected
+    assert floordiv_coefs(a, b) == expected[0]
+    assert mod_coefs(a, b) == expected[1]
+
+
+def test_large_quotient():
+    # The pseudo-quotient by a non-monic divisor outgrows the NTT primes, and more primes are drawn for it
+    random.seed(0)
+    a, b = random_coefs(400, 10), random_coefs(199, 10) + [3]
+    assert divmod_coefs(a, b) == schoolbook_divide(a, b)
+    assert mod_coefs(a, b) == schoolbook_divide(a, b)[1]
+
+
+def test_large_non_monic_division():
+    # An integer quotient comes straight from its residues, in well under a second, where schoolbook division
+    # over Fractions takes minutes
+    random.seed(4)
+    b = random_coefs(1999, 20) + [3]
+    q, r = random_coefs(2001, 20), random_coefs(1999, 20)
+    assert divmod_coefs(dividend(b, q, r), b) == (q, r)
+
+
+def test_fraction_division():
+    random.seed(1)
+    a = [Fraction(random.randint(-99, 99), random.randint(1, 9)) for _ in range(600)]
+    b = [Fraction(random.randint(-99, 99), 1) for _ in range(299)] + [1]
+    q, r = divmod_coefs(a, b)
+    assert (q, r) == schoolbook_divide(a, b)
+    assert all(x == y for x, y in zip_longest(dividend(b, q, r), a))
+
+
+def test_float_division():
+    random.seed(2)
+    # Small lower coefficients keep the division well conditioned
+    b = [random.random() / 2000 for _ in range(1100)] + [1.0]
+    q, r = [random.random() for _ in range(1200)], [random.random() for _ in range(1100)]
+    a = [float(c) for c in dividend(b, q, r)]
+    quotient, remainder = divmod_coefs(a, b)
+    assert quotient == pytest.approx(q, abs=1e-6)
+    assert remainder == pytest.approx(r, abs=1e-6)
+
+
+@pytest.mark.parametrize('f', [[1], [1, 1], [2, -3, 1], [Fraction(1, 2), 5, 0, 7], [-1] + [0] * 300 + [4]])
+@pytest.mark.parametrize('n', [1, 5, 400])
+def test_series_inverse(f: list, n: int):
+    product = multiply(f, series_inverse(f, n))[:n]
+    assert product == [1] + [0] * (n - 1)
+
+
+@pytest.mark.parametrize('f', [divmod_coefs, floordiv_coefs, mod_coefs])
+def test_division_by_zero(f):
+    with pytest.raises(ZeroDivisionError):
+        f([1, 2], [])
+    with pytest.raises(ZeroDivisionError):
+        f([1, 2], [1, 0])
+
+
+def test_short_dividend():
+    assert divmod_coefs([1, 2], [1, 2, 3]) == ([], [1, 2])
+
+
+def test_coef_dict_division():
+    random.seed(3)
+    b, q = random_coefs(400, 8) + [1], random_coefs(600, 8)
+    a = dividend(b, q, [5, -4])
+    quotient, remainder = divmod(CoefDict(enumerate(a)), CoefDict(enumerate(b)))
+    assert quotient == CoefDict(enumerate(q))
+    assert remainder == CoefDict({0: 5, 1: -4})
+    assert CoefDict(enumerate(a)) // CoefDict(enumerate(b)) == quotient
+    assert CoefDict(enumerate(a)) % CoefDict(enumerate(b)) == remainder
+
+
+def test_decimal_division():
+    quotient, remainder = divmod(polyify('x^2+1'), polyify('2x+1'))
+    assert quotient.coef_dict == CoefDict({1: Decimal('0.5'), 0: Decimal('-0.25')})
+    assert remainder.coef_dict == CoefDict({0: Decimal('1.25')})
+    assert (polyify('x^2+1') // polyify('3x')).coef_dict == CoefDict({1: Decimal(1) / 3})
@@ -0,0 +1,72 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from src.useful_tools.math.poly_eval import *
+from src.useful_tools.math.polynomial import polyify
+
+
+@pytest.mark.parametrize('coefs,x,value', [
+    ([], 5, 0), ([7], 5, 7), ([1, 2, 3], 2, 17), ([1, 2, 3], -1, 2), ([0, 0, 1], Fraction(1, 2), Fraction(1, 4)),
+])
+def test_horner(coefs: list, x, value):
+    assert horner(coefs, x) == value
+    assert horner(coefs, x, 7) == value % 7 if isinstance(value, int) else True
+
+
+@pytest.mark.parametrize('modulus', [998244353, 2 ** 61 - 1])
+@pytest.mark.parametrize('n,m', [(10, 10), (300, 1000), (1000, 300), (9000, 9000)])
+def test_evaluate_many_modular(modulus: int, n: int, m: int):
+    if modulus > 1 << 31 and n * m > 10 ** 6:
+        pytest.skip('Horner reference too slow')
+    random.seed(n + m)
+    coefs, points = random_residues(n, modulus), random_residues(m, modulus)
+    values = evaluate_many(coefs, points, modulus)
+    sample = random.sample(range(m), min(m, 20))
+    assert [values[i] for i in sample] == [horner(coefs, points[i], modulus) for i in sample]
+    assert len(values) == m
+
+
+def random_residues(n: int, modulus: int) -> list[int]:
+    return [random.randrange(modulus) for _ in range(n)]
+
+
+def test_evaluate_many_exact():
+    random.seed(0)
+    coefs = [Fraction(random.randint(-9, 9), random.randint(1, 3)) for _ in range(300)]
+    points = [random.randint(-3, 3) for _ in range(280)] + [Fraction(1, 2), Fraction(-2, 3)]
+    assert evaluate_many(coefs, points) == [horner(coefs, x) for x in points]
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.complex128])
+def test_evaluate_many_arrays(dtype):
+    coefs = [1, -2, 0, 3]
+    points = np.linspace(-2, 2, 12, dtype=dtype).reshape(3, 4) * (1 + 1j if dtype == np.complex128 else 1)
+    values = evaluate_many(coefs, points)
+    assert values.shape == points.shape and values.dtype == dtype
+    assert np.allclose(values, np.polyval(coefs[::-1], points))
+
+
+def test_subproduct_tree():
+    tree = subproduct_tree([1, 2, 3])
+    assert tree[0] == [[-1, 1], [-2, 1], [-3, 1]]
+    assert tree[-1] == [[-6, 11, -6, 1]]
+
+
+@pytest.mark.parametrize('storage', [{}, {'backend': 'dense'}, {'backend': 'dense', 'dtype': np.int64}])
+def test_polynomial_evaluate_many(storage: dict):
+    p = polyify('3x^4-x^2+7x-2', **storage)
+    points = [-2, 0, 1, 5]
+    assert p.evaluate_many(points) == [p(x) for x in points]
+    assert p.evaluate_many(points, modulus=11) == [int(p(x)) % 11 for x in points]
+    assert np.allclose(p.evaluate_many(np.array([0.5, 1.5])), [float(p(0.5)), float(p(1.5))])
+
+
+def test_coef_dict_horner():
+    p = polyify('x^50+2x^3-1')
+    assert p(2) == Decimal(2 ** 50 + 15)
+    assert p(Decimal('0.5')) == Decimal('0.5') ** 50 + Decimal('-0.75')
+    assert polyify('0')(3) == 0
@@ -0,0 +1,160 @@
+import random
+from fractions import Fraction
+from itertools import zip_longest
+
+import pytest
+
+from src.useful_tools.math import poly_gcd
+from src.useful_tools.math.poly_div import mod_coefs
+from src.useful_tools.math.poly_gcd import *
+from src.useful_tools.math.poly_gcd import euclid_xgcd, modular_gcd, subresultant_gcd, subresultant_resultant, trim
+from src.useful_tools.math.poly_mul import multiply
+from src.useful_tools.math.poly_ring import GF
+from src.useful_tools.math.polynomial import polyify
+
+
+def random_coefs(n: int, bits: int) -> list[int]:
+    return [random.randint(-(1 << bits), 1 << bits) for _ in range(n)]
+
+
+def combination(s: list, a: list, t: list, b: list, modulus: int | None = None) -> list:
+    total = [x + y for x, y in zip_longest(multiply(s, a) if s else [], multiply(t, b) if t else [], fillvalue=0)]
+    return trim(total if modulus is None else [x % modulus for x in total])
+
+
+def sylvester_determinant(a: list, b: list):
+    m, n = len(a) - 1, len(b) - 1
+    rows = [[Fraction(0)] * i + [Fraction(c) for c in a[::-1]] + [Fraction(0)] * (n - 1 - i) for i in range(n)]
+    rows += [[Fraction(0)] * i + [Fraction(c) for c in b[::-1]] + [Fraction(0)] * (m - 1 - i) for i in range(m)]
+    det = Fraction(1)
+    for i in range(m + n):
+        pivot = next((j for j in range(i, m + n) if rows[j][i]), None)
+        if pivot is None:
+            return 0
+        if pivot != i:
+            rows[i], rows[pivot], det = rows[pivot], rows[i], -det
+        det *= rows[i][i]
+        for j in range(i + 1, m + n):
+            factor = rows[j][i] / rows[i][i]
+            rows[j] = [x - factor * y for x, y in zip(rows[j], rows[i])]
+    return det
+
+
+@pytest.fixture(params=['default', 'modular'])
+def thresholds(request, monkeypatch):
+    # Runs the small cases both ways, forcing the modular algorithms down to degree 1
+    if request.param == 'modular':
+        for name in ('MODULAR_GCD_THRESHOLD', 'MODULAR_RESULTANT_THRESHOLD', 'MODULAR_XGCD_THRESHOLD'):
+            monkeypatch.setattr(poly_gcd, name, 1)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_small_polynomials(seed: int, thresholds):
+    random.seed(seed)
+    common = random_coefs(random.randint(1, 4), 4)
+    common[-1] = common[-1] or 1
+    a = trim(multiply(common, random_coefs(random.randint(1, 12), 8)))
+    b = trim(multiply(common, random_coefs(random.randint(1, 12), 8)))
+    if seed % 3 == 0:
+        a = multiply(a, multiply(common, common))
+    if not a or not b:
+        return
+    g, s, t = xgcd_coefs(a, b)
+    assert g == euclid_xgcd(a, b)[0] == [Fraction(c, gcd_coefs(a, b)[-1]) for c in gcd_coefs(a, b)]
+    assert combination(s, a, t, b) == g
+    assert len(s) < max(len(b) - len(g) + 1, 2) and len(t) < max(len(a) - len(g) + 1, 2)
+    assert not any(mod_coefs(a, gcd_coefs(a, b))) and not any(mod_coefs(b, gcd_coefs(a, b)))
+    assert resultant_coefs(a, b) == sylvester_determinant(a, b)
+    assert resultant_coefs(b, a) == sylvester_determinant(b, a)
+    constant, factors = squarefree_coefs(a)
+    product = [constant]
+    for f, k in factors:
+        for _ in range(k):
+            product = multiply(product, f)
+    assert product == a
+    assert all(len(gcd_coefs(f, g)) == 1 for (f, _), (g, _) in zip(factors, factors[1:]))
+
+
+@pytest.mark.parametrize('a,b,g', [
+    ([-1, 0, 1], [1, 2, 1], [1, 1]),
+    ([6, 12], [4, 8], [2, 4]),
+    ([-6, -12], [], [6, 12]),
+    ([0, 0, 2], [0, 4], [0, 2]),
+    ([3], [5, 10], [1]),
+    ([], [], []),
+    ([Fraction(1, 2), Fraction(1, 2)], [-1, 0, 1], [1, 1]),
+])
+def test_gcd_normalization(a: list, b: list, g: list):
+    assert gcd_coefs(a, b) == g
+
+
+@pytest.mark.parametrize('n', [30, 80])
+def test_large_gcd(n: int):
+    random.seed(n)
+    g = random_coefs(n // 3, 30)
+    a, b = multiply(g, random_coefs(n, 30)), multiply(g, random_coefs(n - 7, 30))
+    primitive_g = [c // (g[-1] // abs(g[-1])) for c in g]
+    assert gcd_coefs(a, b) == modular_gcd(a, b) == subresultant_gcd(a, b)
+    assert gcd_coefs(a, b)[-1] > 0 and not any(mod_coefs(primitive_g, gcd_coefs(a, b)))
+    assert gcd_coefs(random_coefs(n, 20), random_coefs(n, 20)) == [1]
+    a, b = random_coefs(n, 20), random_coefs(n // 2, 20)
+    assert resultant_coefs(a, b) == subresultant_resultant(a, b)
+    g, s, t = xgcd_coefs(a, b)
+    assert g == [1] and combination(s, a, t, b) == [1]
+
+
+@pytest.mark.parametrize('p', [7, 998244353, 2 ** 61 - 1])
+def test_modular(p: int):
+    random.seed(p)
+    a, b = random_coefs(25, 20), random_coefs(18, 20)
+    g = multiply(random_coefs(4, 20), [1, 1])
+    a[-1] += -a[-1] % p + 1
+    assert resultant_coefs(a, b, p) == resultant_coefs(a, b) % p
+    for x, y in ((a, b), (multiply(a, g), multiply(b, g))):
+        g_p, s, t = xgcd_coefs(x, y, p)
+        assert g_p == gcd_coefs(x, y, p) and g_p[-1] == 1
+        assert combination(s, x, t, y, p) == g_p
+    assert len(gcd_coefs(multiply(a, g), multiply(b, g), p)) >= len(g)
+
+
+@pytest.mark.parametrize('coefs,p,expected', [
+    # (x^5 + 1)^2 (x^2 + x + 2) = (x + 1)^10 (x^2 + x + 2) mod 5, with a vanishing derivative part
+    (multiply(multiply([1, 0, 0, 0, 0, 1], [1, 0, 0, 0, 0, 1]), [2, 1, 1]), 5, (1, [([2, 1, 1], 1), ([1, 1], 10)])),
+    ([2, 0, 0, 2], 3, (2, [([1, 1], 3)])),
+    ([1, 0, 1], 2, (1, [([1, 1], 2)])),
+    ([4], 7, (4, [])),
+])
+def test_squarefree_mod(coefs: list, p: int, expected: tuple):
+    assert squarefree_coefs(coefs, p) == expected
+
+
+@pytest.mark.parametrize('coefs,expected', [
+    ([-2, 2, 2, -2], (-2, [([1, 1], 1), ([-1, 1], 2)])),
+    ([0, 0, 0, -3], (-3, [([0, 1], 3)])),
+    ([Fraction(1, 2), 1, Fraction(1, 2)], (Fraction(1, 2), [([1, 1], 2)])),
+    ([5], (5, [])),
+    ([], (0, [])),
+])
+def test_squarefree(coefs: list, expected: tuple):
+    assert squarefree_coefs(coefs) == expected
+
+
+@pytest.mark.parametrize('backend', ['dict', 'dense'])
+@pytest.mark.parametrize('ring', [None, 'int', 'fraction', GF(7)])
+def test_polynomial_methods(backend: str, ring):
+    p = polyify('x^4-2x^3+2x-1', backend=backend, ring=ring)
+    d = polyify('x^3-x^2-x+1', backend=backend, ring=ring)
+    e, f = polyify('x^2+1', backend=backend, ring=ring), polyify('x^2-2', backend=backend, ring=ring)
+    assert p.gcd(d) == d
+    g, s, t = p.xgcd(e)
+    assert g == polyify('1', backend=backend, ring=g.ring) and not s * p + t * e - g
+    assert p.resultant(d) == 0 and e.resultant(f) == p.ring(9)
+    # Against the other backend
+    other = 'dense' if backend == 'dict' else 'dict'
+    assert p.gcd(polyify('x^3-x^2-x+1', backend=other, ring=ring)) == d
+    assert p.xgcd(polyify('x^2+1', backend=other, ring=ring))[0] == g
+    assert e.resultant(polyify('x^2-2', backend=other, ring=ring)) == p.ring(9)
+    constant, factors = p.squarefree_decomposition()
+    assert constant == 1 and [(str(f), k) for f, k in factors] == [('x+1', 1), ('x+6' if ring == GF(7) else 'x-1', 3)]
+    with pytest.raises(ValueError):
+        p.gcd(polyify('y', variable='y'))
@@ -0,0 +1,120 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from src.useful_tools.math import poly_mul
+from src.useful_tools.math.poly_mul import *
+from src.useful_tools.math.poly_mul import NTT_PRIMES
+from src.useful_tools.math.polynomial import CoefArray, CoefDict, Polynomial
+
+ALGORITHMS = [schoolbook_mul, karatsuba_mul, toom3_mul, multiply]
+
+
+def random_coefs(n: int, bits: int) -> list[int]:
+    return [random.randint(-(1 << bits), 1 << bits) for _ in range(n)]
+
+
+@pytest.mark.parametrize('n,m', [(1, 1), (1, 40), (7, 300), (300, 299), (600, 600), (1000, 77), (513, 2000)])
+@pytest.mark.parametrize('bits', [0, 20, 62, 63, 200])
+def test_integer_products(n: int, m: int, bits: int):
+    random.seed(n * m + bits)
+    a, b = random_coefs(n, bits), random_coefs(m, bits)
+    expected = schoolbook_mul(a, b)
+    for f in (karatsuba_mul, toom3_mul, fft_mul, ntt_mul, multiply):
+        assert f(a, b) == expected
+    assert fft_mul(a, a) == schoolbook_mul(a, a)
+
+
+@pytest.mark.parametrize('modulus', [2, 7, 998244353, 2 ** 61 - 1, 10 ** 30 + 57])
+def test_modular_products(modulus: int):
+    random.seed(modulus)
+    a, b = random_coefs(500, 80), random_coefs(400, 80)
+    expected = [c % modulus for c in schoolbook_mul(a, b)]
+    assert multiply(a, b, modulus) == expected
+    assert ntt_mul(a, b, modulus) == expected
+    assert fft_mul(a, b, modulus) == expected
+
+
+@pytest.mark.parametrize('modulus', [None, 10 ** 30 + 57])
+def test_narrow_limbs(monkeypatch, modulus):
+    # A smaller exactness bound makes moderate sizes need limbs below MIN_LIMB_BITS, as very long factors with
+    # very wide coefficients would; fft_mul hands them to ntt_mul, whose primes too are cut down to two here
+    random.seed(3)
+    a, b = random_coefs(300, 300), random_coefs(260, 300)
+    expected = schoolbook_mul(a, b) if modulus is None else [c % modulus for c in schoolbook_mul(a, b)]
+    monkeypatch.setattr(poly_mul, 'FFT_EXACT_BITS', 28)
+    monkeypatch.setattr(poly_mul, 'NTT_PRIMES', NTT_PRIMES[:2])
+    monkeypatch.setattr(poly_mul, 'NTT_MAX_SIZE', 256)
+    assert fft_mul(a, b, modulus) == expected
+    assert multiply(a, b, modulus) == expected
+    assert ntt_mul(a, b, modulus) == expected
+
+
+def test_ntt_convolve():
+    a, b = random_coefs(100, 30), random_coefs(50, 30)
+    for p in NTT_PRIMES:
+        assert ntt_convolve(a, b, p).tolist() == [c % p for c in schoolbook_mul(a, b)]
+
+
+def test_fraction_products():
+    random.seed(0)
+    a = [Fraction(random.randint(-99, 99), random.randint(1, 9)) for _ in range(300)]
+    b = [Fraction(random.randint(-99, 99), random.randint(1, 9)) for _ in range(280)]
+    expected = schoolbook_mul(a, b)
+    for f in (karatsuba_mul, toom3_mul, multiply):
+        assert f(a, b) == expected
+
+
+def test_decimal_products():
+    a = [Decimal(random.randint(-99, 99)) / 4 for _ in range(300)]
+    b = [Decimal(random.randint(-99, 99)) / 8 for _ in range(300)]
+    assert multiply(a, b) == schoolbook_mul(a, b)
+
+
+@pytest.mark.parametrize('f', ALGORITHMS)
+def test_empty_products(f):
+    assert multiply([], [1, 2]) == multiply([3], []) == []
+    assert f([3], [1, 2]) == [3, 6]
+
+
+def test_float_mul():
+    a, b = np.random.default_rng(0).random((2, 1000))
+    assert np.allclose(float_mul(a, b), np.convolve(a, b))
+    assert np.allclose(float_mul(a[:10], b), np.convolve(a[:10], b))
+
+
+@pytest.mark.parametrize('dtype', [None, object, np.int64, np.float64])
+def test_dense_products(dtype):
+    random.seed(1)
+    a, b = random_coefs(700, 20), random_coefs(600, 20)
+    product = CoefArray(a, dtype) * CoefArray(b, dtype)
+    assert product.dtype == (None if dtype is None else np.dtype(dtype))
+    assert np.allclose(np.array(product.tolist(), dtype=float), schoolbook_mul(a, b), rtol=1e-12)
+
+
+def test_dense_overflow():
+    a = CoefArray([1 << 40] * 100, np.int64)
+    product = a * a
+    assert product.dtype == object
+    assert product.tolist() == schoolbook_mul([1 << 40] * 100, [1 << 40] * 100)
+    assert (CoefArray([1, 2], np.int64) * CoefArray([3, 4], np.int64)).dtype == np.int64
+
+
+@pytest.mark.parametrize('offset', [0, 5])
+def test_coef_dict_products(offset: int):
+    random.seed(offset)
+    a, b = random_coefs(400, 40), random_coefs(300, 40)
+    expected = CoefDict({i: c for i, c in enumerate(schoolbook_mul(a, b), 2 * offset) if c})
+    assert CoefDict(enumerate(a, offset)) * CoefDict(enumerate(b, offset)) == expected
+    sparse = CoefDict({0: 1, 10 ** 6: 2}) * CoefDict({0: 3, 10 ** 6: 1})
+    assert sparse == CoefDict({0: 3, 10 ** 6: 7, 2 * 10 ** 6: 2})
+
+
+def test_polynomial_products():
+    a, b = random_coefs(2000, 10), random_coefs(2000, 10)
+    assert (Polynomial.from_iterable(a) * Polynomial.from_iterable(b)).get_list(descending=False) == [
+        Decimal(c) for c in schoolbook_mul(a, b)
+    ]
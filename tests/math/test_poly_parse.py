@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.useful_tools.exceptions import PolynomialParseError
+from src.useful_tools.math.poly_parse import *
+from src.useful_tools.math import poly_parse
+from src.useful_tools.math.poly_parse import tokenize_chunk
+from src.useful_tools.math.poly_ring import GF
+from src.useful_tools.math.polynomial import Polynomial, polyify
+
+
+@pytest.mark.parametrize('poly_str,variable,terms', [
+    ('3x^4-x^2+7x-2', 'x', {4: 3, 2: -1, 1: 7, 0: -2}),
+    (' 3x^2 + 2x - 1\n', 'x', {2: 3, 1: 2, 0: -1}),
+    ('7x^2-7x^8+7x^1+7x^2+0+7', 'x', {2: 14, 8: -7, 1: 7, 0: 7}),
+    ('-0', 'x', {0: 0}),
+    ('-t^3+t', 't', {3: -1, 1: 1}),
+    ('2ab^2-ab', 'ab', {2: 2, 1: -1}),
+    ('1' * 30 + 'x', 'x', {1: int('1' * 30)}),
+])
+def test_parse_terms(poly_str: str, variable: str, terms: dict):
+    assert parse_terms(poly_str, variable) == terms
+    assert list(parse_many([poly_str], variable)) == [terms]
+
+
+@pytest.mark.parametrize('poly_str,position', [
+    ('', 0), ('3x^^2', 2), ('3x 2', 3), ('x+', 1), ('2^3', 1), ('  *x', 2), ('x^2+3y', 5), ('x^2x', 3), ('3 x', 2),
+])
+def test_parse_errors(poly_str: str, position: int):
+    with pytest.raises(PolynomialParseError) as e:
+        parse_terms(poly_str)
+    assert e.value.position == position
+    errors = []
+    assert list(parse_many(['x', poly_str, '2'], errors=errors)) == [{1: 1}, None, {0: 2}]
+    assert [(error.line, error.position) for error in errors] == [(1, position)]
+    with pytest.raises(PolynomialParseError):
+        list(parse_many(['x', poly_str]))
+
+
+@pytest.mark.parametrize('variable', ['x', 'xy'])
+def test_tokenizer_matches_parse_terms(variable: str):
+    # Random strings over the grammar's characters, mostly invalid, must parse the same both ways
+    random.seed(len(variable))
+    alphabet = [variable, variable, '^', '+', '-', ' ', '1', '2', '0', '9', '*', '\n', 'y']
+    strs = [''.join(random.choices(alphabet, k=random.randint(0, 9))) for _ in range(20000)]
+    expected = []
+    for poly_str in strs:
+        try:
+            expected.append(parse_terms(poly_str, variable))
+        except PolynomialParseError:
+            expected.append(None)
+    assert list(parse_many(strs, variable, [])) == expected
+    assert tokenize_chunk(strs, variable)[3].sum() >= expected.count(None)
+
+
+def test_coef_matrix():
+    errors = []
+    matrix = coef_matrix(['x^2+1', 'bad', '3x - 1', '-x^4'], errors=errors)
+    assert matrix.dtype == np.int64 and [e.line for e in errors] == [1]
+    assert matrix.tolist() == [[1, 0, 1, 0, 0], [0, 0, 0, 0, 0], [-1, 3, 0, 0, 0], [0, 0, 0, 0, -1]]
+    assert coef_matrix([]).shape == (0, 0)
+
+
+def test_from_str_many():
+    lines = ['3x^4-x^2+7x-2\n', 'x + 1\n', 'oops\n', '0\n']
+    errors = []
+    polys = list(Polynomial.from_str_many(lines, errors=errors))
+    assert polys[:2] == [polyify('3x^4-x^2+7x-2'), polyify('x+1')] and polys[2] is None and not polys[3]
+    assert [e.line for e in errors] == [2]
+    dense = list(Polynomial.from_str_many(lines[:2], backend='dense', ring='int'))
+    assert dense[1].coef_dict.tolist() == [1, 1] and dense[1].ring == polyify('x', ring='int').ring
+    with pytest.raises(PolynomialParseError):
+        polyify('x^')
+
+
+@pytest.mark.parametrize('backend,ring', [('dict', None), ('dict', GF(7)), ('dense', None), ('dense', 'int')])
+def test_from_str_many_matches_from_str(monkeypatch, backend: str, ring):
+    # Repeated powers, cancelling terms, sums and numbers too long for int64, and chunk boundaries
+    monkeypatch.setattr(poly_parse, 'CHUNK_SIZE', 7)
+    random.seed(0)
+    terms = ['+x', '-x', '+x^3', '+7x^3', '-7x^3', '+0', '+14', '+' + '9' * 18]
+    strs = [''.join(random.choices(terms, k=random.randint(1, 30))).lstrip('+') for _ in range(200)]
+    strs += ['0x^9', '-' + '9' * 25 + 'x^2+x', f'{1 << 62}x^5+{1 << 62}x^5']
+    polys = list(Polynomial.from_str_many(strs, backend=backend, ring=ring))
+    assert polys == [Polynomial.from_str(poly_str, backend=backend, ring=ring) for poly_str in strs]
+    assert [p.degree() for p in polys] == [Polynomial.from_str(s, backend=backend, ring=ring).degree() for s in strs]
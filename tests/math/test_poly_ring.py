@@ -0,0 +1,88 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from src.useful_tools.math.poly_mul import multiply
+from src.useful_tools.math.poly_ring import *
+from src.useful_tools.math.polynomial import CoefArray, CoefDict, polyify
+
+RINGS = ['int', 'fraction', 'float', GF(998244353), GF(2 ** 61 - 1)]
+
+
+def test_conversion():
+    assert INTEGERS(Decimal(3)) == 3 and isinstance(RATIONALS(2), Fraction) and FLOATS(Fraction(1, 4)) == 0.25
+    assert GF(7)(Fraction(1, 2)) == 4 and GF(7)(Decimal('0.5')) == 4 and GF(7)(-1) == 6
+    with pytest.raises(ValueError):
+        INTEGERS(1.5)
+    with pytest.raises(ValueError):
+        GF(8)
+
+
+def test_get_ring():
+    assert get_ring('int') is INTEGERS and get_ring(Fraction) is RATIONALS and get_ring(None, DECIMALS) is DECIMALS
+    assert get_ring(GF(5)) == GF(5) != GF(7)
+    with pytest.raises(ValueError):
+        get_ring('quaternion')
+    if MPZ is None:
+        with pytest.raises(ImportError):
+            get_ring('mpz')
+
+
+def test_common_ring():
+    assert common_ring(INTEGERS, RATIONALS) is RATIONALS and common_ring(RATIONALS, INTEGERS) is RATIONALS
+    assert common_ring(GF(7), GF(7)) == GF(7) and common_ring(GF(7), INTEGERS) is None
+
+
+@pytest.mark.parametrize('ring', RINGS)
+@pytest.mark.parametrize('backend', ['dict', 'dense'])
+def test_ring_arithmetic(ring, backend: str):
+    ring = get_ring(ring)
+    p = polyify('3x^4-x^2+7x-2', ring=ring, backend=backend)
+    q = polyify('2x^2+1', ring=ring, backend=backend)
+    assert p.ring == q.ring == ring
+    coefs = p.coef_dict.tolist() if backend == 'dense' else list(p.coef_dict.values())
+    assert all(isinstance(c, type(ring(1))) for c in coefs)
+    assert (p * q)(3) == ring.reduce(p(3) * q(3)) == ring((3 * 81 - 9 + 21 - 2) * 19)
+    assert (p - q)(3) == ring.reduce(p(3) - q(3))
+    quotient, remainder = divmod(p, q)
+    assert quotient.ring == remainder.ring == ring.field
+    assert quotient * q + remainder == p
+    assert p // q == quotient and p % q == remainder
+    assert list(p.evaluate_many([0, 1, 2])) == [p(x) for x in [0, 1, 2]]
+
+
+@pytest.mark.parametrize('p', [998244353, 2 ** 61 - 1])
+def test_gf_dense(p: int):
+    random.seed(p)
+    ring = GF(p)
+    a, b = [random.randrange(-p, p) for _ in range(500)], [random.randrange(-p, p) for _ in range(300)]
+    f, g = polyify(a, backend='dense', ring=ring), polyify(b, backend='dense', ring=ring)
+    assert f.coef_dict.dtype == ring.dtype and (p >= 1 << 31 or f.coef_dict.coefs.dtype == np.int64)
+    assert (f * g).coef_dict.tolist() == multiply(a, b, p)
+    quotient, remainder = divmod(f * g + g, g)
+    assert quotient == f + polyify([1], backend='dense', ring=ring) and not remainder
+    assert f.evaluate_many(range(10)) == [f(x) for x in range(10)]
+
+
+def test_float_ring():
+    p = polyify(np.array([1, -2, 0, 3]), ring='float')
+    assert p.coef_dict.coefs.dtype == np.float64
+    assert np.allclose(p.evaluate_many(np.linspace(0, 1, 5)), np.polyval([3, 0, -2, 1], np.linspace(0, 1, 5)))
+
+
+def test_mixed_rings():
+    p, q = polyify('x^2+2', ring='int'), polyify([Fraction(1, 2), 1], ring='fraction')
+    assert (p * q).ring is RATIONALS and (q * p).ring is RATIONALS
+    assert (p + q).coef_dict == CoefDict({0: Fraction(5, 2), 1: 1, 2: 1}, ring=RATIONALS)
+    assert repr(CoefArray([1, 2], ring=GF(3))) == 'CoefArray([1, 2], ring=GF(3))'
+
+
+def test_gmpy_rings():
+    gmpy2 = pytest.importorskip('gmpy2')
+    p = polyify([1] * 100, ring='mpz', backend='dense')
+    assert isinstance(p.coef_dict.coefs[0], type(gmpy2.mpz(0)))
+    assert (p * p).coef_dict.tolist() == multiply([1] * 100, [1] * 100)
+    assert divmod(p, polyify([2, 1], ring='mpz'))[0].ring is MPQ
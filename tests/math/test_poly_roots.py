@@ -0,0 +1,181 @@
+import random
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import numpy as np
+import numpy.polynomial.polynomial as npoly
+import pytest
+
+from src.useful_tools.math.complex_decimal import ComplexDecimal
+from src.useful_tools.math.poly_ring import GF
+from src.useful_tools.math.poly_roots import *
+from src.useful_tools.math.polynomial import Polynomial, polyify
+
+
+def match_error(roots, expected) -> float:
+    """
+    :return: Largest distance, relative to the root's size once above 1, between each expected root and the nearest
+    of the remaining roots
+    """
+    roots, error = list(roots), 0.0
+    for x in expected:
+        i = min(range(len(roots)), key=lambda j: abs(roots[j] - x))
+        error = max(error, abs(roots.pop(i) - x) / max(1.0, abs(x)))
+    return error
+
+
+def backward_error(coefs: np.ndarray, roots: np.ndarray) -> float:
+    # Evaluated at 1 / z outside the unit circle, through the reversed polynomial, so it cannot overflow
+    outside = np.abs(roots) > 1
+    x = np.where(outside, 1 / roots, roots)
+    values = np.where(outside, npoly.polyval(x, coefs[::-1]), npoly.polyval(x, coefs))
+    bounds = np.where(outside, npoly.polyval(np.abs(x), np.abs(coefs[::-1])), npoly.polyval(np.abs(x), np.abs(coefs)))
+    return float(np.max(np.abs(values) / bounds))
+
+
+@pytest.mark.parametrize('method', ['eig', 'aberth'])
+@pytest.mark.parametrize('degree', [1, 2, 5, 30, 150])
+def test_find_roots(method: str, degree: int):
+    rng = np.random.default_rng(degree)
+    coefs = rng.standard_normal(degree + 1) + 1j * rng.standard_normal(degree + 1)
+    roots = find_roots(coefs, method)
+    assert roots.shape == (degree,)
+    assert backward_error(coefs, roots) < 1e-13
+    assert match_error(roots, npoly.polyroots(coefs)) < 1e-8
+
+
+@pytest.mark.parametrize('coefs,expected', [
+    ([1, 0, 1], [1j, -1j]),
+    ([-6, 11, -6, 1], [1, 2, 3]),
+    ([0, 0, 1, 1], [0, 0, -1]),
+    ([0, 0, 5], [0, 0]),
+    ([3], []),
+    ([2, 1, 0, 0], [-2]),
+    (np.array([Fraction(-1, 4), 0, 1], dtype=object), [0.5, -0.5]),
+])
+def test_known_roots(coefs, expected: list):
+    for method in ('eig', 'aberth'):
+        roots = find_roots(coefs, method)
+        assert len(roots) == len(expected)
+        assert match_error(roots, expected) < 1e-12
+
+
+@pytest.mark.parametrize('rows,degree', [(1, 3), (300, 2), (300, 6), (50, 20)])
+def test_batch(rows: int, degree: int):
+    rng = np.random.default_rng(rows + degree)
+    coefs = rng.standard_normal((rows, degree + 1))
+    for method in (None, 'eig', 'aberth'):
+        roots = find_roots(coefs, method)
+        assert roots.shape == (rows, degree)
+        for row, found in zip(coefs, roots):
+            assert backward_error(row, found) < 1e-13
+            assert match_error(found, npoly.polyroots(row)) < 1e-8
+
+
+def test_batch_zero_roots():
+    coefs = np.array([[0, 0, -2, 0, 1], [0, 1, 0, 0, 1], [1, 2, 3, 4, 5]], dtype=float)
+    roots = find_roots(coefs, 'aberth')
+    for row, found in zip(coefs, roots):
+        assert match_error(found, find_roots(row, 'eig')) < 1e-7
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        find_roots([0, 0, 0])
+    with pytest.raises(ValueError):
+        find_roots(np.array([[1, 2, 1], [1, 2, 0]]))
+    with pytest.raises(ValueError):
+        find_roots([1, 2, 1], 'bisection')
+    with pytest.raises(ValueError):
+        roots_coefs([])
+
+
+@pytest.mark.parametrize('coefs,expected', [
+    ([-2, 0, 1], [(-2, 0), (2, 0)]),
+    ([1, 0, 1], [(0, -1), (0, 1)]),
+    ([-1, 3, -3, 1], [(1, 0)] * 3),
+    ([0, 0, -2, 0, 1], [(-2, 0), (0, 0), (0, 0), (2, 0)]),
+    ([4, 0, -4, 0, 1], [(-2, 0), (-2, 0), (2, 0), (2, 0)]),
+])
+def test_refine(coefs: list, expected: list):
+    # Real parts are given squared, with their sign
+    with localcontext() as ctx:
+        ctx.prec = 60
+        expected = [ComplexDecimal(Decimal(abs(x)).sqrt().copy_sign(Decimal(x)), y) for x, y in expected]
+        for digits in (30, 60):
+            roots = roots_coefs(coefs, digits)
+            assert len(roots) == len(expected)
+            assert all(isinstance(root, ComplexDecimal) for root in roots)
+            assert all(abs(root - x) <= Decimal(10) ** (2 - digits) for root, x in zip(roots, expected))
+
+
+def test_refine_random():
+    random.seed(0)
+    coefs = [random.randint(-50, 50) for _ in range(40)] + [1]
+    roots = roots_coefs(coefs, 80)
+    with localcontext() as ctx:
+        ctx.prec = 100
+        for root in roots:
+            # The Newton correction estimates the error, since large roots have large derivatives
+            value, slope = ComplexDecimal(0, 0), ComplexDecimal(0, 0)
+            for c in reversed(coefs):
+                slope = slope * root + value
+                value = value * root + c
+            assert abs(value / slope) < Decimal(10) ** -78 * abs(root)
+    assert match_error([complex(root) for root in roots], find_roots(coefs)) < 1e-10
+
+
+@pytest.mark.parametrize('coefs,expected', [
+    ([10 ** 400, 1, 1], [('-0.5', '-1e200'), ('-0.5', '1e200')]),
+    ([1, 1, Fraction(1, 10 ** 400)], [('-1e400', 0), (-1, 0)]),
+    ([1, -10 ** 50 - 1, 10 ** 50], [('1e-50', 0), (1, 0)]),
+])
+def test_roots_beyond_float_range(coefs: list, expected: list):
+    # Coefficients, or ratios between the roots, outside the float range; roots outside it round to infinity
+    roots = roots_coefs(coefs)
+    for root, (x, y) in zip(roots, expected, strict=True):
+        x = complex(float(x), float(y))
+        assert root == x if abs(x) == float('inf') else abs(root - x) <= 1e-12 * abs(x)
+    with localcontext() as ctx:
+        ctx.prec = 40
+        roots = roots_coefs(coefs, 30)
+        for root, (x, y) in zip(roots, expected, strict=True):
+            x = ComplexDecimal(x, y)
+            assert abs(root - x) <= Decimal('1e-28') * abs(x)
+
+
+def test_roots_beyond_float_range_cube():
+    roots = roots_coefs([-1, 0, 0, Fraction(1, 10 ** 4000)], 30)
+    assert len(roots) == 3
+    with localcontext() as ctx:
+        ctx.prec = 40
+        assert all(abs(abs(root) ** 3 / Decimal('1e4000') - 1) < Decimal('1e-28') for root in roots)
+    assert all(abs(root) == float('inf') for root in roots_coefs([-1, 0, 0, Fraction(1, 10 ** 4000)]))
+
+
+@pytest.mark.parametrize('backend,ring', [
+    ('dict', None), ('dense', None), ('dict', 'fraction'), ('dense', 'float'), ('dense', 'int'),
+])
+def test_get_roots(backend: str, ring):
+    p = Polynomial.from_iterable([-6, 11, -6, 1], backend=backend, ring=ring)
+    assert match_error(p.get_roots(), [1, 2, 3]) < 1e-12
+    assert [root.real for root in p.get_roots(digits=20)] == [1, 2, 3]
+    q = polyify('x^5 - 2x^4 + x^3', backend=backend)
+    assert q.get_roots() == (0j, 0j, 0j, 1 + 0j, 1 + 0j)
+    assert polyify('7', backend=backend).get_roots() == ()
+
+
+def test_get_roots_gf():
+    with pytest.raises(ValueError):
+        Polynomial.from_iterable([1, 0, 1], ring=GF(7)).get_roots()
+
+
+@pytest.mark.parametrize('dtype', [None, np.complex128])
+def test_get_roots_complex(dtype):
+    # Non-real coefficients skip the exact square-free decomposition; real ones stored as complex keep it
+    coefs = [1, 1j, 2, -3 + 1j]
+    p = Polynomial.from_iterable(coefs, backend='dense', dtype=dtype)
+    assert match_error(p.get_roots(), npoly.polyroots(coefs)) < 1e-12
+    assert match_error([complex(root) for root in p.get_roots(digits=30)], npoly.polyroots(coefs)) < 1e-12
+    q = Polynomial.from_iterable([-1, 3, -3, 1], backend='dense', dtype=dtype)
+    assert [root.real for root in q.get_roots(digits=20)] == [1, 1, 1]
@@ -1,8 +1,13 @@
 from decimal import Decimal
+from fractions import Fraction
 
+import numpy as np
 import pytest
 
-from src.useful_tools.math.polynomial import polyify
+from src.useful_tools.math.polynomial import CoefArray, CoefDict, polyify
+
+
+STORAGES = [{}, {'backend': 'dense'}, {'backend': 'dense', 'dtype': object}, {'backend': 'dense', 'dtype': np.int64}]
 
 
 @pytest.mark.parametrize('p_input,order,p_output', [
@@ -17,14 +22,15 @@ from src.useful_tools.math.polynomial import polyify
     ('17', False, '17'),
     ('-17', False, '-17'),
 ])
-def test_constant_polynomial_from_str_to_str(p_input: str, order: bool, p_output: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_constant_polynomial_from_str_to_str(p_input: str, order: bool, p_output: str, storage: dict):
     """
     Tests string representations of polynomials of degree 0
     :param p_input: Input polynomial from str
     :param order: Ascending or descending display
     :param p_output: Output polynomial
     """
-    assert polyify(p_input).get_string(descending=order) == p_output
+    assert polyify(p_input, **storage).get_string(descending=order) == p_output
 
 
 @pytest.mark.parametrize('p_input,order,p_output', [
@@ -39,14 +45,15 @@ def test_constant_polynomial_from_str_to_str(p_input: str, order: bool, p_output
     ([17], False, '17'),
     ([-17], False, '-17'),
 ])
-def test_constant_polynomial_from_iter_to_str(p_input: list, order: bool, p_output: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_constant_polynomial_from_iter_to_str(p_input: list, order: bool, p_output: str, storage: dict):
     """
     Tests string representations of polynomials of degree 0
     :param p_input: Input polynomial from iterable
     :param order: Ascending or descending display
     :param p_output: Output polynomial
     """
-    assert polyify(p_input).get_string(descending=order) == p_output
+    assert polyify(p_input, **storage).get_string(descending=order) == p_output
 
 
 @pytest.mark.parametrize('p_input,order,p_output', [
@@ -69,14 +76,15 @@ def test_constant_polynomial_from_iter_to_str(p_input: list, order: bool, p_outp
     ('15x^8-x', False, '-x+15x^8'),
     ('7x^2-7x^8+7x^1+7x^2+0+7', False, '7+7x+14x^2-7x^8'),
 ])
-def test_polynomial_from_str_order_invariance(p_input: str, order: bool, p_output: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_from_str_order_invariance(p_input: str, order: bool, p_output: str, storage: dict):
     """
     Tests string representations of polynomials of nonzero degree
     :param p_input: Input polynomial from str
     :param order: Ascending or descending display
     :param p_output: Output polynomial
     """
-    assert polyify(p_input).get_string(descending=order) == p_output
+    assert polyify(p_input, **storage).get_string(descending=order) == p_output
 
 
 @pytest.mark.parametrize('p_input,order,p_output', [
@@ -99,14 +107,15 @@ def test_polynomial_from_str_order_invariance(p_input: str, order: bool, p_outpu
     ([0, -1, 0, 0, 0, 0, 0, 0, 15], False, '-x+15x^8'),
     ([7, 7, 14, 0, 0, 0, 0, 0, -7], False, '7+7x+14x^2-7x^8'),
 ])
-def test_polynomial_from_iterable_to_str(p_input: list, order: bool, p_output: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_from_iterable_to_str(p_input: list, order: bool, p_output: str, storage: dict):
     """
     Tests string representations of polynomials of nonzero degree
     :param p_input: Input polynomial from iterable
     :param order: Ascending or descending display
     :param p_output: Output polynomial
     """
-    assert polyify(p_input).get_string(descending=order) == p_output
+    assert polyify(p_input, **storage).get_string(descending=order) == p_output
 
 
 @pytest.mark.parametrize('p1_input,p2_input,p_output', [
@@ -119,7 +128,8 @@ def test_polynomial_from_iterable_to_str(p_input: list, order: bool, p_output: s
     ('3x^2+7x+15', 'x^4+10x^3-7x^2+1', 'x^4+10x^3-4x^2+7x+16'),
     ('x^19+1', 'x^3-x', 'x^19+x^3-x+1')
 ])
-def test_polynomial_addition(p1_input: str, p2_input: str, p_output: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_addition(p1_input: str, p2_input: str, p_output: str, storage: dict):
     """
     Tests addition of polynomials
     :param p1_input: Input polynomial1 from str
@@ -127,7 +137,7 @@ def test_polynomial_addition(p1_input: str, p2_input: str, p_output: str):
     :param p_output: Output polynomial1 + polynomial2
     :return:
     """
-    assert polyify(p1_input) + polyify(p2_input) == polyify(p_output)
+    assert polyify(p1_input, **storage) + polyify(p2_input, **storage) == polyify(p_output)
 
 
 @pytest.mark.parametrize('p1_input,p2_input,p_output', [
@@ -141,8 +151,12 @@ def test_polynomial_addition(p1_input: str, p2_input: str, p_output: str):
     ('3x^2+7x+15', 'x^4+10x^3-7x^2+1', '3x^6+37x^5+64x^4+101x^3-102x^2+7x+15'),
     ('x^19+1', 'x^3-x', 'x^22-x^20+x^3-x')
 ])
-def test_polynomial_multiplication(p1_input: str, p2_input: str, p_output: str):
-    assert polyify(p1_input) * polyify(p2_input) == polyify(p_output)
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_multiplication(p1_input: str, p2_input: str, p_output: str, storage: dict):
+    assert polyify(p1_input, **storage) * polyify(p2_input, **storage) == polyify(p_output)
+    # Mixed backends, against the default dict one
+    assert polyify(p1_input) * polyify(p2_input, **storage) == polyify(p_output)
+    assert polyify(p1_input, **storage) * polyify(p2_input) == polyify(p_output)
 
 
 @pytest.mark.parametrize('p1_input,p2_input,p1_output,p2_output', [
@@ -157,8 +171,15 @@ def test_polynomial_multiplication(p1_input: str, p2_input: str, p_output: str):
     ('7x^5+4x^4-39x^3+x-6', 'x^3-7x^2+9x-9', '7x^2+53x+269', '1469x^2-1943x+2415'),
 
 ])
-def test_polynomial_divmod(p1_input: str, p2_input: str, p1_output: str, p2_output: str):
-    assert divmod(polyify(p1_input), polyify(p2_input)) == (polyify(p1_output), polyify(p2_output))
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_divmod(p1_input: str, p2_input: str, p1_output: str, p2_output: str, storage: dict):
+    quotient, remainder = divmod(polyify(p1_input, **storage), polyify(p2_input, **storage))
+    assert (quotient, remainder) == (polyify(p1_output), polyify(p2_output))
+    mixed = [(polyify(p1_input), polyify(p2_input, **storage)), (polyify(p1_input, **storage), polyify(p2_input))]
+    for p1, p2 in mixed:
+        if p2:
+            assert divmod(p1, p2) == (polyify(p1_output), polyify(p2_output))
+            assert (p1 // p2, p1 % p2) == (polyify(p1_output), polyify(p2_output))
 
 
 @pytest.mark.parametrize('p1_input, p2_input', [
@@ -166,6 +187,62 @@ def test_polynomial_divmod(p1_input: str, p2_input: str, p1_output: str, p2_outp
     ('x', '0'),
     ('0', '0')
 ])
-def test_polynomial_zero_div(p1_input: str, p2_input: str):
+@pytest.mark.parametrize('storage', STORAGES)
+def test_polynomial_zero_div(p1_input: str, p2_input: str, storage: dict):
     with pytest.raises(ZeroDivisionError):
-        divmod(polyify(p1_input), polyify(p2_input))
+        divmod(polyify(p1_input, **storage), polyify(p2_input, **storage))
+
+
+@pytest.mark.parametrize('coefs,dtype', [([3, 0, 2], None), ([3, 0, 2], np.int64), ([1.5, -2.0], np.float64)])
+def test_dense_polynomial(coefs: list, dtype):
+    p = polyify(coefs, backend='dense', dtype=dtype)
+    assert isinstance(p.coef_dict, CoefArray)
+    assert p.degree() == len(coefs) - 1
+    assert not (p - p) and (p - p).coef_dict.tolist() == []
+    assert (p + -p).degree() == polyify('0').degree()
+    assert p(2) == sum(c * 2 ** i for i, c in enumerate(coefs))
+    assert p == polyify(coefs, backend='dense')
+    assert polyify(np.array(coefs, dtype=dtype)).coef_dict.dtype == np.array(coefs, dtype=dtype).dtype
+
+
+@pytest.mark.parametrize('dtype', [None, np.int64, object])
+def test_dense_divmod_fractions(dtype):
+    quotient, remainder = divmod(polyify([1, 0, 1], backend='dense', dtype=dtype),
+                                 polyify([1, 2], backend='dense', dtype=dtype))
+    assert quotient.coef_dict.tolist() == [Fraction(-1, 4), Fraction(1, 2)]
+    assert remainder.coef_dict.tolist() == [Fraction(5, 4)]
+
+
+def test_coef_dict_in_place():
+    p = CoefDict({0: 1, 3: 2, 5: -1})
+    alias = p
+    p += CoefDict({5: 1, 1: 4})
+    assert p is alias and p == CoefDict({0: 1, 1: 4, 3: 2}) and p.degree() == 3 and len(p) == 3
+    p -= CoefDict({3: 2})
+    assert p.degree() == 1 and len(p) == 2
+    p *= 3
+    assert p == CoefDict({0: 3, 1: 12})
+    p.addmul(CoefDict({0: 1, 1: 4}), -3, 0)
+    assert not p and p.degree() == polyify('0').degree()
+    p.addmul(p, 2).addmul(CoefDict({0: 1, 2: 1}), 5, 4)
+    assert p == CoefDict({4: 5, 6: 5}) and p.degree() == 6
+    p *= 0
+    assert not p and len(p) == 0
+
+
+def test_coef_dict_synthetic_division():
+    # Divides x^3 - 6x^2 + 11x - 6 by x - 1 by cancelling the leading term with addmul until the degree drops below 1
+    p, d = CoefDict({3: 1, 2: -6, 1: 11, 0: -6}), CoefDict({1: 1, 0: -1})
+    quotient = CoefDict()
+    while p and p.degree() >= 1:
+        c, shift = p[p.degree()], p.degree() - 1
+        quotient[shift] = c
+        p.addmul(d, -c, shift)
+    assert quotient == CoefDict({2: 1, 1: -5, 0: 6}) and not p
+
+
+@pytest.mark.parametrize('p_input,constant', [('7', True), ('0', False), ('x^2+3', False), ('x', False)])
+def test_coef_dict_is_constant(p_input: str, constant: bool):
+    p = polyify(p_input)
+    assert p.is_constant() == constant
+    assert p.coef_dict[10] == 0 and 10 not in p.coef_dict.keys()
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pytest
+
+from src.useful_tools.math.prime_table import PrimeTable
+from src.useful_tools.math.primes import is_prime, prime_pi, sieve_of_eratosthenes
+
+BOUND = 100_003
+
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory: pytest.TempPathFactory):
+    with PrimeTable.build(BOUND, tmp_path_factory.mktemp('primes') / 'primes.bin', rank_bytes=64) as t:
+        yield t
+
+
+def test_prime_table_is_prime(table: PrimeTable):
+    sieve = sieve_of_eratosthenes(BOUND + 100)
+    assert all(table.is_prime(n) == bool(sieve[n]) for n in range(BOUND + 100))
+    assert table.is_prime(2 ** 61 - 1) and -7 not in table
+
+
+@pytest.mark.parametrize('x', [-1, 0, 1, 2, 5, 6, 7, 30, 31, 1919, 1920, 1921, 7919, 99991, BOUND, 10 ** 6])
+def test_prime_table_pi(table: PrimeTable, x: int):
+    assert table.pi(x) == prime_pi(x)
+
+
+@pytest.mark.parametrize('n,p', [(-5, 2), (2, 3), (4, 5), (5, 7), (7, 11), (7907, 7919), (99989, 99991),
+                                 (99991, 100003), (100003, 100019)])
+def test_prime_table_next_prime(table: PrimeTable, n: int, p: int):
+    assert table.next_prime(n) == p
+
+
+@pytest.mark.parametrize('lo,hi', [(0, 100), (2, 3), (6, 7), (7, 8), (1000, 2000), (99000, BOUND + 1)])
+def test_prime_table_primes(table: PrimeTable, lo: int, hi: int):
+    assert [*table.primes(lo, hi)] == [n for n in range(lo, hi) if is_prime(n)]
+
+
+def test_prime_table_bad_file(tmp_path: Path):
+    (tmp_path / 'bad.bin').write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        PrimeTable(tmp_path / 'bad.bin')
@@ -1,5 +1,7 @@
-from itertools import takewhile
+import math
+from itertools import islice, takewhile
 
+import numpy as np
 import pytest
 
 from src.useful_tools.math.primes import *
@@ -27,7 +29,15 @@ PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67
     (2147483647, True),  # Mersenne_31
     (137438953471, False),  # Mersenne_37
     (65537, True),  # Fermat_4
-    (4294967297, False)  # Fermat_5
+    (4294967297, False),  # Fermat_5
+    (3215031751, False),  # Strong pseudoprime to bases 2, 3, 5, 7
+    (3825123056546413051, False),  # Strong pseudoprime to the first 9 prime bases
+    (318665857834031151167461, False),  # Strong pseudoprime to the first 12 prime bases
+    (2305843009213693951, True),  # Mersenne_61
+    (2 ** 127 - 1, True),  # Mersenne_127
+    (2 ** 521 - 1, True),  # Mersenne_521
+    ((2 ** 89 - 1) * (2 ** 107 - 1), False),
+    (2 ** 128 + 1, False),  # Fermat_7
 ])
 def test_is_prime(prime: int, primality: bool):
     assert is_prime(prime) == primality
@@ -56,6 +66,11 @@ def test_check_prime(prime: int, result: int):
     assert check_prime(prime) == result
 
 
+@pytest.mark.parametrize('n', [5459, 5777, 10877, 75077, 97439, 100127])
+def test_strong_lucas_pseudoprimes(n: int):
+    assert strong_lucas_prp(n) and not is_prime(n)
+
+
 @pytest.mark.parametrize('n', [-2, -1, 0, 1])
 def test_check_prime_domain(n: int):
     with pytest.raises(ValueError):
@@ -74,3 +89,137 @@ def test_large_value_sieve_of_eratosthenes():
 
 def test_infinisieve():
     assert all(i == j for i, j in zip(infinisieve(), PRIMES))
+
+
+@pytest.mark.parametrize('n,factorization', [
+    (2, {2: 1}),
+    (12, {2: 2, 3: 1}),
+    (600851475143, {71: 1, 839: 1, 1471: 1, 6857: 1}),
+    (2 ** 64 + 1, {274177: 1, 67280421310721: 1}),  # Fermat_6
+    (2 ** 67 - 1, {193707721: 1, 761838257287: 1}),  # Mersenne_67
+    ((2 ** 61 - 1) ** 3 * 1000003 ** 2 * 97, {2 ** 61 - 1: 3, 1000003: 2, 97: 1}),
+    (1000000007 * 998244353, {1000000007: 1, 998244353: 1}),
+])
+def test_prime_factorization(n: int, factorization: dict[int, int]):
+    assert prime_factorization(n) == factorization
+
+
+@pytest.mark.parametrize('n', [-1, 0])
+def test_prime_factorization_domain(n: int):
+    with pytest.raises(ValueError):
+        prime_factorization(n)
+
+
+@pytest.mark.parametrize('n', [1, 2, 12, 36, 97, 360, 1001, 5040, 65536])
+def test_factors(n: int):
+    assert factors(n) == [d for d in range(1, n + 1) if not n % d]
+
+
+@pytest.mark.parametrize('n', [31, 48, 49, 50, 7919, 7920, 100_000])
+@pytest.mark.parametrize('segment_bytes', [1, 7, 1 << 18])
+def test_segmented_sieve(n: int, segment_bytes: int):
+    sieve = sieve_of_eratosthenes(n)
+    assert [*wheel_values(sieve_of_eratosthenes(n, compressed=True))] == [*sieve.search(1, 7)]
+    assert [p for block, segment in segmented_sieve(n, segment_bytes=segment_bytes)
+            for p in wheel_values(segment, block)] == [*sieve.search(1, 7)]
+
+
+@pytest.mark.parametrize('n', [1000, 100_000])
+def test_gen_primes_below_n_modes(n: int):
+    assert [*gen_primes_below_n(n, segmented=True)] == [*gen_primes_below_n(n, segmented=False)]
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 5, 6, 30, 31, 7919, 100_000])
+def test_gen_primes_below_n_chunked(n: int):
+    chunks = [*gen_primes_below_n(n, chunked=True)]
+    assert all(chunk.dtype == np.int64 for chunk in chunks)
+    assert [p for chunk in chunks for p in chunk.tolist()] == [*gen_primes_below_n(n)]
+
+
+@pytest.mark.parametrize('lo,hi', [
+    (0, 0), (0, 1), (0, 2), (0, 3), (2, 3), (5, 6), (7, 8), (29, 31), (30, 31), (31, 32),
+    (100, 50), (0, 7920), (7000, 7920), (7001, 7919), (1234, 5678), (-50, 20), (-1, 2), (-100, -10),
+])
+def test_primes_in_range(lo: int, hi: int):
+    assert [*primes_in_range(lo, hi)] == [p for p in PRIMES if lo <= p < hi]
+
+
+@pytest.mark.parametrize('lo', [10 ** 12, 10 ** 15, 10 ** 16 - 10 ** 4])
+def test_primes_in_range_large(lo: int):
+    assert [*primes_in_range(lo, lo + 10 ** 4)] == [n for n in range(lo, lo + 10 ** 4) if is_prime(n)]
+
+
+@pytest.mark.parametrize('n', [100, 10 ** 6, 10 ** 7 + 7])
+def test_parallel_sieve(n: int):
+    assert parallel_sieve(n, workers=3) == sieve_of_eratosthenes(n, compressed=True)
+
+
+@pytest.mark.parametrize('x,count', [
+    (0, 0), (1, 0), (2, 1), (100, 25), (7919, 1000), (65535, 6542), (65536, 6542), (65537, 6543),
+    (10 ** 6, 78498), (10 ** 9, 50847534), (10 ** 10, 455052511),
+])
+def test_prime_pi(x: int, count: int):
+    assert prime_pi(x) == count
+
+
+@pytest.mark.parametrize('n,prime', [
+    (1, 2), (1000, 7919), (6542, 65521), (6543, 65537), (78498, 999983), (10 ** 6, 15485863), (10 ** 8, 2038074743),
+])
+def test_nth_prime(n: int, prime: int):
+    assert nth_prime(n) == prime
+
+
+def test_infinisieve_across_windows():
+    primes = [*gen_primes_below_n(1_000_000)]
+    assert [*islice(infinisieve(), len(primes))] == primes
+
+
+def test_is_prime_batch():
+    numbers = [*range(200), 65535, 65536, 65537, 4294967291, 4294967295, 4294967311, 3215031751,
+               2 ** 61 - 1, 3825123056546413051, 2 ** 64 - 59, 2 ** 64 - 1, 2 ** 63 + 29, 2 ** 32 * 65537 + 1]
+    assert is_prime_batch(numbers).tolist() == [is_prime(n) for n in numbers]
+    assert is_prime_batch(np.arange(100, dtype=np.uint64).reshape(10, 10)).shape == (10, 10)
+
+
+def test_check_prime_batch():
+    numbers = [2, 3, 4, 9, 561, 41041, 825265, 2147483647, 137438953471, 4294967297, 1000003 * 1000033, 2 ** 64 - 1]
+    assert check_prime_batch(numbers).tolist() == [check_prime(n) for n in numbers]
+    with pytest.raises(ValueError):
+        check_prime_batch([2, 1])
+
+
+def test_spf_sieve():
+    spf = spf_sieve(10_000)
+    assert spf[:2].tolist() == [0, 1]
+    assert all(spf[n] == min(prime_factorization(n)) for n in range(2, 10_001))
+
+
+def test_prime_factorization_with_spf_table():
+    expected = {n: prime_factorization(n) for n in range(2, 5000)}
+    load_spf_table(5000)
+    try:
+        assert all(prime_factorization(n) == f for n, f in expected.items())
+        assert factors(4096) == [2 ** k for k in range(13)]
+        assert prime_factorization(2 ** 64 + 1) == {274177: 1, 67280421310721: 1}
+    finally:
+        unload_spf_table()
+
+
+@pytest.mark.parametrize('table,values', [
+    (euler_phi_table, [0, 1, 1, 2, 2, 4, 2, 6, 4, 6, 4, 10, 4, 12, 6, 8, 8, 16, 6, 18, 8]),
+    (mobius_table, [0, 1, -1, -1, 0, -1, 1, -1, 0, 0, 1, -1, 0, -1, 1, 1, 0, -1, 0, -1, 0]),
+    (divisor_count_table, [0, 1, 2, 2, 3, 2, 4, 2, 4, 3, 4, 2, 6, 2, 4, 4, 5, 2, 6, 2, 6]),
+    (divisor_sum_table, [0, 1, 3, 4, 7, 6, 12, 8, 15, 13, 18, 12, 28, 14, 24, 24, 31, 18, 39, 20, 42]),
+])
+def test_multiplicative_tables(table, values: list[int]):
+    assert table(20).tolist() == values
+    assert table(20, spf_sieve(100)).tolist() == values
+
+
+def test_multiplicative_tables_large():
+    n = 2048
+    phi, d, sigma = euler_phi_table(n), divisor_count_table(n), divisor_sum_table(n)
+    for k in range(1, n + 1):
+        divisors = factors(k)
+        assert d[k] == len(divisors) and sigma[k] == sum(divisors)
+        assert phi[k] == sum(math.gcd(i, k) == 1 for i in range(1, k + 1))
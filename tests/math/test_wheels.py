@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+from src.useful_tools.math.primes import (gen_primes_below_n, primes_in_range, segmented_sieve, sieve_of_eratosthenes,
+                                          wheel_array, wheel_values)
+from src.useful_tools.math.wheels import *
+
+
+WHEELS = [WHEEL_30, make_wheel(4), make_wheel(5)]
+
+
+@pytest.mark.parametrize('wheel', WHEELS)
+def test_wheel_tables(wheel: Wheel):
+    assert wheel.modulus == math.prod(wheel.primes)
+    assert wheel.residues == tuple(r for r in range(wheel.modulus) if math.gcd(r, wheel.modulus) == 1)
+    assert wheel.size % 8 == 0
+    assert sum(wheel.gaps) == wheel.modulus
+    for j, r in enumerate(wheel.residues):
+        assert wheel.index[r] == j
+        assert r + wheel.gaps[j] - wheel.residues[(j + 1) % wheel.size] in (0, wheel.modulus)
+        assert (wheel.multipliers[j] * r % wheel.modulus).tolist() == [*wheel.residues]
+    assert wheel.index.count(-1) == wheel.modulus - wheel.size
+
+
+@pytest.mark.parametrize('k', [2, 7])
+def test_make_wheel_domain(k: int):
+    with pytest.raises(ValueError):
+        make_wheel(k)
+
+
+@pytest.mark.parametrize('wheel', WHEELS)
+@pytest.mark.parametrize('n', [31, 211, 2310, 2311, 100_000])
+def test_wheel_sieves(wheel: Wheel, n: int):
+    sieve = sieve_of_eratosthenes(n)
+    primes = [*sieve.search(1)]
+    assert sieve_of_eratosthenes(n, wheel=wheel) == sieve
+    assert [*gen_primes_below_n(n, wheel=wheel, segmented=False)] == primes
+    assert [*gen_primes_below_n(n, wheel=wheel, segmented=True)] == primes
+    for segment_bytes in (1, 100):
+        segments = [*segmented_sieve(n, segment_bytes=segment_bytes, wheel=wheel)]
+        assert [p for block, segment in segments for p in wheel_values(segment, block, wheel)] == \
+               [p for p in primes if p not in wheel.primes]
+        assert [p for block, segment in segments for p in wheel_array(segment, block, wheel).tolist()] == \
+               [p for p in primes if p not in wheel.primes]
+
+
+@pytest.mark.parametrize('wheel', WHEELS)
+@pytest.mark.parametrize('lo,hi', [(0, 12), (7, 14), (2309, 4621), (10 ** 12, 10 ** 12 + 10 ** 4)])
+def test_wheel_primes_in_range(wheel: Wheel, lo: int, hi: int):
+    assert [*primes_in_range(lo, hi, wheel=wheel)] == [*primes_in_range(lo, hi, wheel=WHEEL_30)]
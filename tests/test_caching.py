@@ -0,0 +1,101 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from src.useful_tools.caching import ARCCache, LRUCache, configurable_cache
+from src.useful_tools.math.primes import is_prime, prime_factorization
+
+
+def test_lru_eviction():
+    cache = LRUCache(2)
+    cache[1] = 'a'
+    cache[2] = 'b'
+    assert cache.get(1) == 'a'
+    cache[3] = 'c'
+    assert cache.get(2, None) is None and cache.get(1) == 'a' and cache.get(3) == 'c'
+    assert cache.evictions == 1 and len(cache) == 2
+
+
+def test_arc_keeps_frequent_keys_through_a_scan():
+    cache = ARCCache(4)
+    for _ in range(2):
+        for k in (1, 2):
+            cache[k] = k
+            cache.get(k)
+    for k in range(100, 120):
+        cache[k] = k
+    assert cache.get(1) == 1 and cache.get(2) == 2
+    assert len(cache) == 4 and cache.evictions == 18
+
+
+@pytest.mark.parametrize('policy', ['lru', 'arc'])
+def test_cache_never_exceeds_maxsize(policy: str):
+    @configurable_cache(maxsize=16, policy=policy)
+    def square(n: int) -> int:
+        return n * n
+
+    for i in range(1000):
+        assert square(i * 7919 % 37) == (i * 7919 % 37) ** 2
+    info = square.cache_info()
+    assert info.currsize <= 16 and info.hits + info.misses == 1000 and info.policy == policy
+
+
+def test_configure_and_counters():
+    @configurable_cache(maxsize=2)
+    def double(n: int) -> int:
+        return 2 * n
+
+    for i in (1, 2, 1, 3, 2):
+        double(i)
+    info = double.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 4, 2)
+    double.configure(maxsize=10, policy='arc')
+    assert double.cache_info().maxsize == 10 and double.cache_info().misses == 0
+    with pytest.raises(ValueError):
+        double.configure(policy='fifo')
+    double.configure(policy='lru')
+    assert double.cache is None and double.cache_info().maxsize == 10
+
+
+def test_bypass():
+    calls = []
+
+    @configurable_cache(maxsize=4, bypass=lambda n: n < 10)
+    def record(n: int) -> int:
+        calls.append(n)
+        return -n
+
+    assert [record(n) for n in (1, 1, 20, 20)] == [-1, -1, -20, -20]
+    assert calls == [1, 1, 20]
+    info = record.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def _count_calls(path: str) -> int:
+    calls = []
+
+    @configurable_cache(maxsize=8, shared_path=path)
+    def record(n: int) -> int:
+        calls.append(n)
+        return n + 1
+
+    assert [record(i) for i in range(5)] == [1, 2, 3, 4, 5]
+    return len(calls)
+
+
+def test_shared_tier_across_processes(tmp_path: Path):
+    path = str(tmp_path / 'cache.sqlite')
+    assert _count_calls(path) == 5
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        assert pool.apply(_count_calls, (path,)) == 0
+
+
+def test_prime_caches():
+    is_prime.cache_clear()
+    assert is_prime(2 ** 61 - 1) and is_prime(2 ** 61 - 1)
+    assert is_prime.cache_info().hits == 1
+    assert is_prime(65521) and is_prime.cache_info().misses == 1
+    f = prime_factorization(360)
+    f[2] = 100
+    assert prime_factorization(360) == {2: 3, 3: 2, 5: 1}